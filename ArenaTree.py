@@ -0,0 +1,269 @@
+from array import array
+
+from CompilerParser import CompilerParser
+from ParseTree import ParseTree
+
+NO_NODE = -1
+
+
+class ArenaTree:
+    """
+    Parse tree stored as flat parallel arrays (struct-of-arrays).
+    Node i has a type code, a first child, a next sibling and a token index;
+    the token index is -1 for interior nodes and points into self.tokens for leaves.
+    When parsing a token sequence, self.tokens is that sequence itself.
+    Nodes are numbered in preorder, so walking range(len(tree)) visits the whole tree.
+    Interior node values are not stored, as the parser never sets them.
+    """
+
+    def __init__(self):
+        self.node_types = array('B')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.token_index = array('i')
+        self.type_names = []
+        self.type_codes = {}
+        self.tokens = []
+
+    def typeCode(self, type):
+        code = self.type_codes.get(type)
+        if code is None:
+            code = self.type_codes[type] = len(self.type_names)
+            self.type_names.append(type)
+        return code
+
+    def newNode(self, type, token_index=NO_NODE):
+        index = len(self.node_types)
+        self.node_types.append(self.typeCode(type))
+        self.first_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.token_index.append(token_index)
+        return index
+
+    def newLeaf(self, token):
+        if isinstance(token, int):
+            return self.newNode(self.tokens[token].getType(), token)
+        self.tokens.append(token)
+        return self.newNode(token.getType(), len(self.tokens) - 1)
+
+    def newBuilder(self, type):
+        return ArenaBuilder(self, self.newNode(type))
+
+    def __len__(self):
+        return len(self.node_types)
+
+    def root(self):
+        return ArenaNode(self, 0)
+
+    def leafToken(self, start, stop, step=1):
+        """
+        Token index of the first leaf met scanning node indices range(start, stop, step).
+        """
+        token_index = self.token_index
+        for index in range(start, stop, step):
+            if token_index[index] != NO_NODE:
+                return token_index[index]
+        return None
+
+    def lastDescendant(self, index):
+        child = self.first_child[index]
+        while child != NO_NODE:
+            index = child
+            while self.next_sibling[index] != NO_NODE:
+                index = self.next_sibling[index]
+            child = self.first_child[index]
+        return index
+
+    def children(self, index):
+        child = self.first_child[index]
+        next_sibling = self.next_sibling
+        while child != NO_NODE:
+            yield child
+            child = next_sibling[child]
+
+    def __getstate__(self):
+        """
+        Pickle as preorder type codes plus the arity of each interior node.
+        Links are rebuilt on load, and leaf token indices shrink to the first index
+        when the leaves consume consecutive tokens in order.
+        """
+        arity = array('I')
+        leaves = array('i')
+        leaf_types = set()
+        token_index = self.token_index
+        for index in range(len(self.node_types)):
+            if token_index[index] == NO_NODE:
+                arity.append(sum(1 for _ in self.children(index)))
+            else:
+                leaves.append(token_index[index])
+                leaf_types.add(self.node_types[index])
+        if leaves and leaves == array('i', range(leaves[0], leaves[0] + len(leaves))):
+            leaves = leaves[0]
+        elif not leaves:
+            leaves = 0
+        return (self.type_names, sorted(leaf_types), self.node_types, arity, leaves, self.tokens)
+
+    def __setstate__(self, state):
+        self.type_names, leaf_types, self.node_types, arity, leaves, self.tokens = state
+        self.type_codes = {type: code for code, type in enumerate(self.type_names)}
+        size = len(self.node_types)
+        self.first_child = array('i', [NO_NODE]) * size
+        self.next_sibling = array('i', [NO_NODE]) * size
+        self.token_index = array('i', [NO_NODE]) * size
+        leaf_types = set(leaf_types)
+        open_nodes = []
+        interior = 0
+        leaf = 0
+        for index, code in enumerate(self.node_types):
+            if open_nodes:
+                parent = open_nodes[-1]
+                if parent[2] == NO_NODE:
+                    self.first_child[parent[0]] = index
+                else:
+                    self.next_sibling[parent[2]] = index
+                parent[2] = index
+                parent[1] -= 1
+                if parent[1] == 0:
+                    open_nodes.pop()
+            if code in leaf_types:
+                self.token_index[index] = leaves + leaf if isinstance(leaves, int) else leaves[leaf]
+                leaf += 1
+            else:
+                if arity[interior]:
+                    open_nodes.append([index, arity[interior], NO_NODE])
+                interior += 1
+
+    @classmethod
+    def fromParseTree(cls, tree):
+        arena = cls()
+        root = arena.newBuilder(tree.getType())
+        stack = [(root, iter(tree.getChildren()))]
+        while stack:
+            builder, children = stack[-1]
+            for child in children:
+                if isinstance(child, ParseTree):
+                    child_builder = arena.newBuilder(child.getType())
+                    builder.addChild(child_builder)
+                    stack.append((child_builder, iter(child.getChildren())))
+                    break
+                builder.addChild(child)
+            else:
+                stack.pop()
+        return arena
+
+    def toParseTree(self):
+        trees = [None] * len(self.node_types)
+        for index in range(len(self.node_types) - 1, -1, -1):
+            token_index = self.token_index[index]
+            if token_index != NO_NODE:
+                trees[index] = self.tokens[token_index]
+                continue
+            tree = ParseTree(self.type_names[self.node_types[index]])
+            for child in self.children(index):
+                tree.addChild(trees[child])
+                trees[child] = None
+            trees[index] = tree
+        return trees[0]
+
+
+class ArenaBuilder:
+    """
+    Handle returned by ArenaParser.newTree while a production is being parsed.
+    Supports addChild so the compile* methods can build straight into the arena;
+    a child is another builder, a Token, or the index of a token already in the arena.
+    """
+    __slots__ = ('arena', 'index', 'last')
+
+    def __init__(self, arena, index):
+        self.arena = arena
+        self.index = index
+        self.last = NO_NODE
+
+    def addChild(self, child):
+        arena = self.arena
+        if isinstance(child, ArenaBuilder):
+            index = child.index
+        else:
+            index = arena.newLeaf(child)
+        if self.last == NO_NODE:
+            arena.first_child[self.index] = index
+        else:
+            arena.next_sibling[self.last] = index
+        self.last = index
+
+    def getType(self):
+        return self.arena.type_names[self.arena.node_types[self.index]]
+
+
+class ArenaNode:
+    """
+    Lightweight read-only view of one arena node with the ParseTree/Token interface.
+    """
+    __slots__ = ('arena', 'index')
+
+    def __init__(self, arena, index):
+        self.arena = arena
+        self.index = index
+
+    def isLeaf(self):
+        return self.arena.token_index[self.index] != NO_NODE
+
+    def getType(self):
+        return self.arena.type_names[self.arena.node_types[self.index]]
+
+    def getValue(self):
+        token_index = self.arena.token_index[self.index]
+        return None if token_index == NO_NODE else self.arena.tokens[token_index].getValue()
+
+    def getChildren(self):
+        return [ArenaNode(self.arena, child) for child in self.arena.children(self.index)]
+
+    def span(self):
+        """
+        The tokens this node covers, as indices into the arena's tokens. Nodes are in preorder
+        and leaves in token order, so these are read off the leaves around the node's subtree.
+        @return A (start, end) pair with end exclusive
+        """
+        arena = self.arena
+        last = arena.lastDescendant(self.index)
+        end = arena.leafToken(last + 1, len(arena))
+        if end is None:
+            end = arena.leafToken(len(arena) - 1, -1, -1)
+            end = 0 if end is None else end + 1
+        start = arena.leafToken(self.index, last + 1)
+        return (end if start is None else start, end)
+
+    def __eq__(self, other):
+        return isinstance(other, ArenaNode) and self.arena is other.arena and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.arena), self.index))
+
+    def __repr__(self):
+        if self.isLeaf():
+            return f"Token({self.getType()}, {self.getValue()})"
+        return f"ParseTree({self.getType()}, None, {self.getChildren()})"
+
+
+class ArenaParser(CompilerParser):
+    """
+    CompilerParser that builds its tree directly into an ArenaTree.
+    Can be combined with other parser modes, e.g. class P(ArenaParser, TokenStreamParser).
+    """
+
+    def __init__(self, tokens):
+        self.arena = ArenaTree()
+        super().__init__(tokens)
+        if self.stream is None:
+            self.arena.tokens = self.tokens
+
+    def newTree(self, type):
+        return self.arena.newBuilder(type)
+
+    def mustbe(self, type, value=None):
+        token = super().mustbe(type, value)
+        return token if self.stream is not None else self.pos - 1
+
+    def parse(self):
+        self.compileProgram()
+        return self.arena.root()
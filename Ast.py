@@ -0,0 +1,272 @@
+from ParseTree import ParseException
+
+
+class Node:
+    """
+    Base of the slim AST. Each construct lists its attributes in __slots__;
+    attributes hold strings, nested Nodes, tuples of Nodes or None.
+    child_fields names the attributes that hold a Node, a tuple of Nodes or None.
+    """
+    __slots__ = ()
+    child_fields = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def children(self):
+        for name in self.child_fields:
+            value = getattr(self, name)
+            if isinstance(value, tuple):
+                yield from value
+            elif value is not None:
+                yield value
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class Class(Node):
+    __slots__ = ('name', 'fields', 'subroutines')
+    child_fields = ('fields', 'subroutines')
+
+
+class ClassVarDec(Node):
+    __slots__ = ('kind', 'type', 'names')
+
+
+class Subroutine(Node):
+    __slots__ = ('kind', 'return_type', 'name', 'parameters', 'locals', 'body')
+    child_fields = ('parameters', 'locals', 'body')
+
+
+class Parameter(Node):
+    __slots__ = ('type', 'name')
+
+
+class VarDec(Node):
+    __slots__ = ('type', 'names')
+
+
+class Let(Node):
+    __slots__ = ('name', 'index', 'value')
+    child_fields = ('index', 'value')
+
+
+class If(Node):
+    __slots__ = ('condition', 'then_body', 'else_body')
+    child_fields = ('condition', 'then_body', 'else_body')
+
+
+class While(Node):
+    __slots__ = ('condition', 'body')
+    child_fields = ('condition', 'body')
+
+
+class Do(Node):
+    __slots__ = ('call',)
+    child_fields = ('call',)
+
+
+class Return(Node):
+    __slots__ = ('value',)
+    child_fields = ('value',)
+
+
+class BinOp(Node):
+    __slots__ = ('op', 'left', 'right')
+    child_fields = ('left', 'right')
+
+
+class UnaryOp(Node):
+    __slots__ = ('op', 'operand')
+    child_fields = ('operand',)
+
+
+class IntConst(Node):
+    __slots__ = ('value',)
+
+
+class StringConst(Node):
+    __slots__ = ('value',)
+
+
+class KeywordConst(Node):
+    __slots__ = ('value',)
+
+
+class Var(Node):
+    __slots__ = ('name',)
+
+
+class Index(Node):
+    __slots__ = ('name', 'index')
+    child_fields = ('index',)
+
+
+class Call(Node):
+    __slots__ = ('receiver', 'name', 'args')
+    child_fields = ('args',)
+
+
+def walk(node):
+    """
+    Yield node and every node below it in preorder.
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        for name in reversed(node.child_fields):
+            value = getattr(node, name)
+            if type(value) is tuple:
+                stack.extend(reversed(value))
+            elif value is not None:
+                stack.append(value)
+
+
+def countNodes(node):
+    return sum(1 for _ in walk(node))
+
+
+def lower(tree):
+    """
+    Lower a concrete parse tree to the AST: punctuation is dropped, single-operand
+    expression/term wrappers and parentheses collapse, and operator chains become
+    left-associative BinOps, matching Jack's lack of precedence.
+    @param tree A program or class node of a ParseTree, ArenaNode or MappedNode tree
+    @return A Class
+    """
+    if tree.getType() == 'program':
+        tree = tree.getChildren()[0]
+    children = tree.getChildren()
+    fields = []
+    subroutines = []
+    for child in children[3:-1]:
+        if child.getType() == 'classVarDec':
+            parts = child.getChildren()
+            fields.append(ClassVarDec(parts[0].getValue(), typeName(parts[1]), names(parts[2:])))
+        else:
+            subroutines.append(lowerSubroutine(child))
+    return Class(children[1].getValue(), tuple(fields), tuple(subroutines))
+
+
+def typeName(node):
+    return node.getChildren()[0].getValue() if node.getType() == 'type' else node.getValue()
+
+
+def names(nodes):
+    return tuple(node.getValue() for node in nodes if node.getType() == 'identifier')
+
+
+def lowerSubroutine(node):
+    parts = node.getChildren()
+    parameter_nodes = parts[4].getChildren()
+    parameters = tuple(Parameter(typeName(parameter_nodes[index]), parameter_nodes[index + 1].getValue())
+                       for index in range(0, len(parameter_nodes), 3))
+    body = parts[6].getChildren()
+    local_vars = tuple(VarDec(typeName(child.getChildren()[1]), names(child.getChildren()[2:]))
+                       for child in body if child.getType() == 'varDec')
+    return Subroutine(parts[0].getValue(), typeName(parts[1]), parts[2].getValue(), parameters, local_vars,
+                      lowerStatements(body[-2]))
+
+
+def lowerStatements(node):
+    return tuple(lowerStatement(child) for child in node.getChildren())
+
+
+def lowerStatement(node):
+    type = node.getType()
+    parts = node.getChildren()
+    if type == 'letStatement':
+        index = lowerExpression(parts[3]) if len(parts) == 8 else None
+        return Let(parts[1].getValue(), index, lowerExpression(parts[-2]))
+    if type == 'ifStatement':
+        else_body = lowerStatements(parts[9]) if len(parts) == 11 else None
+        return If(lowerExpression(parts[2]), lowerStatements(parts[5]), else_body)
+    if type == 'whileStatement':
+        return While(lowerExpression(parts[2]), lowerStatements(parts[5]))
+    if type == 'doStatement':
+        call = parts[1].getChildren()
+        return Do(lowerCall(call, lowerExpression(call[-2])))
+    if type == 'returnStatement':
+        return Return(lowerExpression(parts[1]) if len(parts) == 3 else None)
+    raise ParseException(f"Cannot lower {type}")
+
+
+EXPRESSION_NODES = frozenset(['expression', 'term', 'expressionList'])
+
+
+def lowerExpression(node):
+    """
+    Lower an expression, term or expressionList node; an expressionList becomes a tuple.
+    Runs on an explicit stack of [type, children, next child, lowered operands] frames,
+    so nesting depth is bounded only by memory, as in IterativeExpressionParser.
+    Constant and variable terms are lowered in place without a frame of their own.
+    """
+    stack = [[node.getType(), node.getChildren(), 0, []]]
+    while True:
+        frame = stack[-1]
+        type, parts, index, operands = frame
+        while index < len(parts):
+            child = parts[index]
+            index += 1
+            child_type = child.getType()
+            if child_type in EXPRESSION_NODES:
+                child_parts = child.getChildren()
+                if child_type == 'term' and len(child_parts) == 1:
+                    operands.append(lowerTerm(child_parts, operands))
+                    continue
+                frame[2] = index
+                stack.append([child_type, child_parts, 0, []])
+                break
+        else:
+            if type == 'expression':
+                result = operands[0]
+                for position in range(1, len(operands)):
+                    result = BinOp(parts[2 * position - 1].getValue(), result, operands[position])
+            elif type == 'expressionList':
+                result = tuple(operands)
+            else:
+                result = lowerTerm(parts, operands)
+            stack.pop()
+            if not stack:
+                return result
+            stack[-1][3].append(result)
+
+
+def lowerTerm(parts, operands):
+    """
+    Build a term from its children, taking the lowered subexpression it holds, if any, from operands.
+    """
+    first = parts[0]
+    type = first.getType()
+    if type == 'integerConstant':
+        return IntConst(int(first.getValue()))
+    if type == 'stringConstant':
+        return StringConst(first.getValue())
+    if type == 'keyword':
+        return KeywordConst(first.getValue())
+    if type == 'identifier':
+        if len(parts) == 1:
+            return Var(first.getValue())
+        if parts[1].getValue() == '[':
+            return Index(first.getValue(), operands.pop())
+        return lowerCall(parts, operands.pop())
+    if first.getValue() == '(':
+        return operands.pop()
+    return UnaryOp(first.getValue(), operands.pop())
+
+
+def lowerCall(parts, args):
+    if parts[1].getValue() == '.':
+        return Call(parts[0].getValue(), parts[2].getValue(), args)
+    return Call(None, parts[0].getValue(), args)
@@ -1,3 +1,41 @@
+import sys
+from collections import deque
+
+from JackTokenizer import JackTokenizer
+from ParseTree import ParseTree, ParseException
+from Token import Token
+
+GRAMMAR_VERSION = 3
+
+CLASS_VAR_FIRST = frozenset([('keyword', 'static'), ('keyword', 'field')])
+
+SUBROUTINE_FIRST = frozenset([('keyword', 'constructor'), ('keyword', 'function'), ('keyword', 'method')])
+
+TYPE_FIRST = frozenset([('keyword', 'int'), ('keyword', 'char'), ('keyword', 'boolean'), ('identifier', None)])
+
+BINARY_OPS = frozenset(('symbol', op) for op in '+-*/&|<>=')
+
+STATEMENT_FIRST = {
+    ('keyword', 'let'): 'compileLet',
+    ('keyword', 'if'): 'compileIf',
+    ('keyword', 'while'): 'compileWhile',
+    ('keyword', 'do'): 'compileDo',
+    ('keyword', 'return'): 'compileReturn',
+}
+
+TERM_FIRST = {
+    ('integerConstant', None): 'compileTermConstant',
+    ('stringConstant', None): 'compileTermConstant',
+    ('keyword', 'true'): 'compileTermConstant',
+    ('keyword', 'false'): 'compileTermConstant',
+    ('keyword', 'null'): 'compileTermConstant',
+    ('keyword', 'this'): 'compileTermConstant',
+    ('identifier', None): 'compileTermIdentifier',
+    ('symbol', '('): 'compileTermParenthesised',
+    ('symbol', '-'): 'compileTermUnary',
+    ('symbol', '~'): 'compileTermUnary',
+}
+
 # from ParseTree import ParseTree, Token, ParseException
 
 # class CompilerParser:
@@ -268,15 +306,35 @@
 #         print(f"Error Parsing: {e}")
 
 class CompilerParser:
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.buildDispatchTables()
+
+    @classmethod
+    def buildDispatchTables(cls):
+        cls.statement_productions = {key: getattr(cls, name) for key, name in STATEMENT_FIRST.items()}
+        cls.term_productions = {key: getattr(cls, name) for key, name in TERM_FIRST.items()}
+
     def __init__(self, tokens):
-        self.tokens = tokens
+        if isinstance(tokens, (list, tuple)):
+            self.tokens = tokens
+            self.stream = None
+        else:
+            self.tokens = None
+            self.stream = iter(tokens)
+            self.lookahead = deque()
         self.current_token = None
         self.pos = -1
         self.next()
 
     def next(self):
         self.pos += 1
-        if self.pos < len(self.tokens):
+        if self.stream is not None:
+            if self.lookahead:
+                self.current_token = self.lookahead.popleft()
+            else:
+                self.current_token = next(self.stream, None)
+        elif self.pos < len(self.tokens):
             self.current_token = self.tokens[self.pos]
         else:
             self.current_token = None
@@ -284,6 +342,38 @@ class CompilerParser:
     def current(self):
         return self.current_token
 
+    def currentValue(self):
+        return self.current_token.getValue() if self.current_token else None
+
+    def currentKey(self):
+        token = self.current_token
+        if token is None:
+            return None
+        type = token.getType()
+        if type == 'keyword' or type == 'symbol':
+            return (type, token.getValue())
+        return (type, None)
+
+    def seek(self, pos):
+        if self.stream is not None:
+            raise ValueError("Cannot seek in a streamed token source")
+        self.pos = pos - 1
+        self.next()
+
+    def newTree(self, type):
+        return ParseTree(type, start=self.pos)
+
+    def peek(self, offset=1):
+        if self.stream is None:
+            index = self.pos + offset
+            return self.tokens[index] if index < len(self.tokens) else None
+        while len(self.lookahead) < offset:
+            token = next(self.stream, None)
+            if token is None:
+                return None
+            self.lookahead.append(token)
+        return self.lookahead[offset - 1]
+
     def have(self, type, value=None):
         if self.current_token and self.current_token.getType() == type:
             if value is None or self.current_token.getValue() == value:
@@ -292,34 +382,34 @@ class CompilerParser:
 
     def mustbe(self, type, value=None):
         if not self.have(type, value):
-            raise ParseException(f"Expected {type} with value {value} but found {self.current_token}")
+            raise ParseException(f"Expected {type} with value {value} but found {self.current_token}", self.pos)
         token = self.current_token
         self.next()
         return token
 
     def compileProgram(self):
-        tree = ParseTree('program')
+        tree = self.newTree('program')
         tree.addChild(self.compileClass())
         return tree
 
     def compileClass(self):
-        tree = ParseTree('class')
+        tree = self.newTree('class')
         tree.addChild(self.mustbe('keyword', 'class'))
         tree.addChild(self.mustbe('identifier'))
         tree.addChild(self.mustbe('symbol', '{'))
         
-        while self.have('keyword', 'static') or self.have('keyword', 'field'):
+        while self.currentKey() in CLASS_VAR_FIRST:
             tree.addChild(self.compileClassVarDec())
         
-        while self.have('keyword', 'constructor') or self.have('keyword', 'function') or self.have('keyword', 'method'):
+        while self.currentKey() in SUBROUTINE_FIRST:
             tree.addChild(self.compileSubroutine())
         
         tree.addChild(self.mustbe('symbol', '}'))
         return tree
 
     def compileClassVarDec(self):
-        tree = ParseTree('classVarDec')
-        if self.have('keyword', 'static') or self.have('keyword', 'field'):
+        tree = self.newTree('classVarDec')
+        if self.currentKey() in CLASS_VAR_FIRST:
             tree.addChild(self.mustbe('keyword'))
         tree.addChild(self.compileType())
         tree.addChild(self.mustbe('identifier'))
@@ -330,19 +420,21 @@ class CompilerParser:
         return tree
 
     def compileType(self):
-        tree = ParseTree('type')
-        if self.have('keyword', 'int') or self.have('keyword', 'char') or self.have('keyword', 'boolean'):
-            tree.addChild(self.mustbe('keyword'))
-        elif self.have('identifier'):
-            tree.addChild(self.mustbe('identifier'))
+        tree = self.newTree('type')
+        key = self.currentKey()
+        if key in TYPE_FIRST:
+            tree.addChild(self.mustbe(key[0]))
         else:
-            raise ParseException(f"Expected type but found {self.current_token}")
+            raise ParseException(f"Expected type but found {self.current_token}", self.pos)
         return tree
 
     def compileSubroutine(self):
-        tree = ParseTree('subroutine')
+        tree = self.newTree('subroutine')
         tree.addChild(self.mustbe('keyword'))
-        tree.addChild(self.compileType())
+        if self.have('keyword', 'void'):
+            tree.addChild(self.mustbe('keyword', 'void'))
+        else:
+            tree.addChild(self.compileType())
         tree.addChild(self.mustbe('identifier'))
         tree.addChild(self.mustbe('symbol', '('))
         tree.addChild(self.compileParameterList())
@@ -351,8 +443,8 @@ class CompilerParser:
         return tree
 
     def compileParameterList(self):
-        tree = ParseTree('parameterList')
-        if self.have('keyword', 'int') or self.have('keyword', 'char') or self.have('keyword', 'boolean') or self.have('identifier'):
+        tree = self.newTree('parameterList')
+        if self.currentKey() in TYPE_FIRST:
             tree.addChild(self.compileType())
             tree.addChild(self.mustbe('identifier'))
             while self.have('symbol', ','):
@@ -362,7 +454,7 @@ class CompilerParser:
         return tree
 
     def compileSubroutineBody(self):
-        tree = ParseTree('subroutineBody')
+        tree = self.newTree('subroutineBody')
         tree.addChild(self.mustbe('symbol', '{'))
         while self.have('keyword', 'var'):
             tree.addChild(self.compileVarDec())
@@ -371,7 +463,7 @@ class CompilerParser:
         return tree
 
     def compileVarDec(self):
-        tree = ParseTree('varDec')
+        tree = self.newTree('varDec')
         tree.addChild(self.mustbe('keyword', 'var'))
         tree.addChild(self.compileType())
         tree.addChild(self.mustbe('identifier'))
@@ -382,22 +474,16 @@ class CompilerParser:
         return tree
 
     def compileStatements(self):
-        tree = ParseTree('statements')
-        while self.have('keyword', 'let') or self.have('keyword', 'if') or self.have('keyword', 'while') or self.have('keyword', 'do') or self.have('keyword', 'return'):
-            if self.have('keyword', 'let'):
-                tree.addChild(self.compileLet())
-            elif self.have('keyword', 'if'):
-                tree.addChild(self.compileIf())
-            elif self.have('keyword', 'while'):
-                tree.addChild(self.compileWhile())
-            elif self.have('keyword', 'do'):
-                tree.addChild(self.compileDo())
-            elif self.have('keyword', 'return'):
-                tree.addChild(self.compileReturn())
+        tree = self.newTree('statements')
+        productions = self.statement_productions
+        production = productions.get(self.currentKey())
+        while production is not None:
+            tree.addChild(production(self))
+            production = productions.get(self.currentKey())
         return tree
 
     def compileLet(self):
-        tree = ParseTree('letStatement')
+        tree = self.newTree('letStatement')
         tree.addChild(self.mustbe('keyword', 'let'))
         tree.addChild(self.mustbe('identifier'))
         if self.have('symbol', '['):
@@ -410,7 +496,7 @@ class CompilerParser:
         return tree
 
     def compileIf(self):
-        tree = ParseTree('ifStatement')
+        tree = self.newTree('ifStatement')
         tree.addChild(self.mustbe('keyword', 'if'))
         tree.addChild(self.mustbe('symbol', '('))
         tree.addChild(self.compileExpression())
@@ -426,7 +512,7 @@ class CompilerParser:
         return tree
 
     def compileWhile(self):
-        tree = ParseTree('whileStatement')
+        tree = self.newTree('whileStatement')
         tree.addChild(self.mustbe('keyword', 'while'))
         tree.addChild(self.mustbe('symbol', '('))
         tree.addChild(self.compileExpression())
@@ -437,14 +523,14 @@ class CompilerParser:
         return tree
 
     def compileDo(self):
-        tree = ParseTree('doStatement')
+        tree = self.newTree('doStatement')
         tree.addChild(self.mustbe('keyword', 'do'))
         tree.addChild(self.compileSubroutineCall())
         tree.addChild(self.mustbe('symbol', ';'))
         return tree
 
     def compileReturn(self):
-        tree = ParseTree('returnStatement')
+        tree = self.newTree('returnStatement')
         tree.addChild(self.mustbe('keyword', 'return'))
         if not self.have('symbol', ';'):
             tree.addChild(self.compileExpression())
@@ -452,50 +538,54 @@ class CompilerParser:
         return tree
 
     def compileExpression(self):
-        tree = ParseTree('expression')
+        tree = self.newTree('expression')
         tree.addChild(self.compileTerm())
-        while self.have('symbol') and self.current_token.getValue() in ('+', '-', '*', '/', '&', '|', '<', '>', '='):
+        while self.currentKey() in BINARY_OPS:
             tree.addChild(self.mustbe('symbol'))
             tree.addChild(self.compileTerm())
         return tree
 
     def compileTerm(self):
-        tree = ParseTree('term')
-        if self.have('integerConstant'):
-            tree.addChild(self.mustbe('integerConstant'))
-        elif self.have('stringConstant'):
-            tree.addChild(self.mustbe('stringConstant'))
-        elif self.have('keyword') and self.current_token.getValue() in ('true', 'false', 'null', 'this'):
-            tree.addChild(self.mustbe('keyword'))
-        elif self.have('identifier'):
+        tree = self.newTree('term')
+        key = self.currentKey()
+        production = self.term_productions.get(key)
+        if production is None:
+            raise ParseException(f"Expected term but found {self.current_token}", self.pos)
+        production(self, tree, key)
+        return tree
+
+    def compileTermConstant(self, tree, key):
+        tree.addChild(self.mustbe(key[0]))
+
+    def compileTermIdentifier(self, tree, key):
+        tree.addChild(self.mustbe('identifier'))
+        key = self.currentKey()
+        if key == ('symbol', '['):
+            tree.addChild(self.mustbe('symbol', '['))
+            tree.addChild(self.compileExpression())
+            tree.addChild(self.mustbe('symbol', ']'))
+        elif key == ('symbol', '('):
+            tree.addChild(self.mustbe('symbol', '('))
+            tree.addChild(self.compileExpressionList())
+            tree.addChild(self.mustbe('symbol', ')'))
+        elif key == ('symbol', '.'):
+            tree.addChild(self.mustbe('symbol', '.'))
             tree.addChild(self.mustbe('identifier'))
-            if self.have('symbol', '['):
-                tree.addChild(self.mustbe('symbol', '['))
-                tree.addChild(self.compileExpression())
-                tree.addChild(self.mustbe('symbol', ']'))
-            elif self.have('symbol', '('):
-                tree.addChild(self.mustbe('symbol', '('))
-                tree.addChild(self.compileExpressionList())
-                tree.addChild(self.mustbe('symbol', ')'))
-            elif self.have('symbol', '.'):
-                tree.addChild(self.mustbe('symbol', '.'))
-                tree.addChild(self.mustbe('identifier'))
-                tree.addChild(self.mustbe('symbol', '('))
-                tree.addChild(self.compileExpressionList())
-                tree.addChild(self.mustbe('symbol', ')'))
-        elif self.have('symbol', '('):
             tree.addChild(self.mustbe('symbol', '('))
-            tree.addChild(self.compileExpression())
+            tree.addChild(self.compileExpressionList())
             tree.addChild(self.mustbe('symbol', ')'))
-        elif self.have('symbol') and self.current_token.getValue() in ('-', '~'):
-            tree.addChild(self.mustbe('symbol'))
-            tree.addChild(self.compileTerm())
-        else:
-            raise ParseException(f"Expected term but found {self.current_token}")
-        return tree
+
+    def compileTermParenthesised(self, tree, key):
+        tree.addChild(self.mustbe('symbol', '('))
+        tree.addChild(self.compileExpression())
+        tree.addChild(self.mustbe('symbol', ')'))
+
+    def compileTermUnary(self, tree, key):
+        tree.addChild(self.mustbe('symbol'))
+        tree.addChild(self.compileTerm())
 
     def compileExpressionList(self):
-        tree = ParseTree('expressionList')
+        tree = self.newTree('expressionList')
         if not self.have('symbol', ')'):
             tree.addChild(self.compileExpression())
             while self.have('symbol', ','):
@@ -503,7 +593,27 @@ class CompilerParser:
                 tree.addChild(self.compileExpression())
         return tree
 
+    def compileSubroutineCall(self):
+        tree = self.newTree('subroutineCall')
+        tree.addChild(self.mustbe('identifier'))
+        if self.have('symbol', '.'):
+            tree.addChild(self.mustbe('symbol', '.'))
+            tree.addChild(self.mustbe('identifier'))
+        tree.addChild(self.mustbe('symbol', '('))
+        tree.addChild(self.compileExpressionList())
+        tree.addChild(self.mustbe('symbol', ')'))
+        return tree
+
+
+CompilerParser.buildDispatchTables()
+
+
 def main():
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            parser = CompilerParser(JackTokenizer(path))
+            print(parser.compileProgram())
+        return
     tokens = [
         Token('keyword', 'class'), Token('identifier', 'Main'), Token('symbol', '{'),
         Token('symbol', '}')
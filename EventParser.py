@@ -0,0 +1,44 @@
+from CompilerParser import CompilerParser
+
+
+class EventNode:
+    """
+    Stand-in for a ParseTree while parsing in event mode.
+    Adding a token reports it straight away; adding a finished child node reports its end.
+    """
+    __slots__ = ('handler', 'type')
+
+    def __init__(self, handler, type):
+        self.handler = handler
+        self.type = type
+
+    def addChild(self, child):
+        if isinstance(child, EventNode):
+            self.handler('end', child.type)
+        else:
+            self.handler('token', child)
+
+    def getType(self):
+        return self.type
+
+
+class EventParser(CompilerParser):
+    """
+    CompilerParser that reports ('start', node_type), ('token', token) and ('end', node_type)
+    events to handler(event, value) instead of building a tree, so memory stays bounded
+    by nesting depth. To drive a generator-based consumer, pass a handler that forwards
+    (event, value) pairs to its send method.
+    Can be combined with other parser modes, e.g. class P(EventParser, IterativeExpressionParser).
+    """
+
+    def __init__(self, tokens, handler):
+        self.handler = handler
+        super().__init__(tokens)
+
+    def newTree(self, type):
+        self.handler('start', type)
+        return EventNode(self.handler, type)
+
+    def parse(self):
+        root = self.compileProgram()
+        self.handler('end', root.type)
@@ -0,0 +1,112 @@
+from CompilerParser import BINARY_OPS, TERM_FIRST, CompilerParser
+from ParseTree import ParseException
+
+EXPRESSION, TERM, EXPRESSION_LIST = range(3)
+
+NODE_TYPES = ('expression', 'term', 'expressionList')
+
+START, AFTER_SUBSCRIPT, AFTER_CALL, AFTER_PARENTHESISED, AFTER_UNARY, AFTER_ITEM = range(6)
+
+TERM_KINDS = {
+    key: ('compileTermConstant', 'compileTermIdentifier', 'compileTermParenthesised', 'compileTermUnary').index(name)
+    for key, name in TERM_FIRST.items()
+}
+
+CONSTANT, IDENTIFIER, PARENTHESISED, UNARY = range(4)
+
+CLOSE_PAREN = ('symbol', ')')
+
+
+class IterativeExpressionParser(CompilerParser):
+    """
+    CompilerParser whose expression, term and expressionList productions run on an
+    explicit stack instead of recursing, so nesting depth is bounded only by memory.
+    Produces the same expression/term tree shape as the recursive productions.
+    """
+
+    def compileExpression(self):
+        return self.compileIteratively(EXPRESSION)
+
+    def compileTerm(self):
+        return self.compileIteratively(TERM)
+
+    def compileExpressionList(self):
+        return self.compileIteratively(EXPRESSION_LIST)
+
+    def compileIteratively(self, kind):
+        root = self.newTree(NODE_TYPES[kind])
+        stack = [[kind, root, START]]
+        result = None
+        while stack:
+            frame = stack[-1]
+            kind, tree, state = frame
+
+            if kind == EXPRESSION:
+                if state == START:
+                    frame[2] = AFTER_ITEM
+                    stack.append([TERM, self.newTree('term'), START])
+                    continue
+                tree.addChild(result)
+                if self.currentKey() in BINARY_OPS:
+                    tree.addChild(self.mustbe('symbol'))
+                    stack.append([TERM, self.newTree('term'), START])
+                    continue
+
+            elif kind == EXPRESSION_LIST:
+                if state == START:
+                    if self.currentKey() != CLOSE_PAREN:
+                        frame[2] = AFTER_ITEM
+                        stack.append([EXPRESSION, self.newTree('expression'), START])
+                        continue
+                else:
+                    tree.addChild(result)
+                    if self.have('symbol', ','):
+                        tree.addChild(self.mustbe('symbol', ','))
+                        stack.append([EXPRESSION, self.newTree('expression'), START])
+                        continue
+
+            elif state == START:
+                key = self.currentKey()
+                term_kind = TERM_KINDS.get(key)
+                if term_kind == CONSTANT:
+                    tree.addChild(self.mustbe(key[0]))
+                elif term_kind == IDENTIFIER:
+                    tree.addChild(self.mustbe('identifier'))
+                    key = self.currentKey()
+                    if key == ('symbol', '['):
+                        tree.addChild(self.mustbe('symbol', '['))
+                        frame[2] = AFTER_SUBSCRIPT
+                        stack.append([EXPRESSION, self.newTree('expression'), START])
+                        continue
+                    if key == ('symbol', '.'):
+                        tree.addChild(self.mustbe('symbol', '.'))
+                        tree.addChild(self.mustbe('identifier'))
+                        key = ('symbol', '(')
+                    if key == ('symbol', '('):
+                        tree.addChild(self.mustbe('symbol', '('))
+                        frame[2] = AFTER_CALL
+                        stack.append([EXPRESSION_LIST, self.newTree('expressionList'), START])
+                        continue
+                elif term_kind == PARENTHESISED:
+                    tree.addChild(self.mustbe('symbol', '('))
+                    frame[2] = AFTER_PARENTHESISED
+                    stack.append([EXPRESSION, self.newTree('expression'), START])
+                    continue
+                elif term_kind == UNARY:
+                    tree.addChild(self.mustbe('symbol'))
+                    frame[2] = AFTER_UNARY
+                    stack.append([TERM, self.newTree('term'), START])
+                    continue
+                else:
+                    raise ParseException(f"Expected term but found {self.current_token}", self.pos)
+
+            else:
+                tree.addChild(result)
+                if state == AFTER_SUBSCRIPT:
+                    tree.addChild(self.mustbe('symbol', ']'))
+                elif state != AFTER_UNARY:
+                    tree.addChild(self.mustbe('symbol', ')'))
+
+            stack.pop()
+            result = tree
+        return root
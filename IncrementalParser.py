@@ -0,0 +1,111 @@
+from bisect import bisect_right
+
+from CompilerParser import CLASS_VAR_FIRST, SUBROUTINE_FIRST, CompilerParser
+from ParseTree import ParseException, ParseTree, countLeaves
+
+MEMBER_PRODUCTIONS = {'classVarDec': 'compileClassVarDec', 'subroutine': 'compileSubroutine'}
+
+
+class IncrementalParser:
+    """
+    Keeps a class's token list and ParseTree in step across edits.
+    An edit that falls inside one classVarDec or subroutine re-parses only that member
+    and splices it into a new program/class spine; every other member node is reused.
+    Anything else, or a member whose re-parse does not end where the old one did,
+    falls back to a full parse, so the result always equals a full re-parse.
+    If that full parse fails the ParseException propagates and the next edit parses in full.
+    Nodes inside a member keep the ParseTree.start positions of the parse that built them,
+    so an edit that changes the token count only moves self.starts and self.ends;
+    span(member, node) applies the member's shift when a position is asked for.
+    @param tokens The class's tokens
+    @param parser_class The CompilerParser (sub)class used for every parse
+    """
+
+    def __init__(self, tokens, parser_class=CompilerParser):
+        self.tokens = list(tokens)
+        self.parser_class = parser_class
+        self.full_parses = 0
+        self.partial_parses = 0
+        self.parse()
+
+    def parse(self):
+        self.full_parses += 1
+        self.tree = None
+        self.starts = []
+        self.ends = []
+        self.tree = self.parser_class(self.tokens).compileProgram()
+        pos = 0
+        for index, child in enumerate(self.classNode().children):
+            size = countLeaves(child)
+            if index >= 3 and isinstance(child, ParseTree):
+                self.starts.append(pos)
+                self.ends.append(pos + size)
+            pos += size
+        return self.tree
+
+    def classNode(self):
+        return self.tree.children[0]
+
+    def edit(self, start, end, new_tokens):
+        """
+        Replace tokens[start:end] with new_tokens and bring the tree up to date.
+        @return The new ParseTree
+        """
+        new_tokens = list(new_tokens)
+        delta = len(new_tokens) - (end - start)
+        member = bisect_right(self.starts, start) - 1
+        self.tokens[start:end] = new_tokens
+        if member < 0 or end > self.ends[member] or start == self.ends[member]:
+            return self.parse()
+
+        member_start = self.starts[member]
+        member_end = self.ends[member] + delta
+        old_node = self.classNode().children[3 + member]
+        try:
+            node = self.parseMember(old_node.getType(), member_start, member_end)
+        except ParseException:
+            node = None
+        if node is None:
+            return self.parse()
+
+        self.partial_parses += 1
+        old_class = self.classNode()
+        new_class = ParseTree(old_class.getType(), old_class.getValue(), old_class.start)
+        new_class.children = list(old_class.children)
+        new_class.children[3 + member] = node
+        new_program = ParseTree(self.tree.getType(), self.tree.getValue(), self.tree.start)
+        new_program.children = list(self.tree.children)
+        new_program.children[0] = new_class
+        self.tree = new_program
+
+        self.ends[member] = member_end
+        if delta:
+            following = member + 1
+            self.starts[following:] = [start + delta for start in self.starts[following:]]
+            self.ends[following:] = [end + delta for end in self.ends[following:]]
+        return self.tree
+
+    def span(self, member, node=None):
+        """
+        The tokens a node covers in the current token list.
+        @param member Index of the class member, as in self.starts
+        @param node A node inside that member; the member node itself if omitted
+        @return A (start, end) pair with end exclusive
+        """
+        root = self.classNode().children[3 + member]
+        if node is None:
+            node = root
+        return node.span(self.starts[member] - root.start)
+
+    def parseMember(self, type, start, end):
+        parser = self.parser_class(self.tokens)
+        parser.seek(start)
+        key = parser.currentKey()
+        if type == 'classVarDec' and key not in CLASS_VAR_FIRST:
+            return None
+        if type == 'subroutine' and key not in SUBROUTINE_FIRST:
+            return None
+        node = getattr(parser, MEMBER_PRODUCTIONS[type])()
+        if parser.pos != end:
+            return None
+        return node
@@ -0,0 +1,155 @@
+import random
+
+DEFAULT_STATEMENT_MIX = {'let': 4, 'if': 2, 'while': 1, 'do': 3}
+
+OPS = '+-*/&|<>='
+
+UNARY_OPS = '-~'
+
+KEYWORD_CONSTANTS = ('true', 'false', 'null', 'this')
+
+TYPES = ('int', 'char', 'boolean')
+
+
+class JackGenerator:
+    """
+    Seeded generator of random, syntactically valid Jack classes for benchmarks.
+    The same seed and knobs always produce the same sources.
+    @param seed Random seed
+    @param classes Number of classes per program
+    @param subroutines Subroutines per class
+    @param statements Statements per statement block
+    @param statement_mix Relative weights of let/if/while/do statements
+    @param expression_depth Maximum nesting depth of expressions
+    @param block_depth Maximum nesting depth of if/while blocks
+    @raise ValueError for fewer than one subroutine, or a statement_mix with unknown
+        kinds, negative weights or no positive weight
+    """
+
+    def __init__(self, seed=0, classes=1, subroutines=10, statements=8, statement_mix=None,
+                 expression_depth=3, block_depth=2):
+        if subroutines < 1:
+            raise ValueError("A class needs at least one subroutine (its constructor)")
+        mix = DEFAULT_STATEMENT_MIX if statement_mix is None else statement_mix
+        unknown = set(mix) - set(DEFAULT_STATEMENT_MIX)
+        if unknown:
+            raise ValueError(f"Unknown statement kinds {sorted(unknown)} in statement_mix")
+        if any(weight < 0 for weight in mix.values()) or not any(weight > 0 for weight in mix.values()):
+            raise ValueError("statement_mix weights must be non-negative with at least one positive")
+        self.random = random.Random(seed)
+        self.classes = classes
+        self.subroutines = subroutines
+        self.statements = statements
+        self.statement_kinds = [kind for kind in DEFAULT_STATEMENT_MIX if mix.get(kind)]
+        self.statement_weights = [mix[kind] for kind in self.statement_kinds]
+        self.expression_depth = expression_depth
+        self.block_depth = block_depth
+
+    def generateProgram(self):
+        """
+        @return A list of (class name, source) pairs
+        """
+        names = [f'Class{index}' for index in range(self.classes)]
+        return [(name, self.generateClass(name, names)) for name in names]
+
+    def generateClass(self, name, class_names=()):
+        self.class_names = list(class_names) or [name]
+        self.fields = [f'field{index}' for index in range(self.random.randint(1, 4))]
+        self.method_names = [f'method{index}' for index in range(self.subroutines)]
+        lines = [f'class {name} {{']
+        lines.append(f'    field int {", ".join(self.fields)};')
+        lines.append('    static boolean ready;')
+        for index, method in enumerate(self.method_names):
+            lines.extend(self.generateSubroutine(name, method, index))
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+    def generateSubroutine(self, class_name, method, index):
+        self.parameters = [f'arg{n}' for n in range(self.random.randint(0, 3))]
+        self.locals = [f'local{n}' for n in range(self.random.randint(1, 3))]
+        self.variables = self.fields + self.parameters + self.locals
+        return_type = None if index == 0 else self.random.choice(('void', 'int', 'boolean'))
+        if return_type is None:
+            header = f'    constructor {class_name} new('
+        else:
+            header = f'    method {return_type} {method}('
+        parameters = ', '.join(f'{self.random.choice(TYPES)} {parameter}' for parameter in self.parameters)
+        lines = [header + parameters + ') {']
+        lines.append(f'        var int {", ".join(self.locals)};')
+        lines.append('        var Array buffer;')
+        lines.extend(self.generateStatements(2, 0))
+        if return_type is None:
+            lines.append('        return this;')
+        elif return_type == 'void':
+            lines.append('        return;')
+        else:
+            lines.append(f'        return {self.generateExpression(1)};')
+        lines.append('    }')
+        return lines
+
+    def generateStatements(self, indent, depth):
+        lines = []
+        for _ in range(self.statements):
+            kind = self.random.choices(self.statement_kinds, self.statement_weights)[0]
+            if depth >= self.block_depth and kind in ('if', 'while'):
+                kind = 'let'
+            lines.extend(getattr(self, 'generate' + kind.capitalize())(indent, depth))
+        return lines
+
+    def generateLet(self, indent, depth):
+        pad = '    ' * indent
+        expression = self.generateExpression(self.expression_depth)
+        if self.random.random() < 0.2:
+            return [f'{pad}let buffer[{self.generateExpression(1)}] = {expression};']
+        return [f'{pad}let {self.random.choice(self.variables)} = {expression};']
+
+    def generateIf(self, indent, depth):
+        pad = '    ' * indent
+        lines = [f'{pad}if ({self.generateExpression(self.expression_depth)}) {{']
+        lines.extend(self.generateStatements(indent + 1, depth + 1))
+        if self.random.random() < 0.5:
+            lines.append(f'{pad}}} else {{')
+            lines.extend(self.generateStatements(indent + 1, depth + 1))
+        lines.append(f'{pad}}}')
+        return lines
+
+    def generateWhile(self, indent, depth):
+        pad = '    ' * indent
+        lines = [f'{pad}while ({self.generateExpression(self.expression_depth)}) {{']
+        lines.extend(self.generateStatements(indent + 1, depth + 1))
+        lines.append(f'{pad}}}')
+        return lines
+
+    def generateDo(self, indent, depth):
+        return ['    ' * indent + f'do {self.generateCall(self.expression_depth)};']
+
+    def generateCall(self, depth):
+        arguments = ', '.join(self.generateExpression(depth - 1) for _ in range(self.random.randint(0, 3)))
+        if self.random.random() < 0.5:
+            return f'{self.random.choice(self.method_names)}({arguments})'
+        return f'{self.random.choice(self.class_names)}.{self.random.choice(self.method_names)}({arguments})'
+
+    def generateExpression(self, depth):
+        terms = [self.generateTerm(depth)]
+        for _ in range(self.random.randint(0, 2) if depth > 0 else 0):
+            terms.append(self.random.choice(OPS))
+            terms.append(self.generateTerm(depth))
+        return ' '.join(terms)
+
+    def generateTerm(self, depth):
+        choice = self.random.random() if depth > 0 else self.random.random() * 0.6
+        if choice < 0.25:
+            return str(self.random.randint(0, 32767))
+        if choice < 0.5:
+            return self.random.choice(self.variables)
+        if choice < 0.55:
+            return self.random.choice(KEYWORD_CONSTANTS)
+        if choice < 0.6:
+            return f'"text {self.random.randint(0, 999)}"'
+        if choice < 0.75:
+            return f'({self.generateExpression(depth - 1)})'
+        if choice < 0.85:
+            return self.random.choice(UNARY_OPS) + self.generateTerm(depth - 1)
+        if choice < 0.92:
+            return f'buffer[{self.generateExpression(depth - 1)}]'
+        return self.generateCall(depth)
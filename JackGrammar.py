@@ -0,0 +1,86 @@
+from JackTokenizer import KEYWORDS
+
+TOKEN_CLASSES = frozenset(['identifier', 'integerConstant', 'stringConstant'])
+
+JACK_GRAMMAR = {
+    'program': ["class"],
+    'class': ["'class' identifier '{' classVarDecs subroutines '}'"],
+    'classVarDecs': ["classVarDec classVarDecs", ""],
+    'classVarDec': ["classVarKind type identifier moreNames ';'"],
+    'classVarKind': ["'static'", "'field'"],
+    'type': ["'int'", "'char'", "'boolean'", "identifier"],
+    'moreNames': ["',' identifier moreNames", ""],
+    'subroutines': ["subroutine subroutines", ""],
+    'subroutine': ["subroutineKind returnType identifier '(' parameterList ')' subroutineBody"],
+    'subroutineKind': ["'constructor'", "'function'", "'method'"],
+    'returnType': ["'void'", "type"],
+    'parameterList': ["type identifier moreParameters", ""],
+    'moreParameters': ["',' type identifier moreParameters", ""],
+    'subroutineBody': ["'{' varDecs statements '}'"],
+    'varDecs': ["varDec varDecs", ""],
+    'varDec': ["'var' type identifier moreNames ';'"],
+    'statements': ["statementList"],
+    'statementList': ["statement statementList", ""],
+    'statement': ["letStatement", "ifStatement", "whileStatement", "doStatement", "returnStatement"],
+    'letStatement': ["'let' identifier subscript '=' expression ';'"],
+    'subscript': ["'[' expression ']'", ""],
+    'ifStatement': ["'if' '(' expression ')' '{' statements '}' elseClause"],
+    'elseClause': ["'else' '{' statements '}'", ""],
+    'whileStatement': ["'while' '(' expression ')' '{' statements '}'"],
+    'doStatement': ["'do' subroutineCall ';'"],
+    'returnStatement': ["'return' returnValue ';'"],
+    'returnValue': ["expression", ""],
+    'subroutineCall': ["identifier qualifier '(' expressionList ')'"],
+    'qualifier': ["'.' identifier", ""],
+    'expression': ["term operations"],
+    'operations': ["op term operations", ""],
+    'op': ["'+'", "'-'", "'*'", "'/'", "'&'", "'|'", "'<'", "'>'", "'='"],
+    'term': [
+        "integerConstant", "stringConstant", "'true'", "'false'", "'null'", "'this'",
+        "identifier termSuffix", "'(' expression ')'", "unaryOp term",
+    ],
+    'termSuffix': ["'[' expression ']'", "'(' expressionList ')'", "'.' identifier '(' expressionList ')'", ""],
+    'unaryOp': ["'-'", "'~'"],
+    'expressionList': ["expression moreExpressions", ""],
+    'moreExpressions': ["',' expression moreExpressions", ""],
+}
+
+NODE_TYPES = frozenset([
+    'program', 'class', 'classVarDec', 'type', 'subroutine', 'parameterList', 'subroutineBody',
+    'varDec', 'statements', 'letStatement', 'ifStatement', 'whileStatement', 'doStatement',
+    'returnStatement', 'subroutineCall', 'expression', 'term', 'expressionList',
+])
+
+
+def terminal(word):
+    """
+    @return The currentKey-style terminal for a grammar word: 'x' is a keyword or symbol,
+        identifier/integerConstant/stringConstant match any token of that type
+    """
+    if word.startswith("'"):
+        value = word[1:-1]
+        return ('keyword' if value in KEYWORDS else 'symbol', value)
+    if word in TOKEN_CLASSES:
+        return (word, None)
+    return None
+
+
+def parseGrammar(grammar):
+    """
+    Turn the textual alternatives of a grammar into symbol tuples.
+    Terminals become (type, value) keys and nonterminals stay as names.
+    @return A dict from nonterminal to a tuple of alternatives
+    """
+    productions = {}
+    for nonterminal, alternatives in grammar.items():
+        parsed = []
+        for alternative in alternatives:
+            symbols = []
+            for word in alternative.split():
+                key = terminal(word)
+                if key is None and word not in grammar:
+                    raise ValueError(f"Undefined nonterminal {word} in {nonterminal}")
+                symbols.append(word if key is None else key)
+            parsed.append(tuple(symbols))
+        productions[nonterminal] = tuple(parsed)
+    return productions
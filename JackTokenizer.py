@@ -0,0 +1,241 @@
+import codecs
+import mmap
+import os
+import re
+import sys
+
+from ParseTree import ParseException
+from Token import Token
+
+KEYWORDS = frozenset([
+    'class', 'constructor', 'function', 'method', 'field', 'static', 'var',
+    'int', 'char', 'boolean', 'void', 'true', 'false', 'null', 'this',
+    'let', 'do', 'if', 'else', 'while', 'return'
+])
+
+SYMBOLS = frozenset('{}()[].,;+-*/&|<>=~')
+
+KEYWORD_TOKENS = {keyword: Token('keyword', keyword) for keyword in KEYWORDS}
+
+SYMBOL_TOKENS = {symbol: Token('symbol', symbol) for symbol in SYMBOLS}
+
+TOKEN_PATTERN = re.compile(r'''
+    \s+ | //[^\n]* | /\*.*?\*/
+  | (\d+)
+  | "([^"\n]*)"
+  | ([^\W\d]\w*)
+  | (/\*|")
+  | ([{}()\[\].,;+\-*/&|<>=~])
+  | (.)
+''', re.S | re.X)
+
+START, SLASH, LINE_COMMENT, BLOCK_COMMENT, BLOCK_STAR, STRING, INTEGER, WORD = range(8)
+
+
+class JackTokenizer:
+    """
+    Streaming tokenizer for Jack source.
+    Reads the source in chunks and yields Tokens as soon as each lexeme is complete,
+    so a parser pulling from it can start before the whole file has been read.
+    @param source A path, a binary or text file object, or a bytes-like/mmap buffer
+    @param chunk_size The number of bytes (or characters) read per chunk
+    """
+
+    def __init__(self, source, chunk_size=65536):
+        self.source = source
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return self.tokens()
+
+    def chunks(self):
+        source = self.source
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as file:
+                yield from self.readChunks(file)
+        elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            with memoryview(source) as view:
+                for start in range(0, len(view), self.chunk_size):
+                    yield decoder.decode(view[start:start + self.chunk_size])
+            yield decoder.decode(b'', True)
+        else:
+            yield from self.readChunks(source)
+
+    def readChunks(self, file):
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        while True:
+            chunk = file.read(self.chunk_size)
+            if not chunk:
+                break
+            if isinstance(chunk, str):
+                yield chunk
+            else:
+                yield decoder.decode(chunk)
+        yield decoder.decode(b'', True)
+
+    def tokens(self):
+        state = START
+        lexeme = ''
+        for text in self.chunks():
+            i = 0
+            n = len(text)
+            while i < n:
+                c = text[i]
+                if state == START:
+                    if c.isspace():
+                        pass
+                    elif c == '/':
+                        state = SLASH
+                    elif c == '"':
+                        state = STRING
+                        lexeme = ''
+                    elif c.isdigit():
+                        state = INTEGER
+                        lexeme = c
+                    elif c.isalpha() or c == '_':
+                        state = WORD
+                        lexeme = c
+                    elif c in SYMBOLS:
+                        yield Token('symbol', c)
+                    else:
+                        raise ParseException(f"Unexpected character {c!r}")
+                elif state == SLASH:
+                    if c == '/':
+                        state = LINE_COMMENT
+                    elif c == '*':
+                        state = BLOCK_COMMENT
+                    else:
+                        yield Token('symbol', '/')
+                        state = START
+                        continue
+                elif state == LINE_COMMENT:
+                    if c == '\n':
+                        state = START
+                elif state == BLOCK_COMMENT:
+                    if c == '*':
+                        state = BLOCK_STAR
+                elif state == BLOCK_STAR:
+                    if c == '/':
+                        state = START
+                    elif c != '*':
+                        state = BLOCK_COMMENT
+                elif state == STRING:
+                    if c == '"':
+                        yield Token('stringConstant', lexeme)
+                        state = START
+                    elif c == '\n':
+                        raise ParseException("Unterminated string constant")
+                    else:
+                        lexeme += c
+                elif state == INTEGER:
+                    if c.isdigit():
+                        lexeme += c
+                    else:
+                        yield Token('integerConstant', lexeme)
+                        state = START
+                        continue
+                elif state == WORD:
+                    if c.isalnum() or c == '_':
+                        lexeme += c
+                    else:
+                        yield Token('keyword' if lexeme in KEYWORDS else 'identifier', lexeme)
+                        state = START
+                        continue
+                i += 1
+
+        if state == SLASH:
+            yield Token('symbol', '/')
+        elif state == INTEGER:
+            yield Token('integerConstant', lexeme)
+        elif state == WORD:
+            yield Token('keyword' if lexeme in KEYWORDS else 'identifier', lexeme)
+        elif state == STRING:
+            raise ParseException("Unterminated string constant")
+        elif state in (BLOCK_COMMENT, BLOCK_STAR):
+            raise ParseException("Unterminated comment")
+
+
+def readSource(source):
+    if isinstance(source, str):
+        return source
+    if isinstance(source, os.PathLike):
+        with open(source, 'rb') as file:
+            return file.read().decode('utf-8')
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        return bytes(source).decode('utf-8')
+    text = source.read()
+    return text if isinstance(text, str) else text.decode('utf-8')
+
+
+def lexicalError(text, match):
+    """
+    @return The ParseException for a master-pattern match of an error group, located at its byte offset
+    """
+    value = match.group(match.lastindex)
+    offset = len(text[:match.start()].encode('utf-8'))
+    if match.lastindex == 4:
+        return ParseException("Unterminated comment" if value == '/*' else "Unterminated string constant", offset=offset)
+    return ParseException(f"Unexpected character {value!r}", offset=offset)
+
+
+def byteOffsets(text, offsets, first=0):
+    """
+    Convert offsets[first:], character offsets into text in ascending order, to UTF-8 byte offsets in place.
+    """
+    if text.isascii():
+        return
+    position = 0
+    byte = 0
+    for index in range(first, len(offsets)):
+        offset = offsets[index]
+        byte += len(text[position:offset].encode('utf-8'))
+        position = offset
+        offsets[index] = byte
+
+
+def tokenize(source, offsets=None):
+    """
+    Tokenize a whole Jack source in one pass of the compiled master pattern.
+    Keyword and symbol Tokens are shared singletons, and within one call every
+    occurrence of an identifier shares a single Token with an interned value.
+    @param source Jack source text, or a bytes-like/mmap buffer or file object holding it
+    @param offsets Optional array('I') to which the UTF-8 byte offset of each token is appended
+    @return A list of Tokens
+    """
+    text = readSource(source)
+    keyword_tokens = KEYWORD_TOKENS
+    symbol_tokens = SYMBOL_TOKENS
+    identifier_tokens = {}
+    intern = sys.intern
+    tokens = []
+    append = tokens.append
+    first = 0 if offsets is None else len(offsets)
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastindex
+        if kind is None:
+            continue
+        value = match.group(kind)
+        if offsets is not None:
+            offsets.append(match.start())
+        if kind == 5:
+            append(symbol_tokens[value])
+        elif kind == 3:
+            token = keyword_tokens.get(value) or identifier_tokens.get(value)
+            if token is None:
+                token = identifier_tokens[value] = Token('identifier', intern(value))
+            append(token)
+        elif kind == 1:
+            append(Token('integerConstant', value))
+        elif kind == 2:
+            append(Token('stringConstant', value))
+        else:
+            raise lexicalError(text, match)
+    if offsets is not None:
+        byteOffsets(text, offsets, first)
+    return tokens
+
+
+def tokenizeFile(path):
+    with open(path, 'rb') as file:
+        return tokenize(file.read())
@@ -0,0 +1,178 @@
+import sys
+
+from CompilerParser import CompilerParser
+from JackGrammar import JACK_GRAMMAR, NODE_TYPES, parseGrammar
+from JackTokenizer import JackTokenizer
+from ParseTree import ParseException
+
+CLOSE = 0
+
+
+def nullableSet(productions):
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for nonterminal, alternatives in productions.items():
+            if nonterminal in nullable:
+                continue
+            if any(all(symbol in nullable for symbol in alternative) for alternative in alternatives):
+                nullable.add(nonterminal)
+                changed = True
+    return nullable
+
+
+def sequenceFirst(symbols, first, nullable):
+    """
+    @return The terminals that can start symbols, and whether symbols can derive nothing
+    """
+    result = set()
+    for symbol in symbols:
+        if isinstance(symbol, tuple):
+            result.add(symbol)
+            return result, False
+        result |= first[symbol]
+        if symbol not in nullable:
+            return result, False
+    return result, True
+
+
+def firstSets(productions, nullable=None):
+    """
+    Compute FIRST(A) for every nonterminal A by iterating to a fixed point.
+    @return A dict from nonterminal to a set of (type, value) terminals
+    """
+    if nullable is None:
+        nullable = nullableSet(productions)
+    first = {nonterminal: set() for nonterminal in productions}
+    changed = True
+    while changed:
+        changed = False
+        for nonterminal, alternatives in productions.items():
+            for alternative in alternatives:
+                terminals, _ = sequenceFirst(alternative, first, nullable)
+                if not terminals <= first[nonterminal]:
+                    first[nonterminal] |= terminals
+                    changed = True
+    return first
+
+
+def followSets(productions, start, first, nullable):
+    """
+    Compute FOLLOW(A) for every nonterminal A. End of input is None, as returned by currentKey.
+    @return A dict from nonterminal to a set of terminals and None
+    """
+    follow = {nonterminal: set() for nonterminal in productions}
+    follow[start].add(None)
+    changed = True
+    while changed:
+        changed = False
+        for nonterminal, alternatives in productions.items():
+            for alternative in alternatives:
+                for index, symbol in enumerate(alternative):
+                    if isinstance(symbol, tuple):
+                        continue
+                    terminals, rest_nullable = sequenceFirst(alternative[index + 1:], first, nullable)
+                    if rest_nullable:
+                        terminals = terminals | follow[nonterminal]
+                    if not terminals <= follow[symbol]:
+                        follow[symbol] |= terminals
+                        changed = True
+    return follow
+
+
+def buildTable(grammar, start='program', node_types=NODE_TYPES):
+    """
+    Build the predictive parse table of an LL(1) grammar.
+    An alternative is chosen on the terminals that can start it, and an alternative that
+    can derive nothing is also chosen on FOLLOW of its nonterminal.
+    Each entry holds the alternative reversed, ready to push on the parse stack, with a
+    CLOSE marker beneath it when the nonterminal becomes a tree node.
+    @param grammar A dict of textual alternatives, as JACK_GRAMMAR
+    @return A dict from nonterminal to a dict from currentKey to stack entries
+    @raise ValueError if two alternatives of a nonterminal are chosen on the same terminal
+    """
+    productions = parseGrammar(grammar)
+    nullable = nullableSet(productions)
+    first = firstSets(productions, nullable)
+    follow = followSets(productions, start, first, nullable)
+    table = {}
+    for nonterminal, alternatives in productions.items():
+        row = table[nonterminal] = {}
+        for alternative in alternatives:
+            terminals, alternative_nullable = sequenceFirst(alternative, first, nullable)
+            if alternative_nullable:
+                terminals |= follow[nonterminal]
+            entry = tuple(reversed(alternative))
+            if nonterminal in node_types:
+                entry = (CLOSE,) + entry
+            for key in terminals:
+                if key in row:
+                    raise ValueError(f"Grammar is not LL(1): {nonterminal} has two alternatives for {key}")
+                row[key] = entry
+    return table
+
+
+JACK_TABLE = buildTable(JACK_GRAMMAR)
+
+
+class LL1Parser(CompilerParser):
+    """
+    CompilerParser whose compileProgram is driven by the predictive table built from
+    JackGrammar rather than by the compile* methods. The engine keeps an explicit stack
+    of grammar symbols and open tree nodes, so it does not recurse, and it builds the
+    same ParseTree node types as the hand-written parser.
+    Tokens go through the usual currentKey/mustbe/newTree hooks, so it combines with
+    other parser modes, e.g. class P(LL1Parser, TokenStreamParser).
+    """
+    table = JACK_TABLE
+    node_types = NODE_TYPES
+    start = 'program'
+
+    def compileProgram(self):
+        table = self.table
+        node_types = self.node_types
+        mustbe = self.mustbe
+        currentKey = self.currentKey
+        trees = []
+        stack = [self.start]
+        pop = stack.pop
+        push = stack.extend
+        tree = None
+        while stack:
+            symbol = pop()
+            if symbol is CLOSE:
+                child = trees.pop()
+                if not trees:
+                    return child
+                tree = trees[-1]
+                tree.addChild(child)
+            elif type(symbol) is tuple:
+                tree.addChild(mustbe(symbol[0], symbol[1]))
+            else:
+                entry = table[symbol].get(currentKey())
+                if entry is None:
+                    raise ParseException(f"Expected {symbol} but found {self.current_token}", self.pos)
+                if symbol in node_types:
+                    tree = self.newTree(symbol)
+                    trees.append(tree)
+                push(entry)
+
+
+def main():
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            print(LL1Parser(JackTokenizer(path)).compileProgram())
+        return
+    productions = parseGrammar(JACK_GRAMMAR)
+    nullable = nullableSet(productions)
+    first = firstSets(productions, nullable)
+    follow = followSets(productions, 'program', first, nullable)
+    for nonterminal in productions:
+        print(f'{nonterminal}{" (nullable)" if nonterminal in nullable else ""}')
+        print(f'  FIRST:  {" ".join(sorted(str(key[1] or key[0]) for key in first[nonterminal]))}')
+        print(f'  FOLLOW: {" ".join(sorted(str(key[1] or key[0]) if key else "$" for key in follow[nonterminal]))}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections import deque
+
+from ArenaTree import ArenaNode, ArenaTree
+from ParseTree import ParseException, ParseTree
+
+MAGIC = b'JMT\x01'
+
+HEADER = struct.Struct('<4sIIIQQQ')
+
+NODE_FIELDS = 4
+
+LEAF_FLAG = 0x80000000
+
+NO_VALUE = 0xffffffff
+
+
+def nodeChildren(node):
+    """
+    @return The children of an interior ParseTree or ArenaNode, or None for a leaf
+    """
+    if isinstance(node, ParseTree):
+        return node.children
+    if isinstance(node, ArenaNode) and not node.isLeaf():
+        return node.getChildren()
+    return None
+
+
+def align(file, size=8):
+    padding = -file.tell() % size
+    file.write(bytes(padding))
+
+
+def writeMappedTrees(path, trees):
+    """
+    Write named trees to one file that MappedTree can open in place.
+    Layout: a header, the tree table (name string, root node) as uint32 pairs, the node
+    records, then the string table (uint64 end offsets followed by UTF-8 data).
+    A node record is four uint32s: type string (high bit set for leaves), value string
+    or 0xffffffff for None, first child, and child count. Nodes are numbered breadth first
+    per tree, so a node's children are consecutive records. All integers are little-endian.
+    The file is written to a temporary name and moved into place.
+    @param trees An iterable of (name, tree) pairs; a tree is a ParseTree, ArenaTree or ArenaNode
+    """
+    strings = []
+    string_ids = {}
+
+    def intern(value):
+        string_id = string_ids.get(value)
+        if string_id is None:
+            string_id = string_ids[value] = len(strings)
+            strings.append(value)
+        return string_id
+
+    nodes = array('I')
+    roots = array('I')
+    for name, tree in trees:
+        if isinstance(tree, ArenaTree):
+            tree = tree.root()
+        roots.append(intern(name))
+        roots.append(len(nodes) // NODE_FIELDS)
+        next_index = len(nodes) // NODE_FIELDS + 1
+        queue = deque([tree])
+        while queue:
+            node = queue.popleft()
+            children = nodeChildren(node)
+            value = node.getValue()
+            type_id = intern(node.getType())
+            nodes.append(type_id if children is not None else type_id | LEAF_FLAG)
+            nodes.append(NO_VALUE if value is None else intern(value))
+            if children:
+                nodes.append(next_index)
+                nodes.append(len(children))
+                next_index += len(children)
+                queue.extend(children)
+            else:
+                nodes.append(0)
+                nodes.append(0)
+
+    encoded = [value.encode() for value in strings]
+    ends = array('Q')
+    end = 0
+    for data in encoded:
+        end += len(data)
+        ends.append(end)
+    if sys.byteorder != 'little':
+        roots.byteswap()
+        nodes.byteswap()
+        ends.byteswap()
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            file.write(bytes(HEADER.size))
+            align(file)
+            trees_offset = file.tell()
+            roots.tofile(file)
+            align(file)
+            nodes_offset = file.tell()
+            nodes.tofile(file)
+            align(file)
+            strings_offset = file.tell()
+            ends.tofile(file)
+            for data in encoded:
+                file.write(data)
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, len(roots) // 2, len(strings), len(nodes) // NODE_FIELDS,
+                                   trees_offset, nodes_offset, strings_offset))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class MappedTree:
+    """
+    Read-only view of a file written by writeMappedTrees.
+    The file is mmap'd and nodes are read straight from the mapping, so opening costs
+    only the tree table and processes reading the same file share its page cache.
+    Strings are decoded on first use. On big-endian machines the integer tables are
+    copied and byteswapped on open, since files are always little-endian.
+    @param path The tree file
+    @raise ParseException if the file is not a mapped tree file or is truncated
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise ParseException(f"{path} is not a mapped tree file")
+            self.mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self.mapping)
+        _, tree_count, string_count, node_count, trees_offset, nodes_offset, strings_offset = \
+            HEADER.unpack_from(self.mapping)
+        trees_end = trees_offset + 8 * tree_count
+        nodes_end = nodes_offset + 4 * NODE_FIELDS * node_count
+        strings_end = strings_offset + 8 * string_count
+        if self.mapping[:len(MAGIC)] != MAGIC:
+            self.mapping.close()
+            raise ParseException(f"{path} is not a mapped tree file")
+        if max(trees_end, nodes_end, strings_end) > size:
+            self.mapping.close()
+            raise ParseException(f"{path} is truncated")
+        view = memoryview(self.mapping)
+        self.roots = self.table(view[trees_offset:trees_end], 'I')
+        self.nodes = self.table(view[nodes_offset:nodes_end], 'I')
+        self.string_ends = self.table(view[strings_offset:strings_end], 'Q')
+        self.string_data = view[strings_end:]
+        view.release()
+        self.string_cache = {}
+        self.tree_index = None
+        if string_count and self.string_ends[-1] > len(self.string_data):
+            self.close()
+            raise ParseException(f"{path} is truncated")
+
+    @staticmethod
+    def table(view, typecode):
+        if sys.byteorder == 'little':
+            return view.cast(typecode)
+        values = array(typecode)
+        values.frombytes(view)
+        values.byteswap()
+        view.release()
+        return memoryview(values)
+
+    def string(self, string_id):
+        value = self.string_cache.get(string_id)
+        if value is None:
+            start = self.string_ends[string_id - 1] if string_id else 0
+            value = self.string_cache[string_id] = str(self.string_data[start:self.string_ends[string_id]], 'utf-8')
+        return value
+
+    def names(self):
+        return [self.string(self.roots[index]) for index in range(0, len(self.roots), 2)]
+
+    def __len__(self):
+        return len(self.roots) // 2
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def __getitem__(self, name):
+        """
+        @return The root MappedNode of the tree stored under name
+        """
+        if self.tree_index is None:
+            self.tree_index = {self.string(self.roots[index]): self.roots[index + 1]
+                               for index in range(0, len(self.roots), 2)}
+        return MappedNode(self, self.tree_index[name])
+
+    def close(self):
+        self.roots.release()
+        self.nodes.release()
+        self.string_ends.release()
+        self.string_data.release()
+        self.mapping.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class MappedNode:
+    """
+    Lightweight view of one node in a MappedTree with the ParseTree/Token interface.
+    """
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    def isLeaf(self):
+        return bool(self.tree.nodes[self.index * NODE_FIELDS] & LEAF_FLAG)
+
+    def getType(self):
+        return self.tree.string(self.tree.nodes[self.index * NODE_FIELDS] & ~LEAF_FLAG)
+
+    def getValue(self):
+        value = self.tree.nodes[self.index * NODE_FIELDS + 1]
+        return None if value == NO_VALUE else self.tree.string(value)
+
+    def getChildren(self):
+        base = self.index * NODE_FIELDS
+        first = self.tree.nodes[base + 2]
+        return [MappedNode(self.tree, child) for child in range(first, first + self.tree.nodes[base + 3])]
+
+    def __eq__(self, other):
+        return isinstance(other, MappedNode) and self.tree is other.tree and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    def __repr__(self):
+        """
+        Same text as ParseTree.__repr__, built with an explicit stack.
+        """
+        parts = []
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+            elif item.isLeaf():
+                parts.append(f"Token({item.getType()}, {item.getValue()})")
+            else:
+                parts.append(f"ParseTree({item.getType()}, {item.getValue()}, [")
+                stack.append('])')
+                children = item.getChildren()
+                for index in range(len(children) - 1, -1, -1):
+                    stack.append(children[index])
+                    if index:
+                        stack.append(', ')
+        return ''.join(parts)
@@ -0,0 +1,74 @@
+from CompilerParser import CompilerParser
+from ParseTree import ParseException, ParseTree
+
+
+class LazySubroutineBody(ParseTree):
+    """
+    subroutineBody node that records only its token span.
+    The body is parsed the first time its children are accessed.
+    """
+
+    def __init__(self, tokens, start, end, parser_class):
+        super().__init__('subroutineBody')
+        self.tokens = tokens
+        self.start = start
+        self.end = end
+        self.parser_class = parser_class
+        self.parsed_children = None
+
+    @property
+    def children(self):
+        if self.parsed_children is None:
+            parser = self.parser_class(self.tokens)
+            parser.seek(self.start)
+            body = parser.compileSubroutineBody()
+            if parser.pos != self.end:
+                raise ParseException(f"Expected end of subroutine body but found {parser.current_token}", parser.pos)
+            self.parsed_children = body.children
+        return self.parsed_children
+
+    @children.setter
+    def children(self, children):
+        self.parsed_children = children
+
+    def span(self):
+        return (self.start, self.end)
+
+    def isParsed(self):
+        return self.parsed_children is not None
+
+
+class OutlineParser(CompilerParser):
+    """
+    CompilerParser that parses class structure and subroutine signatures but only
+    brace-matches subroutine bodies, leaving a LazySubroutineBody in their place.
+    Needs a token sequence, since bodies are parsed later from their recorded span.
+    @param body_parser The CompilerParser (sub)class used when a body is parsed
+    """
+
+    def __init__(self, tokens, body_parser=CompilerParser):
+        super().__init__(tokens)
+        if self.stream is not None:
+            raise ValueError("OutlineParser needs a token sequence, not a stream")
+        self.body_parser = body_parser
+
+    def compileSubroutineBody(self):
+        start = self.pos
+        self.mustbe('symbol', '{')
+        tokens = self.tokens
+        index = self.pos
+        depth = 1
+        try:
+            while depth:
+                token = tokens[index]
+                if token.getType() == 'symbol':
+                    value = token.getValue()
+                    if value == '{':
+                        depth += 1
+                    elif value == '}':
+                        depth -= 1
+                index += 1
+        except IndexError:
+            raise ParseException("Expected } to close subroutine body but found end of input", index) from None
+        self.seek(index)
+        return LazySubroutineBody(self.tokens, start, self.pos, self.body_parser)
@@ -0,0 +1,195 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from CompilerParser import CompilerParser
+from JackGrammar import NODE_TYPES as GRAMMAR_NODE_TYPES
+from ParseTree import ParseException, ParseTree
+from TokenStream import TokenStream, TokenStreamParser
+
+SUBROUTINE_KEYWORDS = ('constructor', 'function', 'method')
+
+NODE_TYPES = tuple(sorted(GRAMMAR_NODE_TYPES))
+
+NODE_CODES = {type: code for code, type in enumerate(NODE_TYPES, 1)}
+
+worker_tokens = None
+
+
+def subroutineSpans(tokens):
+    """
+    Pre-scan a class's tokens for the (start, end) spans of its top-level subroutines,
+    by tracking brace depth instead of parsing.
+    """
+    spans = []
+    depth = 0
+    start = None
+    for index, token in enumerate(tokens):
+        type = token.getType()
+        if type == 'symbol':
+            value = token.getValue()
+            if value == '{':
+                depth += 1
+            elif value == '}':
+                depth -= 1
+                if depth == 1 and start is not None:
+                    spans.append((start, index + 1))
+                    start = None
+        elif depth == 1 and start is None and type == 'keyword' and token.getValue() in SUBROUTINE_KEYWORDS:
+            start = index
+    return spans
+
+
+def encodeTree(tree):
+    """
+    Flatten a tree to preorder (type code, arity) pairs, with 0 for each leaf.
+    Leaves are not stored: every consumed token is a leaf, so they follow the span in order.
+    Codes index NODE_TYPES from 1; node types the grammar does not declare, e.g. from a
+    parser subclass, get codes past its end.
+    @return A (codes, extra_types) pair
+    """
+    codes = array('I')
+    type_codes = NODE_CODES
+    extra_types = ()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParseTree):
+            code = type_codes.get(node.type)
+            if code is None:
+                if not extra_types:
+                    type_codes = dict(NODE_CODES)
+                extra_types += (node.type,)
+                code = type_codes[node.type] = len(NODE_TYPES) + len(extra_types)
+            codes.append(code)
+            codes.append(len(node.children))
+            stack.extend(reversed(node.children))
+        else:
+            codes.append(0)
+    return codes, extra_types
+
+
+def decodeTree(codes, tokens, pos, extra_types=()):
+    type_names = NODE_TYPES + extra_types
+    root = None
+    siblings = None
+    remaining = 0
+    stack = []
+    items = iter(codes)
+    for code in items:
+        if code:
+            child = ParseTree(type_names[code - 1], None, pos)
+            arity = next(items)
+        else:
+            child = tokens[pos]
+            pos += 1
+            arity = 0
+        if siblings is None:
+            root = child
+        else:
+            siblings.append(child)
+            remaining -= 1
+            if not remaining:
+                siblings, remaining = stack.pop() if stack else (None, 0)
+        if arity:
+            if siblings is not None:
+                stack.append((siblings, remaining))
+            siblings, remaining = child.children, arity
+    return root
+
+
+class EncodedSubroutine(ParseTree):
+    """
+    subroutine node received from a worker, rebuilt from its node codes the first
+    time its children are accessed.
+    """
+
+    def __init__(self, codes, extra_types, tokens, start):
+        super().__init__('subroutine')
+        self.codes = codes
+        self.extra_types = extra_types
+        self.tokens = tokens
+        self.start = start
+        self.decoded_children = None
+
+    @property
+    def children(self):
+        if self.decoded_children is None:
+            self.decoded_children = decodeTree(self.codes, self.tokens, self.start, self.extra_types).children
+            self.codes = None
+        return self.decoded_children
+
+    @children.setter
+    def children(self, children):
+        self.decoded_children = children
+
+
+def setWorkerTokens(tokens):
+    global worker_tokens
+    worker_tokens = tokens
+
+
+def parseSpan(span):
+    start, end = span
+    try:
+        parser = TokenStreamParser(worker_tokens)
+        parser.seek(start)
+        tree = parser.compileSubroutine()
+        if parser.pos != end:
+            raise ParseException(f"Expected end of subroutine but found {parser.current_token}", parser.pos)
+    except ParseException as error:
+        return error
+    return encodeTree(tree)
+
+
+class AssemblingParser(CompilerParser):
+    """
+    CompilerParser that takes subroutines parsed elsewhere, keyed by start position,
+    and otherwise parses as usual.
+    """
+
+    def __init__(self, tokens, subroutines):
+        self.subroutines = subroutines
+        super().__init__(tokens)
+
+    def compileSubroutine(self):
+        result = self.subroutines.get(self.pos)
+        if result is None:
+            return super().compileSubroutine()
+        end, tree = result
+        if isinstance(tree, ParseException):
+            raise tree
+        self.seek(end)
+        return tree
+
+
+def parseClassParallel(tokens, workers=None, chunksize=16):
+    """
+    Parse one class with its subroutines spread over a process pool.
+    Workers receive the class once as a TokenStream and send back each subroutine as
+    an array of node codes. Each becomes an EncodedSubroutine, rebuilt around the
+    caller's own Tokens when first accessed, so assembly here is one step per subroutine.
+    Decoding still builds every node in this process: a caller that walks the whole tree
+    pays roughly half a serial parse for it, on top of the pre-scan and assembly,
+    so this only beats CompilerParser for callers that touch a few subroutines.
+    @param tokens A list of Tokens for the class
+    @param workers Number of worker processes; 0 parses in this process
+    @param chunksize Number of subroutines handed to a worker per task
+    @return The same ParseTree as CompilerParser(tokens).compileProgram()
+    """
+    tokens = list(tokens)
+    spans = subroutineSpans(tokens)
+    stream = TokenStream.fromTokens(tokens)
+    if workers == 0:
+        setWorkerTokens(stream)
+        results = [parseSpan(span) for span in spans]
+        setWorkerTokens(None)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=setWorkerTokens, initargs=(stream,)) as executor:
+            results = list(executor.map(parseSpan, spans, chunksize=chunksize))
+
+    subroutines = {}
+    for (start, end), result in zip(spans, results):
+        if not isinstance(result, ParseException):
+            result = EncodedSubroutine(*result, tokens, start)
+        subroutines[start] = (end, result)
+    return AssemblingParser(tokens, subroutines).compileProgram()
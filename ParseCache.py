@@ -0,0 +1,133 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from CompilerParser import GRAMMAR_VERSION
+
+
+class ParseCache:
+    """
+    On-disk parse cache keyed by a hash of the source bytes and the grammar version.
+    Entries are pickled trees written atomically, so several processes can share one
+    directory. Hits refresh an entry's mtime, and once the directory grows past
+    max_bytes the least recently used entries are evicted.
+    @param directory The cache directory, created if missing
+    @param max_bytes Size cap for all entries together
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self.size = sum(size for _, _, size in self.entries())
+
+    def key(self, source):
+        digest = hashlib.sha256(f'jack-grammar-{GRAMMAR_VERSION}\0'.encode())
+        digest.update(source)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + '.tree')
+
+    def get(self, source):
+        path = self.path(self.key(source))
+        try:
+            with open(path, 'rb') as file:
+                tree = pickle.load(file)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            self.errors += 1
+            self.misses += 1
+            self.remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return tree
+
+    def put(self, source, tree):
+        path = self.path(self.key(source))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                pickle.dump(tree, file, pickle.HIGHEST_PROTOCOL)
+                size = file.tell()
+            try:
+                replaced = os.stat(path).st_size
+            except OSError:
+                replaced = 0
+            os.replace(temporary, path)
+        except BaseException:
+            self.remove(temporary)
+            raise
+        self.stores += 1
+        self.size += size - replaced
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def entries(self):
+        for directory, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith('.tree'):
+                    path = os.path.join(directory, name)
+                    try:
+                        status = os.stat(path)
+                    except OSError:
+                        continue
+                    yield status.st_mtime, path, status.st_size
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache is under 90% of max_bytes.
+        Only one process evicts at a time; others skip and rely on its result.
+        """
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return
+            entries = sorted(self.entries())
+            self.size = sum(size for _, _, size in entries)
+            target = self.max_bytes * 9 // 10
+            for _, path, size in entries:
+                if self.size <= target:
+                    break
+                if self.remove(path):
+                    self.size -= size
+                    self.evictions += 1
+
+    def counters(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'errors': self.errors,
+        }
+
+    def stats(self):
+        return dict(self.counters(), bytes=self.size)
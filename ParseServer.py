@@ -0,0 +1,288 @@
+import argparse
+import asyncio
+import base64
+import functools
+import hashlib
+import io
+import json
+import os
+import struct
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from ParseTree import ParseException
+from ProjectCompiler import parseSource
+from TreeSerializer import writeBinary, writeXML
+
+FRAME_HEADER = struct.Struct('>I')
+
+MAX_FRAME = 16 * 1024 * 1024
+
+FORMATS = ('binary', 'xml', 'none')
+
+
+async def readFrame(reader):
+    """
+    Read one length-prefixed JSON message.
+    @return The decoded message, or None at end of stream
+    """
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME} byte limit")
+    return json.loads(await reader.readexactly(length))
+
+
+def encodeFrame(message):
+    data = json.dumps(message, separators=(',', ':')).encode()
+    return FRAME_HEADER.pack(len(data)) + data
+
+
+def parseRequest(source, format):
+    """
+    Parse one source in a worker and serialize the tree.
+    @return A response dict without the request id
+    """
+    try:
+        arena = parseSource(source)
+    except (UnicodeDecodeError, ParseException) as error:
+        return {'ok': False, 'error': str(error)}
+    response = {'ok': True, 'nodes': len(arena)}
+    if format == 'binary':
+        file = io.BytesIO()
+        writeBinary(arena, file)
+        response['tree'] = base64.b64encode(file.getvalue()).decode('ascii')
+    elif format == 'xml':
+        file = io.StringIO()
+        writeXML(arena.toParseTree(), file)
+        response['tree'] = file.getvalue()
+    return response
+
+
+class ParseServer:
+    """
+    Long-lived parse service speaking length-prefixed JSON over a Unix socket or TCP.
+    A request is {"id": ..., "source": text} or {"id": ..., "path": file}, with an optional
+    "format" of "binary" (base64 of TreeSerializer.writeBinary, the default), "xml" or "none".
+    Each response carries the request's id; clients may pipeline requests on one
+    connection and responses come back as they complete.
+    Parsing runs on a process pool, and at most max_pending requests are in flight:
+    past that each connection stops reading after its next request, so clients are
+    pushed back by the socket.
+    Recent responses are kept in an LRU cache keyed by source hash and format,
+    and identical requests arriving together share one parse.
+    @param workers Worker processes; 0 parses in the event loop's thread
+    @param max_pending Requests parsed or queued at once, across all connections
+    @param cache_size Number of responses kept in the cache
+    """
+
+    def __init__(self, workers=None, max_pending=64, cache_size=256):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers) if workers != 0 else None
+        self.pending = asyncio.Semaphore(max_pending)
+        self.cache = OrderedDict()
+        self.in_flight = {}
+        self.cache_size = cache_size
+        self.server = None
+        self.connections = {}
+        self.requests = 0
+        self.hits = 0
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        """
+        Listen on the Unix socket path if given, otherwise on host:port.
+        @return The bound address: the socket path, or a (host, port) pair
+        """
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handleConnection, path)
+            return path
+        self.server = await asyncio.start_server(self.handleConnection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        """
+        Stop listening, close open connections, dropping requests not yet answered and
+        parses not yet started, and shut the worker pool down without blocking the event loop.
+        Parses already running in a worker are waited for, but not answered.
+        """
+        if self.server is not None:
+            self.server.close()
+            for handler in self.connections:
+                handler.cancel()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+            await self.server.wait_closed()
+        if self.executor is not None:
+            shutdown = functools.partial(self.executor.shutdown, cancel_futures=True)
+            await asyncio.get_running_loop().run_in_executor(None, shutdown)
+
+    async def handleConnection(self, reader, writer):
+        handler = asyncio.current_task()
+        self.connections[handler] = writer
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                try:
+                    request = await readFrame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                except ValueError as error:
+                    async with write_lock:
+                        writer.write(encodeFrame({'ok': False, 'error': f'Bad frame: {error}', 'id': None}))
+                        await writer.drain()
+                    break
+                if request is None:
+                    break
+                await self.pending.acquire()
+                task = asyncio.create_task(self.respond(request, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+            del self.connections[handler]
+
+    async def respond(self, request, writer, write_lock):
+        try:
+            response = await self.handleRequest(request)
+        except Exception as error:
+            response = {'ok': False, 'error': f'{type(error).__name__}: {error}'}
+        finally:
+            self.pending.release()
+        response['id'] = request.get('id') if isinstance(request, dict) else None
+        async with write_lock:
+            writer.write(encodeFrame(response))
+            await writer.drain()
+
+    async def handleRequest(self, request):
+        self.requests += 1
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': 'Request must be a JSON object'}
+        format = request.get('format', 'binary')
+        if format not in FORMATS:
+            return {'ok': False, 'error': f'Unknown format {format!r}'}
+        if 'source' in request:
+            source = request['source'].encode()
+        elif 'path' in request:
+            try:
+                with open(request['path'], 'rb') as file:
+                    source = file.read()
+            except OSError as error:
+                return {'ok': False, 'error': str(error)}
+        else:
+            return {'ok': False, 'error': 'Request needs a source or a path'}
+
+        key = (hashlib.sha256(source).digest(), format)
+        response = self.cache.get(key)
+        if response is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return dict(response, cached=True)
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.hits += 1
+            return dict(await asyncio.shield(task), cached=True)
+        task = self.in_flight[key] = asyncio.ensure_future(self.parse(source, format))
+        try:
+            response = await asyncio.shield(task)
+        finally:
+            del self.in_flight[key]
+        self.cache[key] = response
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return dict(response, cached=False)
+
+    async def parse(self, source, format):
+        if self.executor is None:
+            return parseRequest(source, format)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, parseRequest, source, format)
+
+
+class ParseClient:
+    """
+    Pipelining client for ParseServer: request() can be awaited from many tasks at once
+    over one connection, and each call resolves with the response carrying its id.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.waiting = {}
+        self.next_id = 0
+        self.receiver = asyncio.create_task(self.receive())
+
+    @classmethod
+    async def connect(cls, path=None, host='127.0.0.1', port=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def receive(self):
+        try:
+            while True:
+                response = await readFrame(self.reader)
+                if response is None:
+                    break
+                future = self.waiting.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Parse server closed the connection"))
+
+    async def request(self, **fields):
+        request_id = self.next_id
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        self.writer.write(encodeFrame(dict(fields, id=request_id)))
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.receiver.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve parse requests over a Unix socket or TCP')
+    parser.add_argument('--socket', default=None, help='Unix socket path; TCP on --host/--port otherwise')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7411)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-pending', type=int, default=64)
+    parser.add_argument('--cache-size', type=int, default=256)
+    args = parser.parse_args()
+
+    async def serve():
+        server = ParseServer(args.workers, args.max_pending, args.cache_size)
+        if args.socket is not None and os.path.exists(args.socket):
+            os.unlink(args.socket)
+        address = await server.start(args.socket, args.host, args.port)
+        print(f'listening on {address}', file=sys.stderr)
+        try:
+            await server.server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -84,14 +84,68 @@
 #     Token for parsing. Can be used as a terminal node in a ParseTree
 #     """
 #     pass
+from functools import lru_cache
+from hashlib import blake2b
+
+from Token import Token
+
+TOKEN_HASH_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=TOKEN_HASH_CACHE_SIZE)
+def tokenDigest(type, value):
+    return blake2b(f'{type}\0{value}'.encode(), digest_size=16, person=b'token').digest()
+
+
+def tokenHash(token):
+    """
+    Digests are memoized in a bounded LRU, so long-lived processes hashing many
+    distinct token values do not grow without limit.
+    """
+    return tokenDigest(token.getType(), token.getValue())
+
+
+class ParseException(Exception):
+    """
+    @param position Index of the token the parser failed at, when known
+    @param offset UTF-8 byte offset in the source the tokenizer failed at, when known
+    """
+
+    def __init__(self, message, position=None, offset=None):
+        super().__init__(message)
+        self.position = position
+        self.offset = offset
+
+    def __reduce__(self):
+        return (type(self), (self.args[0], self.position, self.offset))
+
+
+def countLeaves(tree):
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParseTree):
+            stack.extend(node.children)
+        else:
+            count += 1
+    return count
+
+
 class ParseTree:
-    def __init__(self, type, value=None):
+    def __init__(self, type, value=None, start=None):
         self.type = type
         self.value = value
         self.children = []
+        self.structural_hash = None
+        self.start = start
 
     def addChild(self, child):
         self.children.append(child)
+        self.structural_hash = None
+
+    def getChildren(self):
+        return self.children
 
     def getType(self):
         return self.type
@@ -99,32 +153,106 @@ class ParseTree:
     def getValue(self):
         return self.value
 
+    def span(self, shift=0):
+        """
+        The tokens this node covers, as indices into the parser's token sequence.
+        start is recorded when the parser creates the node; end is found by counting leaves.
+        @param shift Added to start, for nodes whose tokens have moved since they were parsed
+        @return A (start, end) pair with end exclusive, or None if no start was recorded
+        """
+        if self.start is None:
+            return None
+        start = self.start + shift
+        return (start, start + countLeaves(self))
+
     def match(self, expected_list):
-        if self.type != expected_list[0]:
+        """
+        Check this tree against a preorder list of node types and leaf tokens.
+        Runs in one pass over the tree and leaves expected_list untouched.
+        @param expected_list Node types for interior nodes, Tokens for leaves
+        @return True if the tree matches a prefix of expected_list
+        """
+        expected = iter(expected_list)
+        missing = object()
+        if next(expected, missing) != self.type:
             return False
-        expected_list.pop(0)
-        for child in self.children:
-            if isinstance(child, ParseTree):
-                if not child.match(expected_list):
+        stack = [iter(self.children)]
+        while stack:
+            for child in stack[-1]:
+                item = next(expected, missing)
+                if item is missing:
                     return False
-            else:
-                if child != expected_list.pop(0):
+                if isinstance(child, ParseTree):
+                    if child.type != item:
+                        return False
+                    stack.append(iter(child.children))
+                    break
+                if child != item:
                     return False
+            else:
+                stack.pop()
         return True
 
-    def __repr__(self):
-        return f"ParseTree({self.type}, {self.value}, {self.children})"
+    def structuralHash(self):
+        """
+        A 16-byte digest of this subtree's node types and leaf tokens.
+        Digests are cached per node, so hashing a tree only visits subtrees not hashed before;
+        a node's cache is cleared by addChild, and subtrees are assumed not to change afterwards.
+        """
+        if self.structural_hash is not None:
+            return self.structural_hash
+        stack = [(self, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                digest = blake2b(f'{node.type}\0{node.value}'.encode(), digest_size=16, person=b'node')
+                for child in node.children:
+                    digest.update(child.structural_hash if isinstance(child, ParseTree) else tokenHash(child))
+                node.structural_hash = digest.digest()
+            elif node.structural_hash is None:
+                stack.append((node, True))
+                for child in node.children:
+                    if isinstance(child, ParseTree) and child.structural_hash is None:
+                        stack.append((child, False))
+        return self.structural_hash
 
-class Token:
-    def __init__(self, type, value):
-        self.type = type
-        self.value = value
+    def sameAs(self, other):
+        return isinstance(other, ParseTree) and self.structuralHash() == other.structuralHash()
 
-    def getType(self):
-        return self.type
+    def __repr__(self):
+        """
+        Same text as the recursive f-string form, built with an explicit stack
+        and joined once, so deep trees neither recurse nor copy quadratically.
+        """
+        parts = []
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+            elif isinstance(item, ParseTree):
+                parts.append(f"ParseTree({item.type}, {item.value}, [")
+                stack.append('])')
+                children = item.children
+                for index in range(len(children) - 1, -1, -1):
+                    stack.append(children[index])
+                    if index:
+                        stack.append(', ')
+            else:
+                parts.append(repr(item))
+        return ''.join(parts)
 
-    def getValue(self):
-        return self.value
 
-    def __repr__(self):
-        return f"Token({self.type}, {self.value})"
+def indexSubtrees(tree):
+    """
+    Map the structural hash of every interior node in tree to one node with that shape,
+    so "does this subtree already exist" is a single dictionary lookup.
+    """
+    tree.structuralHash()
+    index = {}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        index.setdefault(node.structural_hash, node)
+        stack.extend(child for child in node.children if isinstance(child, ParseTree))
+    return index
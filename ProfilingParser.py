@@ -0,0 +1,139 @@
+import argparse
+import json
+import time
+
+from CompilerParser import CompilerParser
+from JackTokenizer import tokenizeFile
+
+instrumented_classes = {}
+
+
+class ProductionStats:
+    __slots__ = ('calls', 'time', 'tokens')
+
+    def __init__(self):
+        self.calls = 0
+        self.time = 0.0
+        self.tokens = 0
+
+
+class ParseStats:
+    """
+    Counters collected by an instrumented parser.
+    Production times are inclusive of nested productions; the collapsed stacks hold
+    self time per call path, as consumed by flamegraph.pl and speedscope.
+    A single ParseStats can be shared by many parsers to aggregate a whole run.
+    """
+
+    def __init__(self):
+        self.productions = {}
+        self.stacks = {}
+        self.have_calls = 0
+        self.mustbe_calls = 0
+        self.frames = []
+
+    def toDict(self):
+        return {
+            'productions': {
+                name: {'calls': stats.calls, 'time': stats.time, 'tokens': stats.tokens}
+                for name, stats in sorted(self.productions.items())
+            },
+            'have_calls': self.have_calls,
+            'mustbe_calls': self.mustbe_calls,
+        }
+
+    def dumpJSON(self, file):
+        json.dump(self.toDict(), file, indent=2)
+
+    def writeCollapsed(self, file):
+        for path, seconds in sorted(self.stacks.items()):
+            file.write(f'{path} {round(seconds * 1e6)}\n')
+
+
+def instrumentMethod(name, method):
+    perf_counter = time.perf_counter
+
+    def instrumented(self, *args):
+        stats = self.stats
+        frames = stats.frames
+        path = f'{frames[-1][0]};{name}' if frames else name
+        frame = [path, 0.0]
+        frames.append(frame)
+        start_pos = self.pos
+        start = perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            elapsed = perf_counter() - start
+            frames.pop()
+            if frames:
+                frames[-1][1] += elapsed
+            production = stats.productions.get(name)
+            if production is None:
+                production = stats.productions[name] = ProductionStats()
+            production.calls += 1
+            production.time += elapsed
+            production.tokens += self.pos - start_pos
+            stats.stacks[path] = stats.stacks.get(path, 0.0) + elapsed - frame[1]
+
+    instrumented.__name__ = name
+    return instrumented
+
+
+def instrument(parser_class=CompilerParser):
+    """
+    Build (once per class) a subclass of parser_class whose compile* methods, have()
+    and mustbe() record into a ParseStats. parser_class itself is left untouched,
+    so uninstrumented parsing pays nothing.
+    The subclass takes an optional stats keyword argument and exposes self.stats.
+    """
+    cls = instrumented_classes.get(parser_class)
+    if cls is not None:
+        return cls
+
+    namespace = {}
+    for name in dir(parser_class):
+        if name.startswith('compile') and callable(getattr(parser_class, name)):
+            namespace[name] = instrumentMethod(name, getattr(parser_class, name))
+
+    def __init__(self, *args, stats=None, **kwargs):
+        self.stats = ParseStats() if stats is None else stats
+        parser_class.__init__(self, *args, **kwargs)
+
+    def have(self, type, value=None):
+        self.stats.have_calls += 1
+        return parser_class.have(self, type, value)
+
+    def mustbe(self, type, value=None):
+        self.stats.mustbe_calls += 1
+        return parser_class.mustbe(self, type, value)
+
+    namespace.update(__init__=__init__, have=have, mustbe=mustbe)
+    cls = instrumented_classes[parser_class] = type(f'Instrumented{parser_class.__name__}', (parser_class,), namespace)
+    return cls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile parsing of .jack files per production')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--json', help='write production stats as JSON to this file')
+    parser.add_argument('--collapsed', help='write collapsed stacks to this file')
+    args = parser.parse_args()
+
+    stats = ParseStats()
+    InstrumentedParser = instrument(CompilerParser)
+    for path in args.paths:
+        InstrumentedParser(tokenizeFile(path), stats=stats).compileProgram()
+    if args.json:
+        with open(args.json, 'w') as file:
+            stats.dumpJSON(file)
+    if args.collapsed:
+        with open(args.collapsed, 'w') as file:
+            stats.writeCollapsed(file)
+    for name, production in sorted(stats.productions.items(), key=lambda item: -item[1].time):
+        print(f'{name:28} {production.calls:>8} calls {production.time * 1000:10.2f}ms {production.tokens:>9} tokens')
+    print(f'have() {stats.have_calls} calls, mustbe() {stats.mustbe_calls} calls')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from ArenaTree import ArenaParser
+from ExpressionParser import IterativeExpressionParser
+from MappedTree import writeMappedTrees
+from ParseCache import ParseCache
+from ParseTree import ParseException
+from SourceIndex import SourceIndex
+from TokenStream import TokenStream, TokenStreamParser
+
+ProjectResult = namedtuple('ProjectResult', ['path', 'tree', 'error', 'cached', 'cache_stats'], defaults=[False, None])
+
+caches = {}
+
+
+class ProjectParser(ArenaParser, IterativeExpressionParser, TokenStreamParser):
+    pass
+
+
+def findSources(paths):
+    """
+    Expand a directory, a single path, or a list of either into a sorted list of .jack files.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                sources.extend(os.path.join(directory, name) for name in names if name.endswith('.jack'))
+        else:
+            sources.append(os.fspath(path))
+    return sorted(sources)
+
+
+def parseSource(source):
+    tokens = None
+    try:
+        tokens = TokenStream.fromSource(source)
+        parser = ProjectParser(tokens)
+        parser.compileProgram()
+        if parser.pos < len(tokens):
+            raise ParseException(f"Unexpected {parser.current_token} after end of class", parser.pos)
+    except ParseException as error:
+        raise SourceIndex(source, tokens.offsets if tokens is not None else ()).locate(error) from None
+    return parser.arena
+
+
+def compileFile(path, cache_dir=None):
+    """
+    Tokenize and parse one file, going through the parse cache when one is given.
+    The tree is returned as an ArenaTree whose tokens are a TokenStream, which pickles
+    as a handful of arrays and one string table rather than one object per node.
+    With a cache, the result's cache_stats holds what this file added to the cache's
+    counters, since the cache itself lives in whichever worker process parsed the file.
+    """
+    if cache_dir is None:
+        return parseFile(path, None)
+    cache = caches.get(cache_dir)
+    if cache is None:
+        cache = caches[cache_dir] = ParseCache(cache_dir)
+    before = cache.counters()
+    result = parseFile(path, cache)
+    after = cache.counters()
+    return result._replace(cache_stats={name: after[name] - before[name] for name in after})
+
+
+def parseFile(path, cache):
+    try:
+        with open(path, 'rb') as file:
+            source = file.read()
+        if cache is None:
+            return ProjectResult(path, parseSource(source), None)
+        tree = cache.get(source)
+        if tree is not None:
+            return ProjectResult(path, tree, None, True)
+        tree = parseSource(source)
+        cache.put(source, tree)
+        return ProjectResult(path, tree, None)
+    except (OSError, UnicodeDecodeError, ParseException) as error:
+        return ProjectResult(path, None, error)
+
+
+def cacheStats(results):
+    """
+    Sum the parse cache counters of a project's results.
+    @return A dict of counter totals, or None if no result went through a cache
+    """
+    totals = None
+    for result in results:
+        if result.cache_stats is not None:
+            if totals is None:
+                totals = dict.fromkeys(result.cache_stats, 0)
+            for name, value in result.cache_stats.items():
+                totals[name] += value
+    return totals
+
+
+def compileProject(paths, workers=None, chunksize=8, cache_dir=None):
+    """
+    Parse every .jack file under the given paths across a process pool.
+    @param paths A directory, a file, or a list of either
+    @param workers Number of worker processes; 0 parses in this process
+    @param chunksize Number of files handed to a worker per task
+    @param cache_dir Optional ParseCache directory shared by the workers
+    @return A list of ProjectResult(path, tree, error, cached, cache_stats), in path order;
+        cacheStats(results) totals the cache counters across workers
+    """
+    sources = findSources(paths)
+    compile = partial(compileFile, cache_dir=cache_dir)
+    if workers == 0:
+        return [compile(path) for path in sources]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(compile, sources, chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse a directory of .jack files in parallel')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=8)
+    parser.add_argument('--cache', default=None, help='parse cache directory')
+    parser.add_argument('--mapped', default=None, help='write all trees to this mapped tree file')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = compileProject(args.paths, args.workers, args.chunksize, args.cache)
+    elapsed = time.perf_counter() - start
+    errors = [result for result in results if result.error is not None]
+    for result in errors:
+        print(f'{result.path}: {result.error}', file=sys.stderr)
+    nodes = sum(len(result.tree) for result in results if result.tree is not None)
+    cached = sum(result.cached for result in results)
+    if args.mapped:
+        writeMappedTrees(args.mapped, [(result.path, result.tree) for result in results if result.tree is not None])
+    print(f'{len(results)} files ({cached} cached), {len(errors)} errors, {nodes} nodes in {elapsed:.3f}s')
+    stats = cacheStats(results)
+    if stats is not None:
+        print('cache: ' + ', '.join(f'{value} {name}' for name, value in stats.items()))
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,252 @@
+from collections import deque
+from itertools import count
+
+from JackGrammar import JACK_GRAMMAR, NODE_TYPES, parseGrammar
+from LL1Parser import firstSets, nullableSet, sequenceFirst
+from ParseTree import ParseException, ParseTree
+
+MATCH, SHIFT, CALL, RETURN, JUMP, JUMP_IF, JUMP_IF_NOT, SWITCH, ERROR = range(9)
+
+def grammarListings(grammar=JACK_GRAMMAR, node_types=NODE_TYPES):
+    """
+    Compile an LL(1) grammar, as JACK_GRAMMAR, to one instruction listing per node type.
+    A node type is entered with CALL; any other nonterminal is expanded in place, and
+    right recursion on itself becomes a JUMP back to its start, so classVarDecs,
+    statementList, operations... run as loops.
+    A nonterminal with several alternatives picks one with a SWITCH on the lookahead;
+    the alternative that can derive nothing is the default, otherwise the default is an ERROR.
+    @return A dict from node type to a listing of instructions and label strings, for assemble
+    @raise ValueError if a nonterminal that is not a node type recurses other than at its end
+    """
+    productions = parseGrammar(grammar)
+    nullable = nullableSet(productions)
+    first = firstSets(productions, nullable)
+
+    def expand(nonterminal, listing, labels, active):
+        start = f'{nonterminal}.{next(labels)}'
+        listing.append(start)
+        active = active | {nonterminal}
+        alternatives = productions[nonterminal]
+        if len(alternatives) == 1:
+            sequence(nonterminal, alternatives[0], start, False, listing, labels, active)
+            return
+        end = f'{nonterminal}.{next(labels)}'
+        cases = {}
+        default = None
+        bodies = []
+        for alternative in alternatives:
+            label = f'{nonterminal}.{next(labels)}'
+            keys, alternative_nullable = sequenceFirst(alternative, first, nullable)
+            cases.update(dict.fromkeys(keys, label))
+            if alternative_nullable:
+                default = label
+            bodies.append((label, alternative))
+        if default is None:
+            default = f'{nonterminal}.{next(labels)}'
+            bodies.append((default, None))
+        listing.append((SWITCH, cases, default))
+        for label, alternative in bodies:
+            listing.append(label)
+            if alternative is None:
+                listing.append((ERROR, f'Expected {nonterminal} but found {{}}'))
+            elif not sequence(nonterminal, alternative, start, True, listing, labels, active):
+                listing.append((JUMP, end))
+        listing.append(end)
+
+    def sequence(nonterminal, alternative, start, switched, listing, labels, active):
+        """
+        @return True if the sequence ended in a JUMP back to start
+        """
+        for index, symbol in enumerate(alternative):
+            if isinstance(symbol, tuple):
+                listing.append((SHIFT,) if switched and index == 0 else (MATCH,) + symbol)
+            elif symbol in node_types:
+                listing.append((CALL, symbol))
+            elif symbol == nonterminal and index == len(alternative) - 1:
+                listing.append((JUMP, start))
+                return True
+            elif symbol in active:
+                raise ValueError(f"Cannot expand {symbol} inside {nonterminal}: it is not a node type")
+            else:
+                expand(symbol, listing, labels, active)
+        return False
+
+    listings = {}
+    for nonterminal in productions:
+        if nonterminal in node_types:
+            listing = listings[nonterminal] = []
+            expand(nonterminal, listing, count(), frozenset())
+            listing.append((RETURN,))
+    return listings
+
+
+def thread(instructions):
+    """
+    Point jumps that land on a JUMP at its target, and SWITCH cases that land on
+    another SWITCH at the case that one would take, so nested choices cost one dispatch.
+    A jump to a RETURN becomes the RETURN.
+    """
+    def follow(target, key):
+        for _ in range(len(instructions)):
+            instruction = instructions[target]
+            if instruction[0] == JUMP:
+                target = instruction[1]
+            elif instruction[0] == SWITCH and key is not None:
+                target = instruction[1].get(key, instruction[2])
+            else:
+                break
+        return target
+
+    threaded = []
+    for instruction in instructions:
+        if instruction[0] == JUMP:
+            target = follow(instruction[1], None)
+            instruction = instructions[target] if instructions[target][0] == RETURN else (JUMP, target)
+        elif instruction[0] == SWITCH:
+            cases = {key: follow(target, key) for key, target in instruction[1].items()}
+            instruction = (SWITCH, cases, follow(instruction[2], None))
+        threaded.append(instruction)
+    return tuple(threaded)
+
+
+def assemble(grammar):
+    """
+    Resolve the label strings in each production's listing to instruction indices.
+    @return A dict from production (node type) to a tuple of instructions
+    """
+    programs = {}
+    for production, listing in grammar.items():
+        labels = {}
+        instructions = []
+        for step in listing:
+            if isinstance(step, str):
+                labels[step] = len(instructions)
+            else:
+                instructions.append(step)
+        resolved = []
+        for instruction in instructions:
+            op = instruction[0]
+            if op == JUMP:
+                instruction = (JUMP, labels[instruction[1]])
+            elif op in (JUMP_IF, JUMP_IF_NOT):
+                instruction = (op, instruction[1], labels[instruction[2]])
+            elif op == SWITCH:
+                instruction = (SWITCH, {key: labels[label] for key, label in instruction[1].items()}, labels[instruction[2]])
+            resolved.append(instruction)
+        programs[production] = thread(resolved)
+    return programs
+
+
+PROGRAMS = assemble(grammarListings())
+
+
+class PushParser:
+    """
+    Resumable parser for tokens that arrive in chunks.
+    Each node type is a small program of MATCH/SHIFT/CALL/SWITCH... instructions, compiled
+    from JACK_GRAMMAR by grammarListings and run on an explicit stack of [program, pc, tree]
+    frames, so parsing can stop at any chunk boundary and carry on when more tokens are fed.
+    Builds the same ParseTree as CompilerParser.compileProgram; tokens after the
+    end of the class are an error.
+    """
+
+    def __init__(self):
+        self.buffer = deque()
+        self.closed = False
+        self.tree = None
+        self.pos = 0
+        self.stack = [[PROGRAMS['program'], 0, self.newTree('program')]]
+
+    def newTree(self, type):
+        return ParseTree(type, start=self.pos)
+
+    def feed(self, tokens):
+        """
+        Parse as far as the tokens received so far allow.
+        @raise ParseException as soon as a token cannot continue the program
+        """
+        if self.closed:
+            raise ValueError("Cannot feed a closed parser")
+        self.buffer.extend(tokens)
+        self.run()
+
+    def close(self):
+        """
+        Mark the end of input and finish parsing.
+        @return The ParseTree
+        """
+        self.closed = True
+        self.run()
+        if self.tree is None:
+            raise ParseException("Unexpected end of input", self.pos)
+        return self.tree
+
+    def current(self):
+        return self.buffer[0] if self.buffer else None
+
+    def run(self):
+        buffer = self.buffer
+        stack = self.stack
+        if not stack:
+            if buffer:
+                raise ParseException(f"Unexpected {buffer[0]} after end of class", self.pos)
+            return
+        frame = stack[-1]
+        program, pc, tree = frame
+        closed = self.closed
+        while True:
+            instruction = program[pc]
+            op = instruction[0]
+            if op == CALL:
+                frame[1] = pc + 1
+                program = PROGRAMS[instruction[1]]
+                pc = 0
+                tree = self.newTree(instruction[1])
+                frame = [program, pc, tree]
+                stack.append(frame)
+                continue
+            if op == RETURN:
+                stack.pop()
+                if not stack:
+                    self.tree = tree
+                    if buffer:
+                        raise ParseException(f"Unexpected {buffer[0]} after end of class", self.pos)
+                    return
+                child = tree
+                frame = stack[-1]
+                program, pc, tree = frame
+                tree.addChild(child)
+                continue
+            if op == JUMP:
+                pc = instruction[1]
+                continue
+
+            if not buffer and not closed:
+                frame[1] = pc
+                return
+            token = buffer[0] if buffer else None
+            if token is None:
+                key = None
+            else:
+                type = token.getType()
+                key = (type, token.getValue()) if type == 'keyword' or type == 'symbol' else (type, None)
+
+            if op == SWITCH:
+                pc = instruction[1].get(key, instruction[2])
+            elif op == SHIFT:
+                tree.addChild(buffer.popleft())
+                self.pos += 1
+                pc += 1
+            elif op == MATCH:
+                if token is None or type != instruction[1] or \
+                        instruction[2] is not None and token.getValue() != instruction[2]:
+                    raise ParseException(f"Expected {instruction[1]} with value {instruction[2]} but found {token}", self.pos)
+                tree.addChild(buffer.popleft())
+                self.pos += 1
+                pc += 1
+            elif op == JUMP_IF:
+                pc = instruction[2] if key in instruction[1] else pc + 1
+            elif op == JUMP_IF_NOT:
+                pc = pc + 1 if key in instruction[1] else instruction[2]
+            else:
+                raise ParseException(instruction[1].format(token), self.pos)
@@ -0,0 +1,92 @@
+from array import array
+from bisect import bisect_right
+
+from JackTokenizer import tokenize
+from ParseTree import ParseException
+
+
+class SourceIndex:
+    """
+    Maps token indices to line and column numbers in one source file.
+    Tokens hold no positions: the tokenizer records each token's UTF-8 byte offset in a
+    flat array('I'), and the table of line starts is built from the source on the first
+    lookup, so a file that parses cleanly never pays for it.
+    Lines and columns are 1-based; columns count bytes.
+    @param data The source as bytes, or as text (which is encoded to UTF-8)
+    @param offsets Byte offset of each token, from tokenize(source, offsets) or a TokenStream
+    @param path Shown in locations, if given
+    """
+
+    def __init__(self, data, offsets, path=None):
+        self.data = data.encode('utf-8') if isinstance(data, str) else bytes(data)
+        self.offsets = offsets
+        self.path = path
+        self.line_starts = None
+
+    @classmethod
+    def fromSource(cls, source, path=None):
+        """
+        Tokenize source, recording token offsets.
+        @return A (tokens, SourceIndex) pair
+        """
+        data = source.encode('utf-8') if isinstance(source, str) else bytes(source)
+        offsets = array('I')
+        return tokenize(data, offsets), cls(data, offsets, path)
+
+    def lineStarts(self):
+        if self.line_starts is None:
+            data = self.data
+            starts = array('I', [0])
+            position = data.find(b'\n')
+            while position != -1:
+                starts.append(position + 1)
+                position = data.find(b'\n', position + 1)
+            self.line_starts = starts
+        return self.line_starts
+
+    def location(self, offset):
+        """
+        @return The (line, column) of a byte offset
+        """
+        line_starts = self.lineStarts()
+        line = bisect_right(line_starts, offset)
+        return (line, offset - line_starts[line - 1] + 1)
+
+    def tokenLocation(self, index):
+        """
+        @return The (line, column) where token index starts; indices past the last token are at end of file
+        """
+        if index < len(self.offsets):
+            return self.location(self.offsets[index])
+        return self.location(len(self.data))
+
+    def spanLocation(self, span):
+        """
+        @param span A (start, end) pair of token indices, e.g. from ParseTree.span()
+        @return The (line, column) pairs of the span's first and last tokens
+        """
+        start, end = span
+        return (self.tokenLocation(start), self.tokenLocation(max(start, end - 1)))
+
+    def describe(self, index):
+        return self.describeLocation(self.tokenLocation(index))
+
+    def describeLocation(self, location):
+        line, column = location
+        if self.path is None:
+            return f'line {line}, column {column}'
+        return f'{self.path}:{line}:{column}'
+
+    def locate(self, error):
+        """
+        Prefix a ParseException's message with the location of the token it was raised at,
+        or of the source offset for errors raised by the tokenizer.
+        @return A new ParseException, or error itself if it has neither
+        """
+        if error.position is not None:
+            location = self.tokenLocation(error.position)
+        elif error.offset is not None:
+            location = self.location(error.offset)
+        else:
+            return error
+        return ParseException(f'{self.describeLocation(location)}: {error}', error.position, error.offset)
@@ -0,0 +1,256 @@
+import argparse
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from collections import namedtuple
+
+from Ast import typeName
+from CompilerParser import GRAMMAR_VERSION
+from ParseTree import ParseException
+from ProjectCompiler import findSources, parseSource
+
+INDEX_VERSION = 1
+
+ClassSymbol = namedtuple('ClassSymbol', ['name', 'path', 'fields', 'statics', 'subroutines'])
+
+SubroutineSymbol = namedtuple('SubroutineSymbol', ['class_name', 'name', 'kind', 'return_type', 'parameters', 'locals'])
+
+VariableSymbol = namedtuple('VariableSymbol', ['name', 'kind', 'type', 'index'])
+
+FileEntry = namedtuple('FileEntry', ['digest', 'classes'])
+
+
+def childrenOf(node, type):
+    return [child for child in node.getChildren() if child.getType() == type]
+
+
+def declaredNames(node):
+    return [child.getValue() for child in node.getChildren() if child.getType() == 'identifier']
+
+
+def extractClass(tree, path):
+    """
+    Collect the symbols declared by one parsed class.
+    Variable indices are the VM segment indices: fields and statics count separately,
+    and a method's arguments start at 1 because argument 0 is this.
+    @param tree The program or class node of a ParseTree, ArenaNode or MappedNode tree
+    @return (ClassSymbol, list of SubroutineSymbol)
+    """
+    if tree.getType() == 'program':
+        tree = tree.getChildren()[0]
+    children = tree.getChildren()
+    class_name = children[1].getValue()
+    variables = {'field': [], 'static': []}
+    for declaration in childrenOf(tree, 'classVarDec'):
+        parts = declaration.getChildren()
+        kind = parts[0].getValue()
+        type = typeName(parts[1])
+        for name in declaredNames(declaration):
+            variables[kind].append(VariableSymbol(name, kind, type, len(variables[kind])))
+
+    subroutines = []
+    for subroutine in childrenOf(tree, 'subroutine'):
+        parts = subroutine.getChildren()
+        kind = parts[0].getValue()
+        offset = 1 if kind == 'method' else 0
+        parameters = []
+        parameter_list = parts[4].getChildren()
+        for position in range(0, len(parameter_list), 3):
+            parameters.append(VariableSymbol(parameter_list[position + 1].getValue(), 'argument',
+                                             typeName(parameter_list[position]), offset + len(parameters)))
+        local_vars = []
+        for declaration in childrenOf(parts[6], 'varDec'):
+            type = typeName(declaration.getChildren()[1])
+            for name in declaredNames(declaration):
+                local_vars.append(VariableSymbol(name, 'local', type, len(local_vars)))
+        subroutines.append(SubroutineSymbol(class_name, parts[2].getValue(), kind, typeName(parts[1]),
+                                            tuple(parameters), tuple(local_vars)))
+
+    symbol = ClassSymbol(class_name, path, tuple(variables['field']), tuple(variables['static']),
+                         tuple(subroutine.name for subroutine in subroutines))
+    return symbol, subroutines
+
+
+class SymbolIndex:
+    """
+    Project-wide tables of classes, subroutines and variables, keyed for O(1) lookup.
+    Files are re-indexed only when the hash of their source changes, and the index
+    can be saved to disk and loaded again by later runs.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.errors = {}
+        self.classes = {}
+        self.subroutines = {}
+        self.variables = {}
+
+    def getClass(self, name):
+        return self.classes.get(name)
+
+    def getSubroutine(self, class_name, name):
+        return self.subroutines.get((class_name, name))
+
+    def lookup(self, qualified_name):
+        """
+        @param qualified_name 'Class' or 'Class.subroutine'
+        @return The ClassSymbol or SubroutineSymbol, or None
+        """
+        class_name, _, name = qualified_name.partition('.')
+        return self.getSubroutine(class_name, name) if name else self.getClass(class_name)
+
+    def fields(self, class_name):
+        symbol = self.classes.get(class_name)
+        return symbol.fields if symbol is not None else ()
+
+    def statics(self, class_name):
+        symbol = self.classes.get(class_name)
+        return symbol.statics if symbol is not None else ()
+
+    def resolve(self, class_name, subroutine, name):
+        """
+        Resolve a variable name used inside a subroutine: locals and arguments shadow fields and statics.
+        @return The VariableSymbol, or None
+        """
+        symbol = self.variables.get((class_name, subroutine, name))
+        if symbol is None:
+            symbol = self.variables.get((class_name, None, name))
+        return symbol
+
+    def addClass(self, symbol, subroutines):
+        self.removeClass(symbol.name)
+        self.classes[symbol.name] = symbol
+        for variable in symbol.fields + symbol.statics:
+            self.variables[(symbol.name, None, variable.name)] = variable
+        for subroutine in subroutines:
+            self.subroutines[(symbol.name, subroutine.name)] = subroutine
+            for variable in subroutine.parameters + subroutine.locals:
+                self.variables[(symbol.name, subroutine.name, variable.name)] = variable
+
+    def removeClass(self, name):
+        symbol = self.classes.pop(name, None)
+        if symbol is None:
+            return
+        for variable in symbol.fields + symbol.statics:
+            self.variables.pop((name, None, variable.name), None)
+        for subroutine_name in symbol.subroutines:
+            subroutine = self.subroutines.pop((name, subroutine_name), None)
+            if subroutine is not None:
+                for variable in subroutine.parameters + subroutine.locals:
+                    self.variables.pop((name, subroutine_name, variable.name), None)
+
+    def updateTree(self, path, tree, digest=None):
+        self.removeFile(path)
+        symbol, subroutines = extractClass(tree, path)
+        self.addClass(symbol, subroutines)
+        self.files[path] = FileEntry(digest, (symbol.name,))
+
+    def updateFile(self, path, source=None):
+        """
+        Re-index path if its source changed since it was last indexed.
+        A file that fails to parse loses its symbols and is recorded in self.errors.
+        @param source The file's bytes, read from path when omitted
+        @return True if the file was re-indexed
+        """
+        path = os.fspath(path)
+        if source is None:
+            with open(path, 'rb') as file:
+                source = file.read()
+        digest = hashlib.sha256(source).hexdigest()
+        entry = self.files.get(path)
+        if entry is not None and entry.digest == digest:
+            return False
+        self.errors.pop(path, None)
+        try:
+            tree = parseSource(source)
+        except (UnicodeDecodeError, ParseException) as error:
+            self.removeFile(path)
+            self.files[path] = FileEntry(digest, ())
+            self.errors[path] = error
+            return True
+        self.updateTree(path, tree.root(), digest)
+        return True
+
+    def removeFile(self, path):
+        entry = self.files.pop(path, None)
+        if entry is None:
+            return
+        for name in entry.classes:
+            symbol = self.classes.get(name)
+            if symbol is not None and symbol.path == path:
+                self.removeClass(name)
+
+    def updateProject(self, paths):
+        """
+        Bring the index in line with every .jack file under paths, dropping files that are gone.
+        @return The paths that were re-indexed or removed
+        """
+        sources = findSources(paths)
+        present = set(sources)
+        changed = [path for path in list(self.files) if path not in present]
+        for path in changed:
+            self.removeFile(path)
+            self.errors.pop(path, None)
+        changed.extend(path for path in sources if self.updateFile(path))
+        return changed
+
+    def save(self, path):
+        state = (GRAMMAR_VERSION, INDEX_VERSION, self.files, self.errors, self.classes, self.subroutines)
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                pickle.dump(state, file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index written by save. A missing, unreadable, corrupt or outdated file gives an empty index.
+        """
+        index = cls()
+        try:
+            with open(path, 'rb') as file:
+                state = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError, ValueError):
+            return index
+        try:
+            if state[:2] != (GRAMMAR_VERSION, INDEX_VERSION):
+                return index
+            _, _, files, errors, classes, subroutines = state
+            for symbol in classes.values():
+                index.addClass(symbol, [subroutines[(symbol.name, name)] for name in symbol.subroutines])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return cls()
+        index.files, index.errors = files, errors
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Index the symbols of a directory of .jack files')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--index', default=None, help='index file to load and save')
+    parser.add_argument('--lookup', action='append', default=[], help='Class or Class.subroutine to look up')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = SymbolIndex.load(args.index) if args.index else SymbolIndex()
+    changed = index.updateProject(args.paths)
+    if args.index:
+        index.save(args.index)
+    elapsed = time.perf_counter() - start
+    for path, error in sorted(index.errors.items()):
+        print(f'{path}: {error}')
+    print(f'{len(index.files)} files, {len(changed)} re-indexed, {len(index.classes)} classes, '
+          f'{len(index.subroutines)} subroutines in {elapsed:.3f}s')
+    for name in args.lookup:
+        print(f'{name}: {index.lookup(name)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
 class Token:
+    __slots__ = ('type', 'value')
+
     def __init__(self, type, value):
         self.type = type
         self.value = value
@@ -9,5 +11,16 @@ class Token:
     def getValue(self):
         return self.value
 
+    def __eq__(self, other):
+        if not isinstance(other, Token):
+            return NotImplemented
+        return self.type == other.type and self.value == other.value
+
+    def __hash__(self):
+        return hash((self.type, self.value))
+
     def __str__(self):
         return f'Token(type={self.type}, value={self.value})'
+
+    def __repr__(self):
+        return f"Token({self.type}, {self.value})"
@@ -0,0 +1,181 @@
+import sys
+from array import array
+
+from CompilerParser import CompilerParser
+from JackTokenizer import KEYWORDS, SYMBOLS, TOKEN_PATTERN, byteOffsets, lexicalError, readSource
+from ParseTree import ParseException
+from Token import Token
+
+TOKEN_TYPES = ('keyword', 'symbol', 'integerConstant', 'stringConstant', 'identifier')
+
+TYPE_CODES = {type: code for code, type in enumerate(TOKEN_TYPES)}
+
+KEYWORD, SYMBOL, INTEGER_CONSTANT, STRING_CONSTANT, IDENTIFIER = range(len(TOKEN_TYPES))
+
+
+class TokenStream:
+    """
+    Columnar token store.
+    Token kinds are small ints in an array('B'), values are indices into an intern table
+    held in an array('I'), and UTF-8 byte offsets into the source are kept in a parallel array('I').
+    Tokens are only materialised on indexing, and equal tokens share one Token object.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.values = array('I')
+        self.offsets = array('I')
+        self.strings = []
+        self.string_codes = {}
+        self.token_cache = {}
+        for value in sorted(KEYWORDS) + sorted(SYMBOLS):
+            self.intern(value)
+
+    @classmethod
+    def fromTokens(cls, tokens):
+        stream = cls()
+        codes = stream.string_codes
+        intern = stream.intern
+        kinds = []
+        values = []
+        for token in tokens:
+            kinds.append(TYPE_CODES[token.getType()])
+            value = token.getValue()
+            code = codes.get(value)
+            values.append(intern(value) if code is None else code)
+        stream.kinds = array('B', kinds)
+        stream.values = array('I', values)
+        stream.offsets = array('I', bytes(4 * len(kinds)))
+        return stream
+
+    @classmethod
+    def fromSource(cls, source):
+        stream = cls()
+        kinds = stream.kinds
+        values = stream.values
+        offsets = stream.offsets
+        codes = stream.string_codes
+        intern = stream.intern
+        text = readSource(source)
+        for match in TOKEN_PATTERN.finditer(text):
+            kind = match.lastindex
+            if kind is None:
+                continue
+            value = match.group(kind)
+            if kind == 5:
+                kinds.append(SYMBOL)
+                values.append(codes[value])
+            elif kind == 3:
+                kinds.append(KEYWORD if value in KEYWORDS else IDENTIFIER)
+                code = codes.get(value)
+                values.append(intern(value) if code is None else code)
+            elif kind == 1 or kind == 2:
+                kinds.append(INTEGER_CONSTANT if kind == 1 else STRING_CONSTANT)
+                code = codes.get(value)
+                values.append(intern(value) if code is None else code)
+            else:
+                raise lexicalError(text, match)
+            offsets.append(match.start())
+        byteOffsets(text, offsets)
+        return stream
+
+    def __getstate__(self):
+        return (self.kinds, self.values, self.offsets, self.strings)
+
+    def __setstate__(self, state):
+        self.kinds, self.values, self.offsets, self.strings = state
+        self.string_codes = {value: code for code, value in enumerate(self.strings)}
+        self.token_cache = {}
+
+    def intern(self, value):
+        code = self.string_codes.get(value)
+        if code is None:
+            code = self.string_codes[value] = len(self.strings)
+            self.strings.append(sys.intern(value))
+        return code
+
+    def append(self, type, value, offset=0):
+        self.kinds.append(TYPE_CODES[type])
+        self.values.append(self.intern(value))
+        self.offsets.append(offset)
+
+    def getType(self, index):
+        return TOKEN_TYPES[self.kinds[index]]
+
+    def getValue(self, index):
+        return self.strings[self.values[index]]
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        key = (self.kinds[index], self.values[index])
+        token = self.token_cache.get(key)
+        if token is None:
+            token = self.token_cache[key] = Token(TOKEN_TYPES[key[0]], self.strings[key[1]])
+        return token
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+
+class TokenStreamParser(CompilerParser):
+    """
+    CompilerParser that reads a TokenStream column by column.
+    have() and mustbe() compare the current kind and value codes directly,
+    so no Token is touched until one is added to the tree.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.stream = None
+        self.kinds = tokens.kinds
+        self.values = tokens.values
+        self.value_codes = tokens.string_codes
+        self.length = len(tokens.kinds)
+        self.pos = -1
+        self.next()
+
+    @property
+    def current_token(self):
+        return self.tokens[self.pos] if self.pos < self.length else None
+
+    def next(self):
+        self.pos += 1
+        if self.pos < self.length:
+            self.kind = self.kinds[self.pos]
+            self.value = self.values[self.pos]
+        else:
+            self.kind = None
+            self.value = None
+
+    def current(self):
+        return self.current_token
+
+    def currentValue(self):
+        return self.tokens.strings[self.value] if self.value is not None else None
+
+    def currentKey(self):
+        kind = self.kind
+        if kind is None:
+            return None
+        if kind <= SYMBOL:
+            return (TOKEN_TYPES[kind], self.tokens.strings[self.value])
+        return (TOKEN_TYPES[kind], None)
+
+    def peek(self, offset=1):
+        index = self.pos + offset
+        return self.tokens[index] if index < self.length else None
+
+    def have(self, type, value=None):
+        if self.kind != TYPE_CODES[type]:
+            return False
+        return value is None or self.value == self.value_codes.get(value)
+
+    def mustbe(self, type, value=None):
+        if not self.have(type, value):
+            raise ParseException(f"Expected {type} with value {value} but found {self.current_token}", self.pos)
+        token = self.tokens[self.pos]
+        self.next()
+        return token
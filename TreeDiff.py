@@ -0,0 +1,45 @@
+from collections import namedtuple
+
+from ParseTree import ParseTree
+
+TreeDiff = namedtuple('TreeDiff', ['added', 'removed', 'modified'])
+
+
+def classNode(tree):
+    return tree.children[0] if tree.getType() == 'program' else tree
+
+
+def memberKey(member):
+    identifiers = [child.getValue() for child in member.children
+                   if not isinstance(child, ParseTree) and child.getType() == 'identifier']
+    if member.getType() == 'subroutine':
+        return ('subroutine', identifiers[0])
+    return ('classVarDec', tuple(identifiers))
+
+
+def classMembers(tree):
+    """
+    Map (kind, name) to each subroutine and classVarDec node of a class.
+    Subroutines are keyed by name, classVarDecs by the tuple of names they declare.
+    """
+    members = {}
+    for child in classNode(tree).children:
+        if isinstance(child, ParseTree) and child.getType() in ('subroutine', 'classVarDec'):
+            members[memberKey(child)] = child
+    return members
+
+
+def diffTrees(old, new):
+    """
+    Compare the class members of two trees from compileProgram using structural hashes.
+    Unchanged members cost one digest comparison each, and digests cached on reused
+    subtrees (e.g. from IncrementalParser) are not recomputed.
+    @return TreeDiff(added, removed, modified), each a list of (kind, name) keys
+    """
+    old_members = classMembers(old)
+    new_members = classMembers(new)
+    added = [key for key in new_members if key not in old_members]
+    removed = [key for key in old_members if key not in new_members]
+    modified = [key for key, node in new_members.items()
+                if key in old_members and old_members[key] is not node and not node.sameAs(old_members[key])]
+    return TreeDiff(added, removed, modified)
@@ -0,0 +1,280 @@
+import argparse
+import sys
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape
+
+from ArenaTree import NO_NODE, ArenaTree
+from CompilerParser import CompilerParser
+from JackTokenizer import tokenizeFile
+from ParseTree import ParseException, ParseTree
+from Token import Token
+from TokenStream import TOKEN_TYPES
+
+MAGIC = b'JPT\x01'
+
+NO_VALUE, NEW_VALUE = 0, 1
+
+FLUSH_SIZE = 1 << 16
+
+
+def writeXML(tree, file, indent='  '):
+    """
+    Write tree as nand2tetris-style XML: one element per node, tokens as
+    <type> value </type> on a single line. Interior node values are not written.
+    Output goes to file in chunks as the tree is walked.
+    @param file A text file-like object
+    """
+    parts = []
+    size = 0
+    stack = [(tree, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, str):
+            parts.append(node)
+        elif isinstance(node, ParseTree):
+            pad = indent * depth
+            parts.append(f'{pad}<{node.type}>\n')
+            stack.append((f'{pad}</{node.type}>\n', depth))
+            stack.extend((child, depth + 1) for child in reversed(node.children))
+        else:
+            type = node.getType()
+            parts.append(f'{indent * depth}<{type}> {escape(node.getValue())} </{type}>\n')
+        size += 1
+        if size >= 4096:
+            file.write(''.join(parts))
+            parts.clear()
+            size = 0
+    file.write(''.join(parts))
+
+
+def readXML(file):
+    """
+    Rebuild a ParseTree from XML written by writeXML, streaming through the document.
+    Equal tokens share one Token object.
+    @param file A path or file-like object
+    """
+    tokens = {}
+    stack = []
+    root = None
+    for event, element in iterparse(file, events=('start', 'end')):
+        tag = element.tag
+        if tag in TOKEN_TYPES:
+            if event == 'end':
+                if not stack:
+                    raise ParseException(f"Token <{tag}> outside of any node")
+                value = (element.text or '')[1:-1]
+                token = tokens.get((tag, value))
+                if token is None:
+                    token = tokens[(tag, value)] = Token(tag, value)
+                stack[-1].addChild(token)
+                element.clear()
+        elif event == 'start':
+            tree = ParseTree(tag)
+            if stack:
+                stack[-1].addChild(tree)
+            else:
+                root = tree
+            stack.append(tree)
+        else:
+            stack.pop()
+            element.clear()
+    return root
+
+
+def writeVarint(value, out):
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def writeString(value, out):
+    data = value.encode()
+    writeVarint(len(data), out)
+    out += data
+
+
+def writeBinary(tree, file):
+    """
+    Write tree in the compact binary format:
+    MAGIC, a length-prefixed table of node/token types, then one record per node in preorder.
+    A record is varint(type code << 1 | is leaf), a value reference, and for interior
+    nodes varint(child count). A value reference is 0 for None, 1 followed by a
+    length-prefixed string for a value not seen before, or n + 2 for the n-th value seen.
+    An ArenaTree is written straight from its arrays, as its nodes are already in preorder.
+    @param tree A ParseTree or an ArenaTree
+    @param file A binary file-like object
+    """
+    if isinstance(tree, ArenaTree):
+        writeArenaBinary(tree, file)
+        return
+    type_codes = {}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        type_codes.setdefault(node.getType(), len(type_codes))
+        if isinstance(node, ParseTree):
+            stack.extend(node.children)
+
+    out = bytearray(MAGIC)
+    writeVarint(len(type_codes), out)
+    for type in type_codes:
+        writeString(type, out)
+
+    value_ids = {}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        is_tree = isinstance(node, ParseTree)
+        writeVarint(type_codes[node.getType()] << 1 | (not is_tree), out)
+        value = node.getValue()
+        if value is None:
+            out.append(NO_VALUE)
+        else:
+            value_id = value_ids.get(value)
+            if value_id is None:
+                value_ids[value] = len(value_ids)
+                out.append(NEW_VALUE)
+                writeString(value, out)
+            else:
+                writeVarint(value_id + 2, out)
+        if is_tree:
+            children = node.children
+            writeVarint(len(children), out)
+            stack.extend(reversed(children))
+        if len(out) >= FLUSH_SIZE:
+            file.write(out)
+            out = bytearray()
+    file.write(out)
+
+
+def writeArenaBinary(arena, file):
+    out = bytearray(MAGIC)
+    writeVarint(len(arena.type_names), out)
+    for type in arena.type_names:
+        writeString(type, out)
+
+    first_child = arena.first_child
+    next_sibling = arena.next_sibling
+    tokens = arena.tokens
+    value_ids = {}
+    for index, token_index in enumerate(arena.token_index):
+        code = arena.node_types[index] << 1
+        if token_index == NO_NODE:
+            writeVarint(code, out)
+            out.append(NO_VALUE)
+            count = 0
+            child = first_child[index]
+            while child != NO_NODE:
+                count += 1
+                child = next_sibling[child]
+            writeVarint(count, out)
+        else:
+            writeVarint(code | 1, out)
+            value = tokens[token_index].getValue()
+            value_id = value_ids.get(value)
+            if value_id is None:
+                value_ids[value] = len(value_ids)
+                out.append(NEW_VALUE)
+                writeString(value, out)
+            else:
+                writeVarint(value_id + 2, out)
+        if len(out) >= FLUSH_SIZE:
+            file.write(out)
+            out = bytearray()
+    file.write(out)
+
+
+def readBinary(file):
+    return loadBinary(file.read())
+
+
+def loadBinary(data):
+    """
+    Rebuild a ParseTree from bytes written by writeBinary.
+    Equal tokens share one Token object.
+    """
+    data = memoryview(data)
+    if data[:len(MAGIC)] != MAGIC:
+        raise ParseException("Not a binary parse tree")
+    pos = len(MAGIC)
+
+    def readVarint():
+        nonlocal pos
+        result = 0
+        shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def readString():
+        nonlocal pos
+        length = readVarint()
+        pos += length
+        return str(data[pos - length:pos], 'utf-8')
+
+    try:
+        types = [readString() for _ in range(readVarint())]
+        values = []
+        tokens = {}
+        root = None
+        open_nodes = []
+        while True:
+            header = readVarint()
+            reference = readVarint()
+            if reference == NO_VALUE:
+                value = None
+            elif reference == NEW_VALUE:
+                value = readString()
+                values.append(value)
+            else:
+                value = values[reference - 2]
+            type = types[header >> 1]
+            if header & 1:
+                node = tokens.get((type, value))
+                if node is None:
+                    node = tokens[(type, value)] = Token(type, value)
+                remaining = 0
+            else:
+                node = ParseTree(type, value)
+                remaining = readVarint()
+            if open_nodes:
+                parent = open_nodes[-1]
+                parent[0].addChild(node)
+                parent[1] -= 1
+                if parent[1] == 0:
+                    open_nodes.pop()
+            else:
+                root = node
+            if remaining:
+                open_nodes.append([node, remaining])
+            if not open_nodes:
+                break
+    except IndexError:
+        raise ParseException("Truncated binary parse tree")
+    except UnicodeDecodeError:
+        raise ParseException("Corrupt string in binary parse tree")
+    if pos != len(data):
+        raise ParseException("Trailing data after binary parse tree")
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse .jack files and write their trees to stdout')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--binary', action='store_true', help='write the compact binary format instead of XML')
+    args = parser.parse_args()
+    for path in args.paths:
+        tree = CompilerParser(tokenizeFile(path)).compileProgram()
+        if args.binary:
+            writeBinary(tree, sys.stdout.buffer)
+        else:
+            writeXML(tree, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
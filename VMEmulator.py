@@ -0,0 +1,288 @@
+from VMGenerator import wrap
+
+SP, LCL, ARG, THIS, THAT = range(5)
+
+TEMP_BASE = 5
+
+STATIC_BASE = 16
+
+STACK_BASE = 256
+
+HEAP_BASE = 2048
+
+RAM_SIZE = 32768
+
+FRAME_SEGMENTS = {'local': LCL, 'argument': ARG, 'this': THIS, 'that': THAT}
+
+OS_COSTS = {
+    'Math.multiply': 60,
+    'Math.divide': 90,
+    'Memory.alloc': 40,
+    'String.new': 50,
+    'String.appendChar': 15,
+    'Output.printInt': 120,
+    'Output.printString': 40,
+    'Screen.drawRectangle': 200,
+}
+
+DEFAULT_OS_COST = 20
+
+
+class VMError(Exception):
+    pass
+
+
+class VMEmulator:
+    """
+    Executes Hack VM commands (as produced by CodeGenerator) with the standard
+    calling convention and memory layout. OS classes are stubbed in Python: Math,
+    Memory and Array work, String builds strings on the heap, Output appends to
+    self.output, Keyboard reads from the given inputs, and Screen only counts calls.
+    instructions counts executed VM commands; cycles adds an estimated fixed cost
+    per OS call from OS_COSTS, so runs of different code can be compared.
+    @param commands VM command tuples for all classes of the program
+    @param inputs Values returned by successive Keyboard.readInt/readChar calls
+    """
+
+    def __init__(self, commands, inputs=()):
+        self.program = list(commands)
+        self.functions = {}
+        self.labels = {}
+        function = None
+        for pc, command in enumerate(self.program):
+            if command[0] == 'function':
+                function = command[1]
+                self.functions[function] = pc
+            elif command[0] == 'label':
+                self.labels[(function, command[1])] = pc
+        self.ram = [0] * RAM_SIZE
+        self.statics = {}
+        self.heap = HEAP_BASE
+        self.inputs = list(inputs)
+        self.output = []
+        self.screen_calls = 0
+        self.instructions = 0
+        self.cycles = 0
+        self.builtins = {
+            'Math.multiply': lambda a, b: wrap(a * b),
+            'Math.divide': self.divide,
+            'Math.abs': abs,
+            'Math.min': min,
+            'Math.max': max,
+            'Math.sqrt': lambda a: int(a ** 0.5),
+            'Memory.alloc': self.alloc,
+            'Memory.deAlloc': lambda address: 0,
+            'Memory.peek': lambda address: self.ram[address],
+            'Memory.poke': self.poke,
+            'Array.new': self.alloc,
+            'Array.dispose': lambda address: 0,
+            'String.new': self.newString,
+            'String.appendChar': self.appendChar,
+            'String.length': lambda address: self.ram[address + 1],
+            'String.charAt': lambda address, index: self.ram[address + 2 + index],
+            'String.dispose': lambda address: 0,
+            'Output.printString': self.printString,
+            'Output.printInt': lambda value: self.output.append(str(value)) or 0,
+            'Output.printChar': lambda value: self.output.append(chr(value)) or 0,
+            'Output.println': lambda: self.output.append('\n') or 0,
+            'Keyboard.readInt': self.readInput,
+            'Keyboard.readChar': lambda: self.readInput(0),
+            'Keyboard.keyPressed': lambda: 0,
+            'Sys.wait': lambda duration: 0,
+        }
+
+    def divide(self, a, b):
+        if b == 0:
+            raise VMError("Division by zero")
+        quotient = abs(a) // abs(b)
+        return wrap(quotient if (a < 0) == (b < 0) else -quotient)
+
+    def alloc(self, size):
+        address = self.heap
+        self.heap += max(size, 1)
+        if self.heap > RAM_SIZE:
+            raise VMError("Heap overflow")
+        return address
+
+    def poke(self, address, value):
+        self.ram[address] = value
+        return 0
+
+    def newString(self, length):
+        address = self.alloc(length + 2)
+        self.ram[address] = length
+        self.ram[address + 1] = 0
+        return address
+
+    def appendChar(self, address, character):
+        length = self.ram[address + 1]
+        if length >= self.ram[address]:
+            raise VMError("String is full")
+        self.ram[address + 2 + length] = character
+        self.ram[address + 1] = length + 1
+        return address
+
+    def readString(self, address):
+        return ''.join(chr(self.ram[address + 2 + index]) for index in range(self.ram[address + 1]))
+
+    def printString(self, address):
+        self.output.append(self.readString(address))
+        return 0
+
+    def readInput(self, prompt):
+        if prompt:
+            self.output.append(self.readString(prompt))
+        if not self.inputs:
+            raise VMError("Keyboard input exhausted")
+        return self.inputs.pop(0)
+
+    def staticAddress(self, function, index):
+        key = (function.partition('.')[0], index)
+        address = self.statics.get(key)
+        if address is None:
+            address = self.statics[key] = STATIC_BASE + len(self.statics)
+            if address >= STACK_BASE:
+                raise VMError("Too many static variables")
+        return address
+
+    def address(self, function, segment, index):
+        ram = self.ram
+        if segment in FRAME_SEGMENTS:
+            return ram[FRAME_SEGMENTS[segment]] + index
+        if segment == 'pointer':
+            return THIS + index
+        if segment == 'temp':
+            return TEMP_BASE + index
+        if segment == 'static':
+            return self.staticAddress(function, index)
+        raise VMError(f"Unknown segment {segment}")
+
+    def run(self, entry='Main.main', arguments=(), max_instructions=10 ** 8):
+        """
+        Call entry with arguments and run until it returns.
+        @return The value entry returned
+        """
+        ram = self.ram
+        program = self.program
+        ram[SP] = STACK_BASE
+        for argument in arguments:
+            ram[ram[SP]] = argument
+            ram[SP] += 1
+        pc = self.call(entry, len(arguments), -1)
+        if pc is None:
+            return ram[ram[SP] - 1]
+        function = entry
+        frames = [None]
+        stack_limit = HEAP_BASE
+        while pc != -1:
+            command = program[pc]
+            op = command[0]
+            pc += 1
+            if op == 'label':
+                continue
+            self.instructions += 1
+            self.cycles += 1
+            if self.instructions > max_instructions:
+                raise VMError(f"Instruction limit of {max_instructions} reached")
+            sp = ram[SP]
+            if op == 'push':
+                segment = command[1]
+                ram[sp] = command[2] if segment == 'constant' else ram[self.address(function, segment, command[2])]
+                ram[SP] = sp + 1
+                if sp + 1 >= stack_limit:
+                    raise VMError("Stack overflow")
+            elif op == 'pop':
+                ram[self.address(function, command[1], command[2])] = ram[sp - 1]
+                ram[SP] = sp - 1
+            elif op == 'add':
+                ram[sp - 2] = wrap(ram[sp - 2] + ram[sp - 1])
+                ram[SP] = sp - 1
+            elif op == 'sub':
+                ram[sp - 2] = wrap(ram[sp - 2] - ram[sp - 1])
+                ram[SP] = sp - 1
+            elif op == 'neg':
+                ram[sp - 1] = wrap(-ram[sp - 1])
+            elif op == 'not':
+                ram[sp - 1] = ~ram[sp - 1]
+            elif op == 'and':
+                ram[sp - 2] = ram[sp - 2] & ram[sp - 1]
+                ram[SP] = sp - 1
+            elif op == 'or':
+                ram[sp - 2] = ram[sp - 2] | ram[sp - 1]
+                ram[SP] = sp - 1
+            elif op == 'eq':
+                ram[sp - 2] = -1 if ram[sp - 2] == ram[sp - 1] else 0
+                ram[SP] = sp - 1
+            elif op == 'lt':
+                ram[sp - 2] = -1 if ram[sp - 2] < ram[sp - 1] else 0
+                ram[SP] = sp - 1
+            elif op == 'gt':
+                ram[sp - 2] = -1 if ram[sp - 2] > ram[sp - 1] else 0
+                ram[SP] = sp - 1
+            elif op == 'goto':
+                pc = self.labels[(function, command[1])]
+            elif op == 'if-goto':
+                ram[SP] = sp - 1
+                if ram[sp - 1]:
+                    pc = self.labels[(function, command[1])]
+            elif op == 'call':
+                target = self.call(command[1], command[2], pc)
+                if target is not None:
+                    pc = target
+                    frames.append(function)
+                    function = command[1]
+            elif op == 'function':
+                for _ in range(command[2]):
+                    ram[ram[SP]] = 0
+                    ram[SP] += 1
+            elif op == 'return':
+                frame = ram[LCL]
+                return_address = ram[frame - 5]
+                ram[ram[ARG]] = ram[sp - 1]
+                ram[SP] = ram[ARG] + 1
+                ram[THAT] = ram[frame - 1]
+                ram[THIS] = ram[frame - 2]
+                ram[ARG] = ram[frame - 3]
+                ram[LCL] = ram[frame - 4]
+                pc = return_address
+                function = frames.pop()
+            else:
+                raise VMError(f"Unknown command {command}")
+        return ram[ram[SP] - 1]
+
+    def call(self, name, argument_count, return_address):
+        """
+        Set up a call frame for a VM function, or run an OS builtin in place.
+        @return The pc of the function, or None when a builtin was run
+        """
+        ram = self.ram
+        sp = ram[SP]
+        builtin = self.builtins.get(name)
+        if builtin is not None:
+            arguments = ram[sp - argument_count:sp]
+            self.cycles += OS_COSTS.get(name, DEFAULT_OS_COST) - 1
+            if name.startswith('Screen.'):
+                self.screen_calls += 1
+            ram[sp - argument_count] = wrap(builtin(*arguments))
+            ram[SP] = sp - argument_count + 1
+            return None
+        if name.startswith('Screen.'):
+            self.screen_calls += 1
+            self.cycles += OS_COSTS.get(name, DEFAULT_OS_COST) - 1
+            ram[sp - argument_count] = 0
+            ram[SP] = sp - argument_count + 1
+            return None
+        if name == 'Sys.halt':
+            raise VMError("Sys.halt called")
+        pc = self.functions.get(name)
+        if pc is None:
+            raise VMError(f"Unknown function {name}")
+        ram[sp] = return_address
+        ram[sp + 1] = ram[LCL]
+        ram[sp + 2] = ram[ARG]
+        ram[sp + 3] = ram[THIS]
+        ram[sp + 4] = ram[THAT]
+        ram[ARG] = sp - argument_count
+        ram[LCL] = sp + 5
+        ram[SP] = sp + 5
+        return pc
@@ -0,0 +1,506 @@
+import argparse
+import os
+
+from Ast import BinOp, Call, Do, If, Index, IntConst, KeywordConst, Let, Return, StringConst, UnaryOp, Var, While, lower
+from CompilerParser import CompilerParser
+from JackTokenizer import tokenize
+from ParseTree import ParseException
+
+BINARY_COMMANDS = {'+': 'add', '-': 'sub', '&': 'and', '|': 'or', '<': 'lt', '>': 'gt', '=': 'eq'}
+
+BINARY_CALLS = {'*': 'Math.multiply', '/': 'Math.divide'}
+
+UNARY_COMMANDS = {'-': 'neg', '~': 'not'}
+
+SEGMENTS = {'static': 'static', 'field': 'this', 'argument': 'argument', 'local': 'local'}
+
+KEYWORD_VALUES = {'true': -1, 'false': 0, 'null': 0}
+
+JUMPS = ('goto', 'if-goto')
+
+
+def wrap(value):
+    return (value + 0x8000 & 0xffff) - 0x8000
+
+
+def constantValue(node):
+    if isinstance(node, IntConst):
+        return node.value
+    if isinstance(node, KeywordConst):
+        return KEYWORD_VALUES.get(node.value)
+    return None
+
+
+def isBoolean(node):
+    """
+    Whether an expression always evaluates to true (-1) or false (0), so that a bare
+    if-goto on it branches exactly when not; if-goto would fall through.
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, BinOp):
+            if node.op in '<>=':
+                continue
+            if node.op not in '&|':
+                return False
+            stack.append(node.left)
+            stack.append(node.right)
+        elif isinstance(node, UnaryOp):
+            if node.op != '~':
+                return False
+            stack.append(node.operand)
+        elif constantValue(node) not in (0, -1):
+            return False
+    return True
+
+
+def foldBinary(op, left, right):
+    """
+    Evaluate a binary operator with the VM's 16-bit two's complement semantics.
+    @return The result, or None when it must be left to run time (division by zero)
+    """
+    if op == '+':
+        return wrap(left + right)
+    if op == '-':
+        return wrap(left - right)
+    if op == '*':
+        return wrap(left * right)
+    if op == '/':
+        if right == 0:
+            return None
+        quotient = abs(left) // abs(right)
+        return wrap(quotient if (left < 0) == (right < 0) else -quotient)
+    if op == '&':
+        return left & right
+    if op == '|':
+        return left | right
+    if op == '<':
+        return -1 if left < right else 0
+    if op == '>':
+        return -1 if left > right else 0
+    return -1 if left == right else 0
+
+
+def foldExpression(node):
+    """
+    Fold constant subexpressions and drop identity operations (x + 0, x - 0, x * 1, x / 1).
+    Operands are always still evaluated, so calls keep their side effects.
+    Runs on an explicit stack, operands before operators, so nesting depth is bounded only by memory.
+    """
+    results = []
+    stack = [(node, False)]
+    while stack:
+        node, visited = stack.pop()
+        if not visited and isinstance(node, (BinOp, UnaryOp, Index, Call)):
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(tuple(node.children())))
+            continue
+        if isinstance(node, BinOp):
+            right = results.pop()
+            left = results.pop()
+            node = foldBinOp(node.op, left, right)
+        elif isinstance(node, UnaryOp):
+            node = foldUnaryOp(node.op, results.pop())
+        elif isinstance(node, Index):
+            node = Index(node.name, results.pop())
+        elif isinstance(node, Call):
+            count = len(node.args)
+            args = tuple(results[len(results) - count:])
+            del results[len(results) - count:]
+            node = Call(node.receiver, node.name, args)
+        results.append(node)
+    return results[0]
+
+
+def foldBinOp(op, left, right):
+    left_value = constantValue(left)
+    right_value = constantValue(right)
+    if left_value is not None and right_value is not None:
+        value = foldBinary(op, left_value, right_value)
+        if value is not None:
+            return IntConst(value)
+    if right_value == 0 and op in '+-' or right_value == 1 and op in '*/':
+        return left
+    if left_value == 0 and op == '+' or left_value == 1 and op == '*':
+        return right
+    return BinOp(op, left, right)
+
+
+def foldUnaryOp(op, operand):
+    value = constantValue(operand)
+    if value is not None:
+        return IntConst(wrap(-value) if op == '-' else ~value)
+    if isinstance(operand, UnaryOp) and operand.op == op:
+        return operand.operand
+    return UnaryOp(op, operand)
+
+
+def foldStatements(statements):
+    """
+    Fold every expression in a statement list, and replace if/while statements whose
+    condition is constant by the branch that always runs. As in the generated code,
+    a condition counts as true only when it is -1.
+    """
+    folded = []
+    for statement in statements:
+        if isinstance(statement, Let):
+            index = foldExpression(statement.index) if statement.index is not None else None
+            folded.append(Let(statement.name, index, foldExpression(statement.value)))
+        elif isinstance(statement, If):
+            condition = foldExpression(statement.condition)
+            value = constantValue(condition)
+            then_body = foldStatements(statement.then_body)
+            else_body = foldStatements(statement.else_body) if statement.else_body is not None else None
+            if value is None:
+                folded.append(If(condition, then_body, else_body))
+            elif value == -1:
+                folded.extend(then_body)
+            elif else_body:
+                folded.extend(else_body)
+        elif isinstance(statement, While):
+            condition = foldExpression(statement.condition)
+            value = constantValue(condition)
+            if value is None or value == -1:
+                folded.append(While(condition, foldStatements(statement.body)))
+        elif isinstance(statement, Do):
+            folded.append(Do(foldExpression(statement.call)))
+        elif isinstance(statement, Return):
+            folded.append(Return(foldExpression(statement.value) if statement.value is not None else None))
+        else:
+            folded.append(statement)
+    return tuple(folded)
+
+
+class CodeGenerator:
+    """
+    Generate Hack VM commands from a lowered Class.
+    Commands are tuples such as ('push', 'constant', 7) or ('call', 'Math.multiply', 2);
+    formatCommands turns them into VM text.
+    With optimize set, constants are folded on the AST first, if/else and while use
+    branch layouts that skip a not or a goto per execution when the condition is
+    known to be true or false (see isBoolean), and the result goes
+    through the peephole optimizer.
+    @param optimize Whether to fold constants and optimize the output
+    """
+
+    def __init__(self, optimize=True):
+        self.optimize = optimize
+
+    def compileClass(self, ast):
+        self.class_name = ast.name
+        self.class_scope = {}
+        counts = {'static': 0, 'field': 0}
+        for declaration in ast.fields:
+            for name in declaration.names:
+                self.class_scope[name] = (SEGMENTS[declaration.kind], counts[declaration.kind], declaration.type)
+                counts[declaration.kind] += 1
+        self.field_count = counts['field']
+        self.label_count = 0
+        commands = []
+        for subroutine in ast.subroutines:
+            commands.extend(self.compileSubroutine(subroutine))
+        return commands
+
+    def compileSubroutine(self, subroutine):
+        self.scope = {}
+        offset = 1 if subroutine.kind == 'method' else 0
+        for index, parameter in enumerate(subroutine.parameters):
+            self.scope[parameter.name] = ('argument', offset + index, parameter.type)
+        local_count = 0
+        for declaration in subroutine.locals:
+            for name in declaration.names:
+                self.scope[name] = ('local', local_count, declaration.type)
+                local_count += 1
+
+        body = foldStatements(subroutine.body) if self.optimize else subroutine.body
+        self.commands = [('function', f'{self.class_name}.{subroutine.name}', local_count)]
+        if subroutine.kind == 'constructor':
+            self.emit('push', 'constant', self.field_count)
+            self.emit('call', 'Memory.alloc', 1)
+            self.emit('pop', 'pointer', 0)
+        elif subroutine.kind == 'method':
+            self.emit('push', 'argument', 0)
+            self.emit('pop', 'pointer', 0)
+        self.compileStatements(body)
+        return optimizeCommands(self.commands) if self.optimize else self.commands
+
+    def emit(self, *command):
+        self.commands.append(command)
+
+    def newLabel(self, name):
+        self.label_count += 1
+        return f'{name}{self.label_count}'
+
+    def lookup(self, name):
+        variable = self.scope.get(name) or self.class_scope.get(name)
+        if variable is None:
+            raise ParseException(f"Undeclared variable {name} in {self.class_name}")
+        return variable
+
+    def compileStatements(self, statements):
+        for statement in statements:
+            if isinstance(statement, Let):
+                self.compileLet(statement)
+            elif isinstance(statement, If):
+                self.compileIf(statement)
+            elif isinstance(statement, While):
+                self.compileWhile(statement)
+            elif isinstance(statement, Do):
+                self.compileExpression(statement.call)
+                self.emit('pop', 'temp', 0)
+            elif isinstance(statement, Return):
+                if statement.value is None:
+                    self.emit('push', 'constant', 0)
+                else:
+                    self.compileExpression(statement.value)
+                self.emit('return')
+
+    def compileLet(self, statement):
+        segment, index, _ = self.lookup(statement.name)
+        if statement.index is None:
+            self.compileExpression(statement.value)
+            self.emit('pop', segment, index)
+            return
+        self.emit('push', segment, index)
+        self.compileExpression(statement.index)
+        self.emit('add')
+        self.compileExpression(statement.value)
+        self.emit('pop', 'temp', 0)
+        self.emit('pop', 'pointer', 1)
+        self.emit('push', 'temp', 0)
+        self.emit('pop', 'that', 0)
+
+    def compileIf(self, statement):
+        end = self.newLabel('IF_END')
+        if statement.else_body is None:
+            self.compileExpression(statement.condition)
+            self.emit('not')
+            self.emit('if-goto', end)
+            self.compileStatements(statement.then_body)
+        elif self.optimize and isBoolean(statement.condition):
+            then = self.newLabel('IF_TRUE')
+            self.compileExpression(statement.condition)
+            self.emit('if-goto', then)
+            self.compileStatements(statement.else_body)
+            self.emit('goto', end)
+            self.emit('label', then)
+            self.compileStatements(statement.then_body)
+        else:
+            otherwise = self.newLabel('IF_FALSE')
+            self.compileExpression(statement.condition)
+            self.emit('not')
+            self.emit('if-goto', otherwise)
+            self.compileStatements(statement.then_body)
+            self.emit('goto', end)
+            self.emit('label', otherwise)
+            self.compileStatements(statement.else_body)
+        self.emit('label', end)
+
+    def compileWhile(self, statement):
+        top = self.newLabel('WHILE_TOP')
+        if self.optimize and constantValue(statement.condition) == -1:
+            self.emit('label', top)
+            self.compileStatements(statement.body)
+            self.emit('goto', top)
+        elif self.optimize and isBoolean(statement.condition):
+            test = self.newLabel('WHILE_TEST')
+            self.emit('goto', test)
+            self.emit('label', top)
+            self.compileStatements(statement.body)
+            self.emit('label', test)
+            self.compileExpression(statement.condition)
+            self.emit('if-goto', top)
+        else:
+            end = self.newLabel('WHILE_END')
+            self.emit('label', top)
+            self.compileExpression(statement.condition)
+            self.emit('not')
+            self.emit('if-goto', end)
+            self.compileStatements(statement.body)
+            self.emit('goto', top)
+            self.emit('label', end)
+
+    def compileExpression(self, node):
+        """
+        Emit the commands for an expression. Runs on an explicit stack of nodes and of
+        commands left to emit after a node's operands, so nesting depth is bounded only by memory.
+        """
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if type(node) is tuple:
+                self.emit(*node)
+            elif isinstance(node, IntConst):
+                value = node.value
+                if value >= 0:
+                    self.emit('push', 'constant', value)
+                elif value == -0x8000:
+                    self.emit('push', 'constant', 0x7fff)
+                    self.emit('not')
+                else:
+                    self.emit('push', 'constant', -value)
+                    self.emit('neg')
+            elif isinstance(node, Var):
+                segment, index, _ = self.lookup(node.name)
+                self.emit('push', segment, index)
+            elif isinstance(node, BinOp):
+                if node.op in BINARY_CALLS:
+                    stack.append(('call', BINARY_CALLS[node.op], 2))
+                else:
+                    stack.append((BINARY_COMMANDS[node.op],))
+                stack.append(node.right)
+                stack.append(node.left)
+            elif isinstance(node, UnaryOp):
+                stack.append((UNARY_COMMANDS[node.op],))
+                stack.append(node.operand)
+            elif isinstance(node, KeywordConst):
+                if node.value == 'this':
+                    self.emit('push', 'pointer', 0)
+                else:
+                    self.emit('push', 'constant', 0)
+                    if node.value == 'true':
+                        self.emit('not')
+            elif isinstance(node, StringConst):
+                self.emit('push', 'constant', len(node.value))
+                self.emit('call', 'String.new', 1)
+                for character in node.value:
+                    self.emit('push', 'constant', ord(character))
+                    self.emit('call', 'String.appendChar', 2)
+            elif isinstance(node, Index):
+                segment, index, _ = self.lookup(node.name)
+                self.emit('push', segment, index)
+                stack.extend([('push', 'that', 0), ('pop', 'pointer', 1), ('add',), node.index])
+            elif isinstance(node, Call):
+                stack.append(self.compileCallTarget(node))
+                stack.extend(reversed(node.args))
+            else:
+                raise ParseException(f"Cannot generate code for {type(node).__name__}")
+
+    def compileCallTarget(self, node):
+        """
+        Emit the receiver of a call, if it has one.
+        @return The call command, to emit after the arguments
+        """
+        arguments = len(node.args)
+        if node.receiver is None:
+            self.emit('push', 'pointer', 0)
+            name = f'{self.class_name}.{node.name}'
+            arguments += 1
+        else:
+            variable = self.scope.get(node.receiver) or self.class_scope.get(node.receiver)
+            if variable is None:
+                name = f'{node.receiver}.{node.name}'
+            else:
+                segment, index, type = variable
+                self.emit('push', segment, index)
+                name = f'{type}.{node.name}'
+                arguments += 1
+        return ('call', name, arguments)
+
+
+def optimizeCommands(commands):
+    """
+    Peephole-optimize one function's commands until nothing changes:
+    cancel push/pop of the same location, not/not and neg/neg pairs, and additions of 0;
+    thread jumps to labels that only jump on; drop jumps to the next command, code that
+    cannot be reached, and labels nothing jumps to.
+    """
+    changed = True
+    while changed:
+        changed = False
+        output = []
+        for command in commands:
+            if output:
+                previous = output[-1]
+                if command[0] == 'pop' and previous[0] == 'push' and previous[1:] == command[1:] \
+                        and command[1] not in ('constant', 'pointer'):
+                    output.pop()
+                    changed = True
+                    continue
+                if command[0] in ('not', 'neg') and previous[0] == command[0]:
+                    output.pop()
+                    changed = True
+                    continue
+                if command[0] in ('add', 'sub') and previous == ('push', 'constant', 0):
+                    output.pop()
+                    changed = True
+                    continue
+            output.append(command)
+        commands = output
+
+        targets = {}
+        for index, command in enumerate(commands):
+            if command[0] == 'label':
+                following = index + 1
+                while following < len(commands) and commands[following][0] == 'label':
+                    following += 1
+                if following < len(commands) and commands[following][0] == 'goto':
+                    targets[command[1]] = commands[following][1]
+        output = []
+        reachable = True
+        for index, command in enumerate(commands):
+            op = command[0]
+            if op == 'label' or op == 'function':
+                reachable = True
+            elif not reachable:
+                changed = True
+                continue
+            if op in JUMPS:
+                target = command[1]
+                seen = {target}
+                while target in targets and targets[target] not in seen:
+                    target = targets[target]
+                    seen.add(target)
+                if target != command[1]:
+                    command = (op, target)
+                    changed = True
+                following = index + 1
+                while following < len(commands) and commands[following][0] == 'label':
+                    if commands[following][1] == target:
+                        break
+                    following += 1
+                if following < len(commands) and commands[following] == ('label', target):
+                    if op == 'goto':
+                        changed = True
+                        continue
+                if op == 'goto':
+                    reachable = False
+            elif op == 'return':
+                reachable = False
+            output.append(command)
+        commands = output
+
+        used = {command[1] for command in commands if command[0] in JUMPS}
+        output = [command for command in commands if command[0] != 'label' or command[1] in used]
+        if len(output) != len(commands):
+            changed = True
+        commands = output
+    return commands
+
+
+def formatCommands(commands):
+    return ''.join(' '.join(str(part) for part in command) + '\n' for command in commands)
+
+
+def compileSource(source, optimize=True):
+    """
+    Tokenize, parse, lower and generate VM commands for one class.
+    """
+    return CodeGenerator(optimize).compileClass(lower(CompilerParser(tokenize(source)).compileProgram()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile .jack files to Hack VM code')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--no-optimize', action='store_true')
+    args = parser.parse_args()
+    for path in args.paths:
+        with open(path) as file:
+            commands = compileSource(file.read(), not args.no_optimize)
+        with open(os.path.splitext(path)[0] + '.vm', 'w') as file:
+            file.write(formatCommands(commands))
+
+
+if __name__ == '__main__':
+    main()
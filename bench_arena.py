@@ -0,0 +1,76 @@
+import argparse
+import gc
+import os
+import re
+import time
+import tracemalloc
+
+from ArenaTree import ArenaParser
+from CompilerParser import CompilerParser
+from JackTokenizer import tokenize
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'samples')
+
+
+def largeClass(copies):
+    with open(os.path.join(SAMPLES, 'Square.jack')) as file:
+        text = file.read()
+    body = text[text.index('constructor'):text.rindex('}')]
+    methods = [re.sub(r'(method|constructor) (\w+) (\w+)\(', rf'\1 \2 \g<3>{i}(', body) for i in range(copies)]
+    return 'class Square {\n field int x, y, size;\n' + '\n'.join(methods) + '}\n'
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tree = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tree, elapsed, size
+
+
+def countParseTree(tree):
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        children = getattr(node, 'children', None)
+        if children:
+            stack.extend(children)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare ParseTree and ArenaTree memory')
+    parser.add_argument('--copies', type=int, default=200)
+    args = parser.parse_args()
+
+    tokens = tokenize(largeClass(args.copies))
+    tree, tree_time, tree_size = measure(lambda: CompilerParser(tokens).compileProgram())
+    del tree
+    root, arena_time, arena_size = measure(lambda: ArenaParser(tokens).parse())
+    arena = root.arena
+    nodes = len(arena)
+
+    tree = CompilerParser(tokens).compileProgram()
+    start = time.perf_counter()
+    countParseTree(tree)
+    tree_walk = time.perf_counter() - start
+    start = time.perf_counter()
+    counts = [0] * len(arena.type_names)
+    for code in arena.node_types:
+        counts[code] += 1
+    arena_walk = time.perf_counter() - start
+
+    print(f'nodes:              {nodes}')
+    print(f'ParseTree bytes:    {tree_size / nodes:.1f} per node, built in {tree_time:.3f}s')
+    print(f'ArenaTree bytes:    {arena_size / nodes:.1f} per node, built in {arena_time:.3f}s')
+    print(f'memory reduction:   {tree_size / arena_size:.1f}x')
+    print(f'full walk:          ParseTree {tree_walk * 1000:.1f}ms, ArenaTree {arena_walk * 1000:.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import time
+
+from Ast import lower, walk
+from CompilerParser import CompilerParser
+from JackGenerator import JackGenerator
+from JackTokenizer import tokenize
+from ParseTree import ParseTree
+
+
+def walkParseTree(tree):
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, ParseTree):
+            stack.extend(node.children)
+    return count
+
+
+def walkAst(tree):
+    return sum(1 for _ in walk(tree))
+
+
+def best(function, argument, repeat):
+    result = None
+    fastest = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(argument)
+        elapsed = time.perf_counter() - start
+        fastest = elapsed if fastest is None else min(fastest, elapsed)
+    return result, fastest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare walking the concrete parse tree with the lowered AST')
+    parser.add_argument('--classes', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    program = JackGenerator(0, classes=args.classes).generateProgram()
+    trees = [CompilerParser(tokenize(source)).compileProgram() for _, source in program]
+    asts, lower_time = best(lambda trees: [lower(tree) for tree in trees], trees, args.repeat)
+    tree_nodes, tree_walk = best(lambda trees: sum(walkParseTree(tree) for tree in trees), trees, args.repeat)
+    ast_nodes, ast_walk = best(lambda asts: sum(walkAst(tree) for tree in asts), asts, args.repeat)
+
+    print(f'parse tree:  {tree_nodes} nodes, walked in {tree_walk * 1000:.1f}ms')
+    print(f'AST:         {ast_nodes} nodes, walked in {ast_walk * 1000:.1f}ms, lowered in {lower_time * 1000:.1f}ms')
+    print(f'reduction:   {tree_nodes / ast_nodes:.1f}x fewer nodes, {tree_walk / ast_walk:.1f}x faster walk')
+
+
+if __name__ == '__main__':
+    main()
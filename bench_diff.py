@@ -0,0 +1,41 @@
+import argparse
+import time
+
+from CompilerParser import CompilerParser
+from IncrementalParser import IncrementalParser
+from JackTokenizer import tokenize
+from TreeDiff import diffTrees
+from bench_arena import largeClass
+from bench_match import preorder
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare structural diff and full-tree comparison')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100, 400], help='copies of the sample methods')
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        incremental = IncrementalParser(tokenize(largeClass(size)))
+        old = incremental.tree
+        old.structuralHash()
+        index = next(i for i, token in enumerate(incremental.tokens) if token.getValue() == '254')
+        new = incremental.edit(index, index + 1, tokenize('253'))
+        fresh = CompilerParser(incremental.tokens).compileProgram()
+
+        diff, warm_time = timed(lambda: diffTrees(old, new))
+        cold, cold_time = timed(lambda: diffTrees(old, fresh))
+        _, full_time = timed(lambda: preorder(old) == preorder(fresh))
+        assert diff == cold and len(diff.modified) == 1
+        subroutines = sum(1 for child in old.children[0].children if getattr(child, 'type', None) == 'subroutine')
+        print(f'{subroutines:>5} subroutines: diff after incremental edit {warm_time * 1000:7.2f}ms, '
+              f'diff of fresh parse {cold_time * 1000:8.2f}ms, full-tree comparison {full_time * 1000:8.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import time
+
+from CompilerParser import CompilerParser
+from JackTokenizer import tokenize
+from ParseTree import ParseException
+from bench_arena import largeClass
+
+
+class LinearParser(CompilerParser):
+    """
+    The have()-chain decisions the parser used before table-driven dispatch, kept for comparison.
+    """
+
+    def compileClass(self):
+        tree = self.newTree('class')
+        tree.addChild(self.mustbe('keyword', 'class'))
+        tree.addChild(self.mustbe('identifier'))
+        tree.addChild(self.mustbe('symbol', '{'))
+        while self.have('keyword', 'static') or self.have('keyword', 'field'):
+            tree.addChild(self.compileClassVarDec())
+        while self.have('keyword', 'constructor') or self.have('keyword', 'function') or self.have('keyword', 'method'):
+            tree.addChild(self.compileSubroutine())
+        tree.addChild(self.mustbe('symbol', '}'))
+        return tree
+
+    def compileParameterList(self):
+        tree = self.newTree('parameterList')
+        if self.have('keyword', 'int') or self.have('keyword', 'char') or self.have('keyword', 'boolean') or self.have('identifier'):
+            tree.addChild(self.compileType())
+            tree.addChild(self.mustbe('identifier'))
+            while self.have('symbol', ','):
+                tree.addChild(self.mustbe('symbol', ','))
+                tree.addChild(self.compileType())
+                tree.addChild(self.mustbe('identifier'))
+        return tree
+
+    def compileStatements(self):
+        tree = self.newTree('statements')
+        while self.have('keyword', 'let') or self.have('keyword', 'if') or self.have('keyword', 'while') or self.have('keyword', 'do') or self.have('keyword', 'return'):
+            if self.have('keyword', 'let'):
+                tree.addChild(self.compileLet())
+            elif self.have('keyword', 'if'):
+                tree.addChild(self.compileIf())
+            elif self.have('keyword', 'while'):
+                tree.addChild(self.compileWhile())
+            elif self.have('keyword', 'do'):
+                tree.addChild(self.compileDo())
+            elif self.have('keyword', 'return'):
+                tree.addChild(self.compileReturn())
+        return tree
+
+    def compileExpression(self):
+        tree = self.newTree('expression')
+        tree.addChild(self.compileTerm())
+        while self.have('symbol') and self.currentValue() in ('+', '-', '*', '/', '&', '|', '<', '>', '='):
+            tree.addChild(self.mustbe('symbol'))
+            tree.addChild(self.compileTerm())
+        return tree
+
+    def compileTerm(self):
+        tree = self.newTree('term')
+        if self.have('integerConstant'):
+            tree.addChild(self.mustbe('integerConstant'))
+        elif self.have('stringConstant'):
+            tree.addChild(self.mustbe('stringConstant'))
+        elif self.have('keyword') and self.currentValue() in ('true', 'false', 'null', 'this'):
+            tree.addChild(self.mustbe('keyword'))
+        elif self.have('identifier'):
+            tree.addChild(self.mustbe('identifier'))
+            if self.have('symbol', '['):
+                tree.addChild(self.mustbe('symbol', '['))
+                tree.addChild(self.compileExpression())
+                tree.addChild(self.mustbe('symbol', ']'))
+            elif self.have('symbol', '('):
+                tree.addChild(self.mustbe('symbol', '('))
+                tree.addChild(self.compileExpressionList())
+                tree.addChild(self.mustbe('symbol', ')'))
+            elif self.have('symbol', '.'):
+                tree.addChild(self.mustbe('symbol', '.'))
+                tree.addChild(self.mustbe('identifier'))
+                tree.addChild(self.mustbe('symbol', '('))
+                tree.addChild(self.compileExpressionList())
+                tree.addChild(self.mustbe('symbol', ')'))
+        elif self.have('symbol', '('):
+            tree.addChild(self.mustbe('symbol', '('))
+            tree.addChild(self.compileExpression())
+            tree.addChild(self.mustbe('symbol', ')'))
+        elif self.have('symbol') and self.currentValue() in ('-', '~'):
+            tree.addChild(self.mustbe('symbol'))
+            tree.addChild(self.compileTerm())
+        else:
+            raise ParseException(f"Expected term but found {self.current_token}")
+        return tree
+
+
+def counting(cls):
+    class Counting(cls):
+        calls = 0
+
+        def have(self, type, value=None):
+            Counting.calls += 1
+            return super().have(type, value)
+
+        def currentKey(self):
+            Counting.calls += 1
+            return super().currentKey()
+
+        def currentValue(self):
+            Counting.calls += 1
+            return super().currentValue()
+
+    return Counting
+
+
+def timeParse(cls, tokens, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cls(tokens).compileProgram()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare have()-chain and table-driven dispatch')
+    parser.add_argument('--copies', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tokens = tokenize(largeClass(args.copies))
+    for name, cls in (('have() chains', LinearParser), ('dispatch tables', CompilerParser)):
+        counter = counting(cls)
+        counter(tokens).compileProgram()
+        elapsed = timeParse(cls, tokens, args.repeat)
+        print(f'{name:16} {counter.calls / len(tokens):5.2f} token tests per token, '
+              f'{len(tokens) / elapsed:,.0f} tokens/sec')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import sys
+import time
+
+from CompilerParser import CompilerParser
+from ExpressionParser import IterativeExpressionParser
+from JackTokenizer import tokenize
+
+
+def nestedClass(depth):
+    parentheses = '(' * depth + 'x' + ' + 1)' * depth
+    unary = '- ~' * (depth // 2) + ' x'
+    subscripts = 'a[' * depth + '0' + ']' * depth
+    calls = 'f(' * depth + ')' * depth
+    statements = ''.join(f'let y = {expression};\n' for expression in (parentheses, unary, subscripts, calls))
+    return f'class Deep {{ function void f() {{ {statements} return; }} }}'
+
+
+def run(cls, tokens):
+    start = time.perf_counter()
+    try:
+        cls(tokens).compileProgram()
+    except RecursionError:
+        return None
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stress expression parsing with deep nesting')
+    parser.add_argument('--depths', type=int, nargs='+', default=[100, 1000, 10000, 50000])
+    args = parser.parse_args()
+
+    print(f'recursion limit: {sys.getrecursionlimit()}')
+    for depth in args.depths:
+        tokens = tokenize(nestedClass(depth))
+        results = []
+        for cls in (CompilerParser, IterativeExpressionParser):
+            elapsed = run(cls, tokens)
+            results.append('RecursionError' if elapsed is None else f'{len(tokens) / elapsed:,.0f} tokens/sec')
+        print(f'depth {depth:>6}: recursive {results[0]:>22}   iterative {results[1]:>22}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import time
+
+from CompilerParser import CompilerParser
+from IncrementalParser import IncrementalParser
+from JackTokenizer import tokenize
+from bench_arena import largeClass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare incremental and full re-parse latency')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--edits', type=int, default=50)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        tokens = tokenize(largeClass(size))
+        incremental = IncrementalParser(tokens)
+        edit_at = [i for i, token in enumerate(tokens) if token.getType() == 'integerConstant']
+        step = max(1, len(edit_at) // args.edits)
+        edit_at = edit_at[::step][:args.edits]
+
+        start = time.perf_counter()
+        for i, index in enumerate(edit_at):
+            incremental.edit(index, index + 1, tokenize(str(i)))
+        incremental_time = (time.perf_counter() - start) / len(edit_at)
+
+        start = time.perf_counter()
+        for i, index in enumerate(edit_at):
+            incremental.edit(index, index + 1, tokenize(f'({i} + 1)'))
+            incremental.edit(index, index + 5, tokenize(str(i)))
+        resize_time = (time.perf_counter() - start) / (2 * len(edit_at))
+
+        start = time.perf_counter()
+        for _ in range(3):
+            CompilerParser(incremental.tokens).compileProgram()
+        full_time = (time.perf_counter() - start) / 3
+
+        print(f'{len(tokens):>8} tokens: incremental {incremental_time * 1000:7.3f}ms/edit, '
+              f'insert/remove {resize_time * 1000:7.3f}ms/edit, '
+              f'full {full_time * 1000:8.2f}ms, {incremental.full_parses - 1} fallbacks')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import time
+
+from CompilerParser import CompilerParser
+from ExpressionParser import IterativeExpressionParser
+from JackGenerator import JackGenerator
+from JackTokenizer import tokenize
+from LL1Parser import LL1Parser
+from TokenStream import TokenStream, TokenStreamParser
+from bench_arena import largeClass
+
+
+class StreamLL1Parser(LL1Parser, TokenStreamParser):
+    pass
+
+
+def best(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the table-driven LL(1) parser with the hand-written parsers')
+    parser.add_argument('--copies', type=int, default=50)
+    parser.add_argument('--generated', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    sources = [largeClass(args.copies)]
+    sources += [source for _, source in JackGenerator(0, classes=args.generated).generateProgram()]
+    token_lists = [tokenize(source) for source in sources]
+    streams = [TokenStream.fromTokens(tokens) for tokens in token_lists]
+    count = sum(len(tokens) for tokens in token_lists)
+    parsers = [
+        ('CompilerParser', CompilerParser, token_lists),
+        ('IterativeExpressionParser', IterativeExpressionParser, token_lists),
+        ('LL1Parser', LL1Parser, token_lists),
+        ('TokenStreamParser', TokenStreamParser, streams),
+        ('LL1Parser + TokenStream', StreamLL1Parser, streams),
+    ]
+    expected = None
+    print(f'{count} tokens in {len(sources)} files')
+    for name, parser_class, inputs in parsers:
+        trees, elapsed = best(lambda: [parser_class(tokens).compileProgram() for tokens in inputs], args.repeat)
+        text = [repr(tree) for tree in trees]
+        if expected is None:
+            expected = text
+        assert text == expected, name
+        print(f'{name:27} {elapsed:.3f}s  {count / elapsed / 1e6:.2f}M tokens/s')
+
+
+if __name__ == '__main__':
+    main()
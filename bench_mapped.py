@@ -0,0 +1,71 @@
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+from ArenaTree import ArenaParser
+from JackGenerator import JackGenerator
+from JackTokenizer import tokenize
+from MappedTree import MappedTree, writeMappedTrees
+
+
+def walk(root):
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if not node.isLeaf():
+            stack.extend(node.getChildren())
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare loading pickled arenas with opening a mapped tree file')
+    parser.add_argument('--classes', type=int, default=50)
+    parser.add_argument('--subroutines', type=int, default=10)
+    args = parser.parse_args()
+
+    program = JackGenerator(0, classes=args.classes, subroutines=args.subroutines).generateProgram()
+    trees = [(name, ArenaParser(tokenize(source)).parse().arena) for name, source in program]
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path = os.path.join(directory, 'trees.pickle')
+        mapped_path = os.path.join(directory, 'trees.jmt')
+        with open(pickle_path, 'wb') as file:
+            pickle.dump(dict(trees), file, pickle.HIGHEST_PROTOCOL)
+        writeMappedTrees(mapped_path, trees)
+        del trees
+
+        start = time.perf_counter()
+        with open(pickle_path, 'rb') as file:
+            arenas = pickle.load(file)
+        pickle_open = time.perf_counter() - start
+        start = time.perf_counter()
+        nodes = sum(walk(arena.root()) for arena in arenas.values())
+        pickle_walk = time.perf_counter() - start
+        start = time.perf_counter()
+        first = walk(arenas[program[0][0]].root())
+        pickle_one = time.perf_counter() - start
+        del arenas
+
+        start = time.perf_counter()
+        mapped = MappedTree(mapped_path)
+        mapped_open = time.perf_counter() - start
+        start = time.perf_counter()
+        mapped_nodes = sum(walk(mapped[name]) for name, _ in program)
+        mapped_walk = time.perf_counter() - start
+        start = time.perf_counter()
+        walk(mapped[program[0][0]])
+        mapped_one = time.perf_counter() - start
+
+        print(f'trees:              {len(program)}, {nodes} nodes, identical counts: {nodes == mapped_nodes}')
+        print(f'file size:          pickle {os.path.getsize(pickle_path):,} bytes, mapped {os.path.getsize(mapped_path):,} bytes')
+        print(f'open:               pickle {pickle_open * 1000:.1f}ms, mapped {mapped_open * 1000:.3f}ms')
+        print(f'walk one tree:      pickle {pickle_one * 1000:.2f}ms ({first} nodes), mapped {mapped_one * 1000:.2f}ms')
+        print(f'walk every tree:    pickle {pickle_walk * 1000:.1f}ms, mapped {mapped_walk * 1000:.1f}ms')
+        mapped.close()
+
+
+if __name__ == '__main__':
+    main()
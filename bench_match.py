@@ -0,0 +1,63 @@
+import argparse
+import time
+
+from CompilerParser import CompilerParser
+from JackTokenizer import tokenize
+from ParseTree import ParseTree
+from bench_arena import largeClass
+
+
+def popMatch(tree, expected_list):
+    """The original list.pop(0) matcher, kept for comparison."""
+    if tree.type != expected_list[0]:
+        return False
+    expected_list.pop(0)
+    for child in tree.children:
+        if isinstance(child, ParseTree):
+            if not popMatch(child, expected_list):
+                return False
+        elif child != expected_list.pop(0):
+            return False
+    return True
+
+
+def preorder(tree):
+    expected = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParseTree):
+            expected.append(node.type)
+            stack.extend(reversed(node.children))
+        else:
+            expected.append(node)
+    return expected
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare tree matching strategies')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 20, 80])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        tokens = tokenize(largeClass(size))
+        tree = CompilerParser(tokens).compileProgram()
+        other = CompilerParser(tokens).compileProgram()
+        expected = preorder(tree)
+        old, old_time = timed(lambda: popMatch(tree, list(expected)))
+        new, new_time = timed(lambda: tree.match(expected))
+        _, hash_time = timed(lambda: (tree.structuralHash(), other.structuralHash()))
+        same, equal_time = timed(lambda: tree.sameAs(other))
+        assert old and new and same
+        print(f'{len(expected):>8} nodes: pop(0) match {old_time * 1000:9.2f}ms, linear match {new_time * 1000:7.2f}ms, '
+              f'hashing {hash_time * 1000:7.2f}ms, hashed equality {equal_time * 1e6:5.1f}us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import time
+
+from CompilerParser import CompilerParser
+from JackTokenizer import tokenize
+from OutlineParser import OutlineParser
+from bench_arena import largeClass
+
+
+def signatures(tree):
+    klass = tree.children[0]
+    names = []
+    for member in klass.children[3:-1]:
+        if member.getType() == 'subroutine':
+            names.append((member.children[2].getValue(), len(member.children[4].children)))
+    return klass.children[1].getValue(), names
+
+
+def timed(function, sources):
+    start = time.perf_counter()
+    outlines = [signatures(function(source)) for source in sources]
+    return outlines, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare outline-only and full parsing')
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--copies', type=int, default=10)
+    args = parser.parse_args()
+
+    sources = [largeClass(args.copies).replace('class Square', f'class Square{i}') for i in range(args.files)]
+    token_lists = [tokenize(source) for source in sources]
+
+    full, full_time = timed(lambda tokens: CompilerParser(tokens).compileProgram(), token_lists)
+    outline, outline_time = timed(lambda tokens: OutlineParser(tokens).compileProgram(), token_lists)
+    assert full == outline
+    _, full_total = timed(lambda source: CompilerParser(tokenize(source)).compileProgram(), sources)
+    _, outline_total = timed(lambda source: OutlineParser(tokenize(source)).compileProgram(), sources)
+
+    print(f'parse only:          full {full_time:.3f}s, outline {outline_time:.3f}s, {full_time / outline_time:.1f}x')
+    print(f'tokenize + parse:    full {full_total:.3f}s, outline {outline_total:.3f}s, {full_total / outline_total:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+import argparse
+import os
+import time
+
+from CompilerParser import CompilerParser
+from JackTokenizer import tokenize
+from ParseTree import countLeaves
+from ParallelClassParser import parseClassParallel
+from bench_arena import largeClass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare serial and intra-file parallel class parsing')
+    parser.add_argument('--copies', type=int, default=300, help='copies of the sample methods')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 2, os.cpu_count()])
+    args = parser.parse_args()
+
+    tokens = tokenize(largeClass(args.copies))
+    start = time.perf_counter()
+    expected = CompilerParser(tokens).compileProgram()
+    serial = time.perf_counter() - start
+    countLeaves(expected)
+    serial_walked = time.perf_counter() - start
+    print(f'{len(tokens)} tokens, {os.cpu_count()} cpus, serial compileProgram {serial:.3f}s, '
+          f'with full walk {serial_walked:.3f}s')
+    for workers in args.workers:
+        start = time.perf_counter()
+        tree = parseClassParallel(tokens, workers=workers)
+        elapsed = time.perf_counter() - start
+        countLeaves(tree)
+        walked = time.perf_counter() - start
+        assert repr(tree) == repr(expected)
+        print(f'workers={workers:<3} assembled {elapsed:.3f}s ({serial / elapsed:.2f}x), '
+              f'with full walk {walked:.3f}s ({serial_walked / walked:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import time
+
+from CompilerParser import CompilerParser
+from JackTokenizer import JackTokenizer, tokenize
+from PushParser import PushParser
+from bench_arena import largeClass
+
+
+def pushParse(tokens, chunk):
+    parser = PushParser()
+    for start in range(0, len(tokens), chunk):
+        parser.feed(tokens[start:start + chunk])
+    return parser.close()
+
+
+def streamParse(data, chunk_size):
+    parser = PushParser()
+    batch = []
+    for token in JackTokenizer(data, chunk_size):
+        batch.append(token)
+        if len(batch) == 256:
+            parser.feed(batch)
+            batch = []
+    parser.feed(batch)
+    return parser.close()
+
+
+def best(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the push parser with the recursive-descent parser')
+    parser.add_argument('--copies', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    source = largeClass(args.copies)
+    tokens = tokenize(source)
+    expected, pull_time = best(lambda: CompilerParser(tokens).compileProgram(), args.repeat)
+    print(f'{len(tokens)} tokens')
+    print(f'pull parser:            {pull_time:.3f}s')
+    for chunk in (1, 64, 4096):
+        tree, push_time = best(lambda: pushParse(tokens, chunk), args.repeat)
+        assert repr(tree) == repr(expected)
+        print(f'push, {chunk:5} tokens/feed: {push_time:.3f}s ({push_time / pull_time:.2f}x)')
+    data = source.encode()
+    tree, stream_time = best(lambda: streamParse(data, 4096), args.repeat)
+    assert repr(tree) == repr(expected)
+    print(f'tokenizer -> push:      {stream_time:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
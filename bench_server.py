@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from JackGenerator import JackGenerator
+from ParseServer import ParseClient, ParseServer
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def runClient(connect, sources, first, requests, depth, format, latencies):
+    client = await connect()
+    queue = asyncio.Queue()
+    for index in range(first, first + requests):
+        queue.put_nowait(sources[index % len(sources)])
+
+    async def pipeline():
+        while not queue.empty():
+            source = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.request(source=source, format=format)
+            if not response['ok']:
+                raise SystemExit(f"parse failed: {response['error']}")
+            latencies[response['cached']].append(time.perf_counter() - start)
+
+    await asyncio.gather(*(pipeline() for _ in range(depth)))
+    await client.close()
+
+
+async def loadTest(args):
+    distinct = args.distinct or args.clients * args.requests
+    generator = JackGenerator(args.seed, classes=distinct, subroutines=args.subroutines,
+                              statements=args.statements)
+    sources = [source for _, source in generator.generateProgram()]
+    server = None
+    directory = None
+    if args.socket is None and args.port is None:
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, 'parse.sock')
+        server = ParseServer(args.workers, args.max_pending, args.cache_size)
+        await server.start(path)
+
+        async def connect():
+            return await ParseClient.connect(path)
+    else:
+        async def connect():
+            return await ParseClient.connect(args.socket, args.host, args.port)
+
+    latencies = {False: [], True: []}
+    start = time.perf_counter()
+    await asyncio.gather(*(runClient(connect, sources, client * args.requests, args.requests, args.depth,
+                                     args.format, latencies)
+                           for client in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        print(f'cache hits:  {server.hits} of {server.requests}')
+        await server.close()
+        directory.cleanup()
+    total = len(latencies[False]) + len(latencies[True])
+    print(f'requests:    {total} from {args.clients} clients over {len(sources)} sources, pipeline depth {args.depth}')
+    print(f'throughput:  {total / elapsed:,.0f} requests/sec')
+    for cached, label in ((False, 'misses'), (True, 'hits')):
+        values = latencies[cached]
+        if values:
+            print(f'{label + ":":<12} {len(values)}, p50 {percentile(values, 0.5) * 1000:.2f}ms, '
+                  f'p99 {percentile(values, 0.99) * 1000:.2f}ms, mean {statistics.mean(values) * 1000:.2f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test a ParseServer with concurrent pipelining clients')
+    parser.add_argument('--socket', default=None, help='connect to a running server on this Unix socket')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None, help='connect to a running server on this TCP port')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100, help='requests per client')
+    parser.add_argument('--depth', type=int, default=4, help='requests in flight per client')
+    parser.add_argument('--distinct', type=int, default=None,
+                        help='distinct sources, one per request by default; fewer means more cache hits')
+    parser.add_argument('--subroutines', type=int, default=4)
+    parser.add_argument('--statements', type=int, default=3)
+    parser.add_argument('--format', default='binary')
+    parser.add_argument('--workers', type=int, default=None, help='workers of the in-process server')
+    parser.add_argument('--max-pending', type=int, default=64)
+    parser.add_argument('--cache-size', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=0)
+    asyncio.run(loadTest(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
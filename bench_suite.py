@@ -0,0 +1,194 @@
+import argparse
+import gc
+import io
+import json
+import pickle
+import platform
+import sys
+import time
+import tracemalloc
+
+from ArenaTree import ArenaTree
+from CompilerParser import GRAMMAR_VERSION, CompilerParser
+from JackGenerator import DEFAULT_STATEMENT_MIX, JackGenerator
+from JackTokenizer import tokenize
+from TreeSerializer import writeBinary, writeXML
+from bench_arena import countParseTree
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def tokenizeStage(program):
+    return [tokenize(source) for source in program['sources']]
+
+
+def parseStage(program):
+    return [CompilerParser(tokens).compileProgram() for tokens in program['tokens']]
+
+
+def reprStage(program):
+    return [repr(tree) for tree in program['trees']]
+
+
+def pickleStage(program):
+    return [pickle.dumps(ArenaTree.fromParseTree(tree), pickle.HIGHEST_PROTOCOL) for tree in program['trees']]
+
+
+def xmlStage(program):
+    outputs = []
+    for tree in program['trees']:
+        file = io.StringIO()
+        writeXML(tree, file)
+        outputs.append(file.getvalue())
+    return outputs
+
+
+def binaryStage(program):
+    outputs = []
+    for tree in program['trees']:
+        file = io.BytesIO()
+        writeBinary(tree, file)
+        outputs.append(file.getvalue())
+    return outputs
+
+
+STAGES = {
+    'tokenize': tokenizeStage,
+    'parse': parseStage,
+    'serialize-repr': reprStage,
+    'serialize-pickle': pickleStage,
+    'serialize-xml': xmlStage,
+    'serialize-binary': binaryStage,
+}
+
+
+def buildProgram(generator):
+    sources = [source for _, source in generator.generateProgram()]
+    tokens = [tokenize(source) for source in sources]
+    trees = [CompilerParser(token_list).compileProgram() for token_list in tokens]
+    return {
+        'sources': sources,
+        'tokens': tokens,
+        'trees': trees,
+        'token_count': sum(len(token_list) for token_list in tokens),
+        'node_count': sum(countParseTree(tree) for tree in trees),
+    }
+
+
+def peakRSS():
+    """
+    The process's peak resident set size so far. It is a high-water mark over every
+    stage run before, not a measurement of one stage.
+    ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    @return The peak in bytes, or None where the resource module is missing
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def runStage(stage, program, repeat):
+    """
+    Time the best of repeat runs, then measure allocations in one traced run.
+    @return A result dict for the stage
+    """
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        STAGES[stage](program)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    gc.collect()
+    tracemalloc.start()
+    output = STAGES[stage](program)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del output
+    tokens = program['token_count']
+    nodes = program['node_count']
+    return {
+        'stage': stage,
+        'tokens': tokens,
+        'nodes': nodes,
+        'seconds': best,
+        'tokens_per_sec': tokens / best,
+        'nodes_per_sec': nodes / best,
+        'bytes_per_node': allocated / nodes,
+        'cumulative_peak_rss': peakRSS(),
+    }
+
+
+def compareResults(report, baseline, threshold):
+    """
+    @return Messages for every stage that is slower or allocates more than the baseline by more than threshold
+    """
+    previous = {(result['size'], result['stage']): result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = previous.get((result['size'], result['stage']))
+        if old is None:
+            continue
+        name = f"{result['stage']} at size {result['size']}"
+        if result['tokens_per_sec'] < old['tokens_per_sec'] * (1 - threshold):
+            regressions.append(f"{name}: {result['tokens_per_sec']:,.0f} tokens/sec, was {old['tokens_per_sec']:,.0f}")
+        if result['bytes_per_node'] > old['bytes_per_node'] * (1 + threshold):
+            regressions.append(f"{name}: {result['bytes_per_node']:.1f} bytes/node, was {old['bytes_per_node']:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tokenizer, parser and serialization on generated Jack programs')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sizes', default='1,4,16', help='comma-separated class counts to scale through')
+    parser.add_argument('--subroutines', type=int, default=10)
+    parser.add_argument('--statements', type=int, default=6)
+    parser.add_argument('--mix', default=','.join(f'{kind}={weight}' for kind, weight in DEFAULT_STATEMENT_MIX.items()),
+                        help='statement weights, e.g. let=4,if=2,while=1,do=3')
+    parser.add_argument('--depth', type=int, default=3, help='maximum expression depth')
+    parser.add_argument('--stages', default=','.join(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--baseline', help='compare against results previously written with --json')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change counted as a regression')
+    args = parser.parse_args()
+
+    mix = {kind: int(weight) for kind, weight in (item.split('=') for item in args.mix.split(','))}
+    config = {
+        'seed': args.seed, 'subroutines': args.subroutines, 'statements': args.statements,
+        'mix': mix, 'depth': args.depth, 'repeat': args.repeat,
+    }
+    report = {'grammar_version': GRAMMAR_VERSION, 'python': platform.python_version(), 'config': config, 'results': []}
+    for size in (int(size) for size in args.sizes.split(',')):
+        generator = JackGenerator(args.seed, classes=size, subroutines=args.subroutines, statements=args.statements,
+                                  statement_mix=mix, expression_depth=args.depth)
+        program = buildProgram(generator)
+        for stage in args.stages.split(','):
+            result = runStage(stage, program, args.repeat)
+            result['size'] = size
+            report['results'].append(result)
+            peak = result['cumulative_peak_rss']
+            rss = f"{peak / 2 ** 20:.0f}MB" if peak is not None else 'n/a'
+            print(f"{size:>4} classes {stage:18} {result['tokens_per_sec']:>12,.0f} tokens/s "
+                  f"{result['nodes_per_sec']:>12,.0f} nodes/s {result['bytes_per_node']:>7.1f} B/node  "
+                  f"peak rss so far {rss}")
+        del program
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compareResults(report, json.load(file), args.threshold)
+        for message in regressions:
+            print(f'REGRESSION {message}')
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
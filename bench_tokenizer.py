@@ -0,0 +1,50 @@
+import argparse
+import glob
+import os
+import time
+
+from JackTokenizer import JackTokenizer, tokenize
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'samples')
+
+
+def corpus(copies):
+    sources = []
+    for path in sorted(glob.glob(os.path.join(SAMPLES, '*.jack'))):
+        with open(path) as file:
+            sources.append(file.read())
+    return '\n'.join(sources) * copies
+
+
+def measure(function, text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = function(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return tokens, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare tokenizer throughput')
+    parser.add_argument('--copies', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    text = corpus(args.copies)
+    baseline, baseline_time = measure(lambda source: list(JackTokenizer(source.encode())), text, args.repeat)
+    bulk, bulk_time = measure(tokenize, text, args.repeat)
+
+    same = [(t.getType(), t.getValue()) for t in baseline] == [(t.getType(), t.getValue()) for t in bulk]
+    print(f'tokens:            {len(bulk)}')
+    print(f'identical streams: {same}')
+    print(f'char-by-char:      {len(baseline) / baseline_time:,.0f} tokens/sec')
+    print(f'master pattern:    {len(bulk) / bulk_time:,.0f} tokens/sec')
+    print(f'speed-up:          {baseline_time / bulk_time:.1f}x')
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import os
+
+from VMEmulator import VMEmulator
+from VMGenerator import compileSource
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'samples')
+
+SQUARE_DRIVER = '''
+class Driver {
+    function void main() {
+        var Square square;
+        var int i;
+        let square = Square.new(0, 0, 30);
+        let i = 0;
+        while (i < 20) {
+            do square.moveRight();
+            do square.moveDown();
+            do square.incSize();
+            let i = i + 1;
+        }
+        do square.decSize();
+        do square.dispose();
+        return;
+    }
+}
+'''
+
+CONSTANTS = '''
+class Constants {
+    function int main() {
+        var int i, total, limit;
+        let limit = 10 * 10;
+        let i = 0;
+        let total = 0;
+        while (i < (limit - 0)) {
+            let total = total + ((60 * 60) / 36) - (2 * 50) + (i * 1);
+            if (~(~(i > (3 * 16)))) {
+                let total = total - 1;
+            } else {
+                let total = total + 1;
+            }
+            if ((1 = 2) & true) {
+                do Output.printInt(total);
+            }
+            let i = i + 1;
+        }
+        return total;
+    }
+}
+'''
+
+
+def readSample(name):
+    with open(os.path.join(SAMPLES, name)) as file:
+        return file.read()
+
+
+PROGRAMS = [
+    ('Main', [readSample('Main.jack')], 'Main.main', [6, 3, 1, 4, 1, 5, 9]),
+    ('Square', [readSample('Square.jack'), SQUARE_DRIVER], 'Driver.main', []),
+    ('Constants', [CONSTANTS], 'Constants.main', []),
+]
+
+
+def compileProgram(sources, optimize):
+    commands = []
+    for source in sources:
+        commands.extend(compileSource(source, optimize))
+    return commands
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare unoptimized and optimized VM code on sample programs')
+    parser.parse_args()
+
+    print(f'{"program":10} {"static":>15} {"executed":>17} {"cycles":>17}')
+    for name, sources, entry, inputs in PROGRAMS:
+        results = []
+        for optimize in (False, True):
+            commands = compileProgram(sources, optimize)
+            emulator = VMEmulator(commands, inputs)
+            value = emulator.run(entry)
+            static = sum(1 for command in commands if command[0] != 'label')
+            results.append((static, emulator.instructions, emulator.cycles, value, emulator.output))
+        (static, executed, cycles, value, output), (optimized_static, optimized_executed, optimized_cycles, optimized_value,
+                                                    optimized_output) = results
+        if (value, output) != (optimized_value, optimized_output):
+            raise SystemExit(f'{name}: optimized program behaves differently')
+        print(f'{name:10} {static:>6} -> {optimized_static:<6} {executed:>7} -> {optimized_executed:<7} '
+              f'{cycles:>7} -> {optimized_cycles:<7} ({1 - optimized_cycles / cycles:.0%} fewer cycles)')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,45 @@
-from CompilerParser import CompilerParser
-from ParseTree import ParseTree
+import io
+import json
+import os
+
+import pytest
+
+from ArenaTree import ArenaParser
+from CompilerParser import CLASS_VAR_FIRST, STATEMENT_FIRST, SUBROUTINE_FIRST, TERM_FIRST, CompilerParser
+from EventParser import EventParser
+from ExpressionParser import IterativeExpressionParser
+from IncrementalParser import IncrementalParser
+from JackGenerator import JackGenerator
+from JackGrammar import JACK_GRAMMAR, NODE_TYPES, parseGrammar
+from JackTokenizer import JackTokenizer, tokenize
+from LL1Parser import LL1Parser, buildTable, firstSets
+from OutlineParser import LazySubroutineBody, OutlineParser
+from ParallelClassParser import decodeTree, encodeTree, parseClassParallel, subroutineSpans
+from ParseTree import ParseException, ParseTree
+from ProfilingParser import ParseStats, instrument
+from ProjectCompiler import parseSource
+from PushParser import PushParser, grammarListings
+from SourceIndex import SourceIndex
 from Token import Token
+from TokenStream import TokenStream, TokenStreamParser
+
+SAMPLES = os.path.join(os.path.dirname(__file__), 'samples')
+
+
+def readSample(name='Square.jack'):
+    with open(os.path.join(SAMPLES, name)) as file:
+        return file.read()
+
+
+def sampleTokens(name='Square.jack'):
+    return tokenize(readSample(name))
+
+
+def pushParse(tokens):
+    parser = PushParser()
+    parser.feed(tokens)
+    return parser.close()
+
 
 tokens = [
     Token('keyword', 'class'),
@@ -16,3 +55,357 @@ tokens = [
 parser = CompilerParser(tokens)
 parse_tree = parser.compileProgram()
 print(parse_tree)
+
+
+def test_compile_class_var_dec():
+    parser = CompilerParser(tokens)
+    tree = parser.compileProgram()
+    assert tree.getType() == 'program'
+    assert tree.children[0].getType() == 'class'
+    assert tree.children[0].children[3].getType() == 'classVarDec'
+
+
+def test_compile_sample_files():
+    for name in ('Main.jack', 'Square.jack'):
+        tree = CompilerParser(JackTokenizer(os.path.join(SAMPLES, name))).compileProgram()
+        assert tree.children[0].getType() == 'class'
+
+
+def test_dispatch_tables_follow_overrides():
+    class Parser(CompilerParser):
+        def compileReturn(self):
+            tree = super().compileReturn()
+            tree.type = 'customReturn'
+            return tree
+
+    source = 'class A { function void f() { let x = -(1 + y[2]); do g(); return; } }'
+    tree = Parser(tokenize(source)).compileProgram()
+    statements = tree.children[0].children[3].children[6].children[1]
+    assert [child.getType() for child in statements.children] == ['letStatement', 'doStatement', 'customReturn']
+
+
+def test_term_alternatives():
+    source = 'class A { function int f() { return ~a.b(1, "s", true) * (c[0] - -d); } }'
+    tree = CompilerParser(tokenize(source)).compileProgram()
+    assert tree.getType() == 'program'
+
+
+def test_iterative_expressions_match_recursive():
+    source = 'class A { function int f() { let a[i + 1] = -~x.y(1, (2 * z[3]), g()) | "s"; do h(-1, ~(a)); return (a); } }'
+    for tokens in (tokenize(source), sampleTokens()):
+        expected = CompilerParser(tokens).compileProgram()
+        assert repr(IterativeExpressionParser(tokens).compileProgram()) == repr(expected)
+
+
+def test_iterative_expressions_deep_nesting():
+    depth = 5000
+    source = 'class A { function int f() { return ' + '(' * depth + '- x' + ')' * depth + '; } }'
+    tree = IterativeExpressionParser(tokenize(source)).compileProgram()
+    expressions = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        expressions += node.getType() == 'expression'
+        stack.extend(getattr(node, 'children', ()))
+    assert expressions == depth + 1
+
+
+def test_incremental_reparse_matches_full_parse():
+    incremental = IncrementalParser(sampleTokens())
+
+    def find(value):
+        return next(i for i, token in enumerate(incremental.tokens) if token.getValue() == value)
+
+    def check(tree):
+        assert repr(tree) == repr(CompilerParser(incremental.tokens).compileProgram())
+
+    check(incremental.edit(find('254'), find('254') + 1, tokenize('(254 - y)')))
+    check(incremental.edit(find('254') - 1, find('254') + 4, tokenize('1')))
+    check(incremental.edit(find('do'), find('do'), tokenize('let y = 3;')))
+    check(incremental.edit(3, 3, tokenize('static boolean flag;')))
+    first, second = incremental.starts[4], incremental.starts[5]
+    check(incremental.edit(first, second, []))
+    assert incremental.partial_parses == 3 and incremental.full_parses == 3
+
+    index = find('510')
+    with pytest.raises(ParseException):
+        incremental.edit(index, index + 1, tokenize('{'))
+    check(incremental.edit(index, index + 1, tokenize('510')))
+
+
+def test_incremental_reparse_reuses_other_members():
+    tokens = sampleTokens()
+    incremental = IncrementalParser(tokens)
+    old_members = list(incremental.classNode().children)
+    index = next(i for i, token in enumerate(tokens) if token.getValue() == '254')
+    incremental.edit(index, index + 1, tokenize('253'))
+    new_members = incremental.classNode().children
+    changed = [i for i, (old, new) in enumerate(zip(old_members, new_members)) if old is not new]
+    assert len(changed) == 1 and new_members[changed[0]].getType() == 'subroutine'
+    assert incremental.full_parses == 1
+
+
+def test_incremental_reparse_keeps_spans_of_shifted_members():
+    incremental = IncrementalParser(sampleTokens())
+
+    def spans(root, span):
+        result, stack = [], [root]
+        while stack:
+            node = stack.pop()
+            result.append((node.getType(), span(node)))
+            stack.extend(reversed([child for child in node.children if isinstance(child, ParseTree)]))
+        return result
+
+    index = next(i for i, token in enumerate(incremental.tokens) if token.getValue() == '254')
+    incremental.edit(index, index + 1, tokenize('(254 - y)'))
+    incremental.edit(index, index + 5, tokenize('1'))
+    incremental.edit(index, index, tokenize('x +'))
+    assert incremental.partial_parses == 3
+    expected = CompilerParser(incremental.tokens).compileProgram().children[0].children[3:-1]
+    for member, node in enumerate(expected):
+        actual = incremental.classNode().children[3 + member]
+        assert incremental.span(member) == node.span()
+        assert spans(actual, lambda tree: incremental.span(member, tree)) == spans(node, ParseTree.span)
+
+
+def test_event_parser_reports_whole_tree():
+    class Builder:
+        def __init__(self):
+            self.stack = [ParseTree('root')]
+
+        def __call__(self, event, value):
+            if event == 'start':
+                node = ParseTree(value)
+                self.stack[-1].addChild(node)
+                self.stack.append(node)
+            elif event == 'token':
+                self.stack[-1].addChild(value)
+            else:
+                assert self.stack.pop().getType() == value
+
+    path = os.path.join(SAMPLES, 'Square.jack')
+    expected = CompilerParser(sampleTokens()).compileProgram()
+
+    class Parser(EventParser, IterativeExpressionParser):
+        pass
+
+    for cls in (EventParser, Parser):
+        builder = Builder()
+        cls(JackTokenizer(path), builder).parse()
+        assert len(builder.stack) == 1
+        assert repr(builder.stack[0].children[0]) == repr(expected)
+
+
+def test_event_parser_drives_generator():
+    def counter(counts):
+        while True:
+            event, value = yield
+            counts[event] = counts.get(event, 0) + 1
+
+    counts = {}
+    consumer = counter(counts)
+    next(consumer)
+    EventParser(tokens, lambda event, value: consumer.send((event, value))).parse()
+    assert counts == {'start': 4, 'token': 8, 'end': 4}
+
+
+def test_outline_parser_defers_bodies():
+    tokens = sampleTokens()
+    tree = OutlineParser(tokens).compileProgram()
+    bodies = [member.children[-1] for member in tree.children[0].children[3:-1] if member.getType() == 'subroutine']
+    assert all(isinstance(body, LazySubroutineBody) and not body.isParsed() for body in bodies)
+    assert bodies[0].getChildren()[0].getValue() == '{'
+    assert bodies[0].isParsed() and not bodies[1].isParsed()
+    assert repr(tree) == repr(CompilerParser(tokens).compileProgram())
+
+    class StreamOutlineParser(OutlineParser, TokenStreamParser):
+        pass
+
+    stream_tree = StreamOutlineParser(TokenStream.fromTokens(tokens), TokenStreamParser).compileProgram()
+    assert repr(stream_tree) == repr(tree)
+
+    broken = OutlineParser(tokenize('class A { function void f() { let x = ; } }')).compileProgram()
+    with pytest.raises(ParseException):
+        broken.children[0].children[3].children[-1].getChildren()
+    with pytest.raises(ParseException):
+        OutlineParser(tokenize('class A { function void f() { { }')).compileProgram()
+
+
+def test_parallel_class_parse_matches_serial():
+    source = readSample()
+    tokens = tokenize(source)
+    assert len(subroutineSpans(tokens)) == 10
+    expected = CompilerParser(tokens).compileProgram()
+    for workers in (0, 2):
+        tree = parseClassParallel(tokens, workers=workers, chunksize=3)
+        assert repr(tree) == repr(expected)
+        assert tree.children[0].children[5].children[2] is expected.children[0].children[5].children[2]
+    with pytest.raises(ParseException):
+        parseClassParallel(tokenize(source.replace('let size = size + 2;', 'let size = ;')), workers=0)
+
+    subroutine = expected.children[0].children[5]
+    name = ParseTree('name', None, subroutine.start + 2)
+    name.addChild(subroutine.children[2])
+    subroutine.children[2] = name
+    codes, extra_types = encodeTree(subroutine)
+    assert extra_types == ('name',)
+    assert repr(decodeTree(codes, tokens, subroutine.start, extra_types)) == repr(subroutine)
+
+
+def test_profiling_parser_counts_productions():
+    tokens = sampleTokens()
+    InstrumentedParser = instrument(CompilerParser)
+    assert instrument(CompilerParser) is InstrumentedParser
+    assert InstrumentedParser.statement_productions[('keyword', 'let')] is InstrumentedParser.compileLet
+
+    stats = ParseStats()
+    parser = InstrumentedParser(tokens, stats=stats)
+    tree = parser.compileProgram()
+    assert repr(tree) == repr(CompilerParser(tokens).compileProgram())
+    assert stats.productions['compileClass'].calls == 1
+    assert stats.productions['compileProgram'].tokens == len(tokens)
+    assert stats.productions['compileSubroutine'].calls == 10
+    assert stats.have_calls > 0 and stats.mustbe_calls > 0
+    assert not hasattr(CompilerParser(tokens), 'stats')
+
+    dump = io.StringIO()
+    stats.dumpJSON(dump)
+    assert json.loads(dump.getvalue())['productions']['compileClass']['calls'] == 1
+    collapsed = io.StringIO()
+    stats.writeCollapsed(collapsed)
+    lines = collapsed.getvalue().splitlines()
+    assert 'compileProgram;compileClass;compileSubroutine' in [line.rsplit(' ', 1)[0] for line in lines]
+
+
+def test_generated_programs_parse_and_are_reproducible():
+    program = JackGenerator(7, classes=3, subroutines=4, expression_depth=4).generateProgram()
+    assert [name for name, _ in program] == ['Class0', 'Class1', 'Class2']
+    assert program == JackGenerator(7, classes=3, subroutines=4, expression_depth=4).generateProgram()
+    for name, source in program:
+        tree = CompilerParser(tokenize(source)).compileProgram()
+        members = tree.children[0].children
+        assert members[1].getValue() == name
+        assert sum(1 for member in members if getattr(member, 'type', None) == 'subroutine') == 4
+
+    lets_only = JackGenerator(1, subroutines=2, statement_mix={'let': 1}).generateClass('Only')
+    assert 'while' not in lets_only and 'do ' not in lets_only
+    for arguments in ({'subroutines': 0}, {'statement_mix': {'let': 0, 'do': 0}}, {'statement_mix': {'for': 1}},
+                      {'statement_mix': {'let': -1, 'do': 2}}):
+        with pytest.raises(ValueError):
+            JackGenerator(1, **arguments)
+
+
+def test_push_parser_matches_pull_parser_at_any_chunk_size():
+    tokens = sampleTokens()
+    expected = repr(CompilerParser(tokens).compileProgram())
+    for size in (1, 2, 7, 64, len(tokens)):
+        parser = PushParser()
+        for start in range(0, len(tokens), size):
+            parser.feed(tokens[start:start + size])
+        assert repr(parser.close()) == expected
+
+    parser = PushParser()
+    parser.feed(tokens[:-1])
+    assert parser.tree is None
+    with pytest.raises(ParseException):
+        parser.close()
+    with pytest.raises(ParseException):
+        PushParser().feed(tokenize('class A { function void f() { let x = ; } }'))
+    with pytest.raises(ParseException):
+        PushParser().feed(tokens + tokens[:1])
+
+    for index in range(0, len(tokens), 3):
+        broken = tokens[:index] + tokens[index + 1:]
+        positions = []
+        for parse in (lambda: CompilerParser(broken).compileProgram(), lambda: pushParse(broken)):
+            try:
+                parse()
+                positions.append(None)
+            except ParseException as error:
+                positions.append(error.position)
+        assert positions[0] == positions[1]
+
+
+def test_push_programs_are_generated_from_the_grammar():
+    for _, source in JackGenerator(5, classes=3, expression_depth=4).generateProgram():
+        tokens = tokenize(source)
+        assert repr(pushParse(tokens)) == repr(CompilerParser(tokens).compileProgram())
+    assert set(grammarListings()) == NODE_TYPES
+    nested = {'program': ["group"], 'group': ["'(' group ')'", ""]}
+    with pytest.raises(ValueError):
+        grammarListings(nested, frozenset(['program']))
+    assert set(grammarListings(nested, frozenset(['program', 'group']))) == {'program', 'group'}
+
+
+def test_parse_errors_and_spans_resolve_to_source_locations():
+    source = 'class Main {\n  function void f() {\n    let x = ;\n  }\n}\n'
+    tokens, index = SourceIndex.fromSource(source, 'Main.jack')
+    with pytest.raises(ParseException) as error:
+        CompilerParser(tokens).compileProgram()
+    assert error.value.position == 12
+    assert str(index.locate(error.value)) == f'Main.jack:3:13: {error.value}'
+    with pytest.raises(ParseException, match='^line 3, column 13: Expected term'):
+        parseSource(source.encode())
+
+    text = readSample()
+    tokens, index = SourceIndex.fromSource(text)
+    tree = CompilerParser(tokens).compileProgram()
+    assert tree.span() == (0, len(tokens))
+    subroutine = tree.children[0].children[5]
+    start, end = subroutine.span()
+    assert tokens[start].getValue() in ('constructor', 'method', 'function') and tokens[end - 1].getValue() == '}'
+    (line, column), _ = index.spanLocation(subroutine.span())
+    assert text.splitlines()[line - 1][column - 1:].startswith(tokens[start].getValue())
+
+    def spans(node):
+        result = [node.span()]
+        for child in node.getChildren():
+            if not isinstance(child, Token):
+                result.extend(spans(child))
+        return result
+
+    arena_root = ArenaParser(tokens).parse()
+    arena_spans = []
+    stack = [arena_root]
+    while stack:
+        node = stack.pop()
+        if not node.isLeaf():
+            arena_spans.append(node.span())
+            stack.extend(reversed(node.getChildren()))
+    assert arena_spans == spans(tree)
+    push = PushParser()
+    push.feed(tokens)
+    assert spans(push.close()) == spans(tree)
+
+
+def test_ll1_table_matches_hand_written_first_sets():
+    first = firstSets(parseGrammar(JACK_GRAMMAR))
+    assert first['classVarDec'] == CLASS_VAR_FIRST
+    assert first['subroutine'] == SUBROUTINE_FIRST
+    assert first['statement'] == set(STATEMENT_FIRST)
+    assert first['term'] == set(TERM_FIRST)
+    with pytest.raises(ValueError):
+        buildTable({'program': ["'class' rest"], 'rest': ["identifier", "identifier '{'"]})
+    with pytest.raises(ValueError):
+        buildTable({'program': ["missing"]})
+
+
+def test_ll1_parser_matches_hand_written_parser():
+    sources = [readSample(name) for name in ('Main.jack', 'Square.jack')]
+    sources += [source for _, source in JackGenerator(5, classes=3, expression_depth=4).generateProgram()]
+    for source in sources:
+        tokens = tokenize(source)
+        assert repr(LL1Parser(tokens).compileProgram()) == repr(CompilerParser(tokens).compileProgram())
+        assert repr(LL1Parser(iter(tokens)).compileProgram()) == repr(CompilerParser(tokens).compileProgram())
+
+    tokens = tokenize(sources[1])
+    for index in range(0, len(tokens), 3):
+        broken = tokens[:index] + tokens[index + 1:]
+        positions = []
+        for parser_class in (CompilerParser, LL1Parser):
+            try:
+                parser_class(broken).compileProgram()
+                positions.append(None)
+            except ParseException as error:
+                positions.append(error.position)
+        assert positions[0] == positions[1]
@@ -0,0 +1,215 @@
+import asyncio
+import base64
+import os
+import pickle
+import time
+
+from CompilerParser import GRAMMAR_VERSION, CompilerParser
+from JackTokenizer import tokenizeFile
+from ParseCache import ParseCache
+from ParseServer import FRAME_HEADER, ParseClient, ParseServer, readFrame
+from ParseTree import ParseException
+from ProjectCompiler import cacheStats, compileFile, compileProject, findSources
+from SymbolIndex import INDEX_VERSION, SymbolIndex
+from TreeSerializer import loadBinary
+
+SAMPLES = os.path.join(os.path.dirname(__file__), 'samples')
+
+
+def test_find_sources(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'B.jack').write_text('class B { }')
+    (tmp_path / 'A.jack').write_text('class A { }')
+    (tmp_path / 'notes.txt').write_text('')
+    assert findSources(tmp_path) == [str(tmp_path / 'A.jack'), str(tmp_path / 'sub' / 'B.jack')]
+
+
+def test_compile_project_matches_serial_parse(tmp_path):
+    (tmp_path / 'Bad.jack').write_text('class Bad { static int ; }')
+    paths = [SAMPLES, str(tmp_path / 'Bad.jack')]
+    for workers in (0, 2):
+        results = sorted(compileProject(paths, workers=workers, chunksize=1), key=lambda result: os.path.basename(result.path))
+        assert [os.path.basename(result.path) for result in results] == ['Bad.jack', 'Main.jack', 'Square.jack']
+        assert results[0].tree is None and isinstance(results[0].error, ParseException)
+        for result in results[1:]:
+            expected = CompilerParser(tokenizeFile(result.path)).compileProgram()
+            assert result.error is None
+            assert repr(result.tree.root()) == repr(expected)
+
+
+def test_arena_pickle_round_trip():
+    tree = compileFile(os.path.join(SAMPLES, 'Square.jack')).tree
+    copy = pickle.loads(pickle.dumps(tree))
+    assert list(copy.first_child) == list(tree.first_child)
+    assert list(copy.next_sibling) == list(tree.next_sibling)
+    assert list(copy.token_index) == list(tree.token_index)
+    assert repr(copy.root()) == repr(tree.root())
+
+
+def test_parse_cache_hits_and_misses(tmp_path):
+    cache = ParseCache(tmp_path)
+    source = b'class A { }'
+    assert cache.get(source) is None
+    tree = compileFile(os.path.join(SAMPLES, 'Main.jack')).tree
+    cache.put(source, tree)
+    assert repr(cache.get(source).root()) == repr(tree.root())
+    assert cache.get(b'class B { }') is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2 and cache.stats()['stores'] == 1
+    size = cache.size
+    cache.put(source, tree)
+    assert cache.size == size == ParseCache(tmp_path).size
+
+
+def test_parse_cache_evicts_least_recently_used(tmp_path):
+    tree = compileFile(os.path.join(SAMPLES, 'Main.jack')).tree
+    entry = len(pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))
+    cache = ParseCache(tmp_path, max_bytes=int(entry * 3.5))
+    sources = [f'class C{i} {{ }}'.encode() for i in range(3)]
+    for i, source in enumerate(sources):
+        cache.put(source, tree)
+        os.utime(cache.path(cache.key(source)), (i, i))
+    assert cache.get(sources[0]) is not None
+    cache.put(b'class D { }', tree)
+    assert cache.stats()['evictions'] >= 1
+    assert cache.get(sources[0]) is not None
+    assert cache.get(sources[1]) is None
+
+
+def test_parse_cache_drops_corrupt_entries(tmp_path):
+    cache = ParseCache(tmp_path)
+    source = b'class A { }'
+    path = cache.path(cache.key(source))
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as file:
+        file.write(b'not a pickle')
+    assert cache.get(source) is None
+    assert not os.path.exists(path)
+
+
+def test_compile_project_uses_cache(tmp_path):
+    first = compileProject(SAMPLES, workers=0, cache_dir=str(tmp_path))
+    second = compileProject(SAMPLES, workers=0, cache_dir=str(tmp_path))
+    assert not any(result.cached for result in first)
+    assert all(result.cached for result in second)
+    assert [repr(result.tree.root()) for result in first] == [repr(result.tree.root()) for result in second]
+
+
+def test_compile_project_collects_cache_stats_from_workers(tmp_path):
+    first = compileProject(SAMPLES, workers=1, chunksize=1, cache_dir=str(tmp_path))
+    second = compileProject(SAMPLES, workers=1, chunksize=1, cache_dir=str(tmp_path))
+    assert cacheStats(first) == {'hits': 0, 'misses': len(first), 'stores': len(first), 'evictions': 0, 'errors': 0}
+    assert cacheStats(second)['hits'] == len(second) and cacheStats(second)['misses'] == 0
+    assert cacheStats(compileProject(SAMPLES, workers=0)) is None
+
+
+def test_symbol_index_updates_incrementally(tmp_path):
+    (tmp_path / 'Point.jack').write_text(
+        'class Point { field int x, y; static Point origin;'
+        ' constructor Point new(int ax, int ay) { let x = ax; return this; }'
+        ' method int dot(Point other) { var int sum, scale; return sum; } }')
+    (tmp_path / 'Main.jack').write_text('class Main { function void main() { return; } }')
+    index = SymbolIndex()
+    assert sorted(os.path.basename(path) for path in index.updateProject(tmp_path)) == ['Main.jack', 'Point.jack']
+
+    point = index.lookup('Point')
+    assert [field.name for field in point.fields] == ['x', 'y']
+    assert point.statics[0].type == 'Point' and point.subroutines == ('new', 'dot')
+    dot = index.lookup('Point.dot')
+    assert dot.kind == 'method' and dot.return_type == 'int'
+    assert [(variable.name, variable.index) for variable in dot.parameters] == [('other', 1)]
+    assert [(variable.name, variable.index) for variable in dot.locals] == [('sum', 0), ('scale', 1)]
+    assert index.resolve('Point', 'dot', 'scale').kind == 'local'
+    assert index.resolve('Point', 'dot', 'y').kind == 'field'
+    assert index.resolve('Point', 'new', 'ax').index == 0
+    assert index.resolve('Point', 'new', 'scale') is None
+
+    saved = tmp_path / 'symbols.idx'
+    index.save(saved)
+    (tmp_path / 'Main.jack').write_text('class Main { function void main() { return; } function int two() { return 2; } }')
+    (tmp_path / 'Point.jack').unlink()
+    (tmp_path / 'Bad.jack').write_text('class Bad { static int ; }')
+    loaded = SymbolIndex.load(saved)
+    assert loaded.lookup('Point.dot') == dot
+    changed = loaded.updateProject(tmp_path)
+    assert sorted(os.path.basename(path) for path in changed) == ['Bad.jack', 'Main.jack', 'Point.jack']
+    assert loaded.lookup('Point') is None and loaded.resolve('Point', 'dot', 'sum') is None
+    assert loaded.lookup('Main.two').return_type == 'int'
+    assert list(loaded.errors) == [str(tmp_path / 'Bad.jack')]
+    assert loaded.updateProject(tmp_path) == []
+    assert SymbolIndex.load(tmp_path / 'missing.idx').classes == {}
+    corrupt = tmp_path / 'corrupt.idx'
+    for state in (42, (GRAMMAR_VERSION, INDEX_VERSION), (GRAMMAR_VERSION, INDEX_VERSION, {}, {}, {'A': 1}, {})):
+        corrupt.write_bytes(pickle.dumps(state))
+        assert SymbolIndex.load(corrupt).classes == {}
+    corrupt.write_bytes(b'\x80\x04c')
+    assert SymbolIndex.load(corrupt).files == {}
+
+
+def test_parse_server_pipelines_and_caches(tmp_path):
+    square = os.path.join(SAMPLES, 'Square.jack')
+    with open(square) as file:
+        source = file.read()
+    expected = repr(CompilerParser(tokenizeFile(square)).compileProgram())
+
+    async def session():
+        server = ParseServer(workers=0, max_pending=2, cache_size=1)
+        host, port = await server.start(port=0)
+        client = await ParseClient.connect(host=host, port=port)
+        responses = await asyncio.gather(
+            client.request(source=source),
+            client.request(path=square),
+            client.request(source='class A { static int ; }'),
+            client.request(path=str(tmp_path / 'missing.jack')),
+            client.request(source=source, format='xml'),
+            client.request(source=source, format='json'),
+        )
+        again = await client.request(source=source, format='xml')
+        await client.close()
+        await server.close()
+        return server, responses, again
+
+    server, responses, again = asyncio.run(session())
+    tree, by_path, bad, missing, xml, unknown = responses
+    assert tree['ok'] and not tree['cached'] and tree['nodes'] > 100
+    assert repr(loadBinary(base64.b64decode(tree['tree']))) == expected
+    assert by_path['cached'] and by_path['tree'] == tree['tree']
+    assert not bad['ok'] and 'Expected identifier' in bad['error']
+    assert not missing['ok'] and not unknown['ok']
+    assert xml['tree'].startswith('<program>\n  <class>\n')
+    assert again['cached'] and again['tree'] == xml['tree']
+    assert len(server.cache) == 1 and server.connections == {}
+
+
+def test_parse_server_workers_and_bad_frames():
+    square = os.path.join(SAMPLES, 'Square.jack')
+
+    async def session():
+        server = ParseServer(workers=1)
+        host, port = await server.start(port=0)
+        client = await ParseClient.connect(host=host, port=port)
+        parsed = await client.request(path=square, format='none')
+        await client.close()
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(FRAME_HEADER.pack(5) + b'{oops')
+        await writer.drain()
+        error = await readFrame(reader)
+        closed = await readFrame(reader)
+        writer.close()
+
+        client = await ParseClient.connect(host=host, port=port)
+        body = 'function void f() { let x = 1 + 2; do g(x, 3); } ' * 2000
+        pending = [asyncio.ensure_future(client.request(source=f'class A{i} {{ {body} }}')) for i in range(20)]
+        await asyncio.sleep(0.2)
+        start = time.perf_counter()
+        await server.close()
+        close_time = time.perf_counter() - start
+        dropped = await asyncio.gather(*pending, return_exceptions=True)
+        await client.close()
+        return parsed, error, closed, close_time, dropped
+
+    parsed, error, closed, close_time, dropped = asyncio.run(session())
+    assert parsed['ok'] and parsed['nodes'] > 100
+    assert not error['ok'] and error['id'] is None and 'Bad frame' in error['error']
+    assert closed is None
+    assert all(isinstance(result, ConnectionError) for result in dropped)
+    assert close_time < 2
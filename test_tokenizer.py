@@ -0,0 +1,130 @@
+import io
+import mmap
+from array import array
+
+import pytest
+
+from CompilerParser import CompilerParser
+from JackTokenizer import JackTokenizer, tokenize
+from ParseTree import ParseException
+from ProjectCompiler import parseSource
+from TokenStream import TokenStream, TokenStreamParser
+
+SOURCE = '''
+// line comment
+class Main {
+    /** doc
+     * comment */
+    static int a;
+    function void main() {
+        let a = 10 / 2;
+        do Output.printString("hi there");
+        return;
+    }
+}
+'''
+
+
+def pairs(tokens):
+    return [(token.getType(), token.getValue()) for token in tokens]
+
+
+def test_tokenizer_lexical_classes():
+    tokens = pairs(JackTokenizer(SOURCE.encode()))
+    assert tokens[:4] == [('keyword', 'class'), ('identifier', 'Main'), ('symbol', '{'), ('keyword', 'static')]
+    assert ('integerConstant', '10') in tokens
+    assert ('symbol', '/') in tokens
+    assert ('stringConstant', 'hi there') in tokens
+    assert tokens[-1] == ('symbol', '}')
+
+
+def test_tokenizer_sources_agree(tmp_path):
+    path = tmp_path / 'Main.jack'
+    path.write_text(SOURCE)
+    expected = pairs(JackTokenizer(SOURCE.encode()))
+    assert pairs(JackTokenizer(str(path), chunk_size=3)) == expected
+    assert pairs(JackTokenizer(io.StringIO(SOURCE), chunk_size=5)) == expected
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        assert pairs(JackTokenizer(buffer, chunk_size=7)) == expected
+
+
+def test_tokenizer_unterminated_comment():
+    with pytest.raises(ParseException):
+        list(JackTokenizer(b'class /* never closed'))
+
+
+def test_parser_pulls_lazily():
+    consumed = []
+
+    def tokens():
+        for token in JackTokenizer(SOURCE.encode()):
+            consumed.append(token)
+            yield token
+
+    parser = CompilerParser(tokens())
+    assert len(consumed) == 1
+    tree = parser.compileProgram()
+    assert tree.getType() == 'program'
+    assert parser.current() is None
+
+
+def test_bulk_tokenizer_matches_streaming():
+    assert pairs(tokenize(SOURCE)) == pairs(JackTokenizer(SOURCE.encode()))
+
+
+def test_bulk_tokenizer_shares_tokens():
+    tokens = tokenize('class A { field A a, b; field A c; }')
+    assert tokens[0] is tokenize('class')[0]
+    assert tokens[1] is tokens[4]
+    assert tokens[3] is tokens[9]
+    assert tokens[8] is tokens[12]
+
+
+@pytest.mark.parametrize('source', ['class /* open', 'let s = "open', 'let a = #;'])
+def test_bulk_tokenizer_errors(source):
+    with pytest.raises(ParseException):
+        tokenize(source)
+
+
+def test_token_stream_columns():
+    stream = TokenStream.fromSource(SOURCE)
+    assert pairs(stream) == pairs(tokenize(SOURCE))
+    assert stream.kinds.itemsize == 1 and stream.offsets.itemsize == 4
+    assert SOURCE[stream.offsets[1]:].startswith('Main')
+    assert stream[1] is stream[1]
+
+
+def test_token_stream_parser_builds_same_tree():
+    expected = CompilerParser(tokenize(SOURCE)).compileProgram()
+    tree = TokenStreamParser(TokenStream.fromSource(SOURCE)).compileProgram()
+    assert repr(tree) == repr(expected)
+    tree = TokenStreamParser(TokenStream.fromTokens(tokenize(SOURCE))).compileProgram()
+    assert repr(tree) == repr(expected)
+
+
+def test_token_stream_parser_error():
+    with pytest.raises(ParseException):
+        TokenStreamParser(TokenStream.fromSource('class Main { static int ; }')).compileProgram()
+
+
+def test_token_offsets_are_utf8_byte_offsets():
+    source = 'class Main {\n  // héllo\n  static String s; /* ü */ field int x;\n}\n'
+    data = source.encode('utf-8')
+    offsets = array('I')
+    tokens = tokenize(source, offsets)
+    assert len(offsets) == len(tokens)
+    for token, offset in zip(tokens, offsets):
+        assert data[offset:].decode('utf-8').startswith(token.getValue())
+    assert TokenStream.fromSource(data).offsets == offsets
+
+
+@pytest.mark.parametrize('source, message', [
+    (b'class A {\n  # }', "line 2, column 3: Unexpected character '#'"),
+    ('class A {\n  /* é open'.encode(), 'line 2, column 3: Unterminated comment'),
+    (b'class A {\n  static String s;\n  field int "x;\n}', 'line 3, column 13: Unterminated string constant'),
+])
+def test_lexical_errors_are_located(source, message):
+    with pytest.raises(ParseException) as error:
+        parseSource(source)
+    assert str(error.value) == message
+    assert error.value.offset is not None and error.value.position is None
@@ -0,0 +1,234 @@
+import io
+import os
+import sys
+import types
+
+import pytest
+
+from ArenaTree import ArenaParser, ArenaTree
+from Ast import BinOp, Call, Class, If, IntConst, Let, Return, Var, countNodes, lower, walk
+from CompilerParser import CompilerParser
+from JackTokenizer import tokenize
+from MappedTree import MappedTree, writeMappedTrees
+from ParseTree import TOKEN_HASH_CACHE_SIZE, ParseException, ParseTree, indexSubtrees, tokenDigest, tokenHash
+from Token import Token
+from TokenStream import TokenStream, TokenStreamParser
+from TreeDiff import diffTrees
+from TreeSerializer import loadBinary, readBinary, readXML, writeBinary, writeXML
+
+SAMPLES = os.path.join(os.path.dirname(__file__), 'samples')
+
+
+def sampleTokens(name='Square.jack'):
+    with open(os.path.join(SAMPLES, name)) as file:
+        return tokenize(file.read())
+
+
+def test_arena_parser_matches_parse_tree():
+    tokens = sampleTokens()
+    expected = CompilerParser(tokens).compileProgram()
+    root = ArenaParser(tokens).parse()
+    assert repr(root) == repr(expected)
+    assert repr(root.arena.toParseTree()) == repr(expected)
+
+
+def test_arena_from_parse_tree_and_views():
+    tree = CompilerParser(sampleTokens('Main.jack')).compileProgram()
+    root = ArenaTree.fromParseTree(tree).root()
+    assert root.getType() == 'program'
+    klass = root.getChildren()[0]
+    assert klass.getType() == 'class'
+    assert [child.getValue() for child in klass.getChildren()[:3]] == ['class', 'Main', '{']
+    assert klass.getChildren()[0].getChildren() == []
+    assert repr(root) == repr(tree)
+
+
+def test_arena_parser_combines_with_token_stream():
+    class Parser(ArenaParser, TokenStreamParser):
+        pass
+
+    tokens = sampleTokens()
+    root = Parser(TokenStream.fromTokens(tokens)).parse()
+    assert repr(root) == repr(CompilerParser(tokens).compileProgram())
+
+
+def test_arena_parser_from_iterator():
+    tokens = sampleTokens()
+    root = ArenaParser(iter(tokens)).parse()
+    assert repr(root) == repr(CompilerParser(tokens).compileProgram())
+    assert isinstance(root.arena.toParseTree(), ParseTree)
+
+
+def preorder(tree):
+    expected = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParseTree):
+            expected.append(node.getType())
+            stack.extend(reversed(node.getChildren()))
+        else:
+            expected.append(node)
+    return expected
+
+
+def test_match_is_linear_and_non_destructive():
+    tree = CompilerParser(sampleTokens('Main.jack')).compileProgram()
+    expected = preorder(tree)
+    snapshot = list(expected)
+    assert tree.match(expected)
+    assert expected == snapshot
+    assert not tree.match(expected[:-1])
+    changed = list(expected)
+    changed[changed.index(Token('identifier', 'sum'))] = Token('identifier', 'total')
+    assert not tree.match(changed)
+    assert not tree.match(['class'])
+
+
+def test_structural_hash_equality_and_index():
+    tokens = sampleTokens()
+    tree = CompilerParser(tokens).compileProgram()
+    other = CompilerParser(list(tokens)).compileProgram()
+    assert tree.sameAs(other)
+    subroutines = [child for child in tree.children[0].children if getattr(child, 'type', None) == 'subroutine']
+    assert not subroutines[0].sameAs(subroutines[1])
+    index = indexSubtrees(tree)
+    assert index[other.children[0].children[5].structuralHash()].getType() == 'subroutine'
+    changed = CompilerParser(sampleTokens('Main.jack')).compileProgram()
+    assert not tree.sameAs(changed)
+    changed.addChild(tokens[0])
+    assert changed.structural_hash is None
+
+
+def test_diff_trees_reports_changed_members():
+    old = CompilerParser(tokenize('class A { field int x, y; static int s; function void f() { return; } '
+                                  'method int g() { return 1; } method void h() { return; } }')).compileProgram()
+    new = CompilerParser(tokenize('class A { field int x, y; static int t; function void f() { return; } '
+                                  'method int g() { return 2; } method void k() { return; } }')).compileProgram()
+    diff = diffTrees(old, new)
+    assert sorted(diff.added) == [('classVarDec', ('t',)), ('subroutine', 'k')]
+    assert sorted(diff.removed) == [('classVarDec', ('s',)), ('subroutine', 'h')]
+    assert diff.modified == [('subroutine', 'g')]
+    assert diffTrees(old, old) == ([], [], [])
+
+
+def test_xml_and_binary_serializers_round_trip():
+    tree = CompilerParser(sampleTokens()).compileProgram()
+    tree.children[0].addChild(ParseTree('note', 'kept'))
+
+    text = io.StringIO()
+    writeXML(tree, text)
+    lines = text.getvalue().splitlines()
+    assert lines[:3] == ['<program>', '  <class>', '    <keyword> class </keyword>']
+    assert '<symbol> &lt; </symbol>' in text.getvalue()
+    text.seek(0)
+    assert repr(readXML(text)) == repr(tree).replace('note, kept', 'note, None')
+
+    data = io.BytesIO()
+    writeBinary(tree, data)
+    data.seek(0)
+    loaded = readBinary(data)
+    assert repr(loaded) == repr(tree)
+    leaves = []
+    stack = [loaded]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Token):
+            leaves.append(node)
+        else:
+            stack.extend(node.children)
+    assert len({id(leaf) for leaf in leaves}) == len(set(leaves)) < len(leaves)
+    arena_data = io.BytesIO()
+    writeBinary(ArenaParser(sampleTokens()).parse().arena, arena_data)
+    assert repr(loadBinary(arena_data.getvalue())) == repr(CompilerParser(sampleTokens()).compileProgram())
+    with pytest.raises(ParseException):
+        loadBinary(data.getvalue()[:-3])
+    with pytest.raises(ParseException):
+        loadBinary(data.getvalue() + b'\0')
+    with pytest.raises(ParseException):
+        loadBinary(data.getvalue().replace(b'kept', b'\xffept'))
+
+    deep = ParseTree('expression')
+    node = deep
+    for _ in range(sys.getrecursionlimit() * 2):
+        child = ParseTree('term')
+        node.addChild(child)
+        node = child
+    assert repr(deep).startswith('ParseTree(expression, None, [ParseTree(term, None, [')
+    data = io.BytesIO()
+    writeBinary(deep, data)
+    assert repr(loadBinary(data.getvalue())) == repr(deep)
+
+
+def test_mapped_tree_file_views_match_parse_trees(tmp_path):
+    square = CompilerParser(sampleTokens()).compileProgram()
+    main = ArenaParser(sampleTokens('Main.jack')).parse()
+    path = tmp_path / 'project.jmt'
+    writeMappedTrees(path, [('Square.jack', square), ('Main.jack', main.arena)])
+
+    with MappedTree(path) as mapped:
+        assert list(mapped) == ['Square.jack', 'Main.jack']
+        root = mapped['Square.jack']
+        assert repr(root) == repr(square)
+        assert repr(mapped['Main.jack']) == repr(main)
+        klass = root.getChildren()[0]
+        assert klass.getType() == 'class' and klass.getValue() is None and not klass.isLeaf()
+        name = klass.getChildren()[1]
+        assert name.isLeaf() and name.getValue() == 'Square' and name.getChildren() == []
+        assert klass.getChildren()[1] == name and len({name, klass.getChildren()[1]}) == 1
+
+    (tmp_path / 'bad.jmt').write_bytes(b'not a tree file' * 4)
+    data = path.read_bytes()
+    assert data[4:8] == (2).to_bytes(4, 'little')
+    (tmp_path / 'empty.jmt').write_bytes(b'')
+    (tmp_path / 'header.jmt').write_bytes(data[:20])
+    (tmp_path / 'nodes.jmt').write_bytes(data[:len(data) // 2])
+    (tmp_path / 'strings.jmt').write_bytes(data[:-3])
+    for name in ('bad.jmt', 'empty.jmt', 'header.jmt', 'nodes.jmt', 'strings.jmt'):
+        with pytest.raises(ParseException):
+            MappedTree(tmp_path / name)
+
+
+def test_lowering_to_ast():
+    tree = CompilerParser(sampleTokens()).compileProgram()
+    ast = lower(tree)
+    assert isinstance(ast, Class) and ast.name == 'Square'
+    assert [(field.kind, field.names) for field in ast.fields] == [('field', ('x', 'y')), ('field', ('size',))]
+    new = ast.subroutines[0]
+    assert (new.kind, new.return_type, new.name) == ('constructor', 'Square', 'new')
+    assert [parameter.name for parameter in new.parameters] == ['Ax', 'Ay', 'Asize']
+    assert new.body[0] == Let('x', None, Var('Ax'))
+    assert new.body[3].call == Call(None, 'draw', ())
+    assert isinstance(new.body[-1], Return)
+
+    inc_size = ast.subroutines[4]
+    condition = inc_size.body[0].condition
+    assert isinstance(inc_size.body[0], If) and condition.op == '&'
+    assert condition.left == BinOp('<', BinOp('+', Var('y'), Var('size')), IntConst(254))
+    assert countNodes(ast) * 3 < sum(1 for _ in walkTree(tree))
+    assert lower(ArenaParser(sampleTokens()).parse()) == ast
+    assert next(walk(ast)) is ast
+
+
+def walkTree(tree):
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(getattr(node, 'children', ()))
+
+
+def test_token_hash_memo_is_bounded():
+    for index in range(TOKEN_HASH_CACHE_SIZE + 10):
+        tokenHash(Token('integerConstant', str(index)))
+    assert tokenDigest.cache_info().currsize <= TOKEN_HASH_CACHE_SIZE
+    assert tokenHash(Token('identifier', 'x')) == tokenHash(Token('identifier', 'x'))
+
+
+def test_mapped_tree_byteswap_path_round_trips(tmp_path, monkeypatch):
+    square = CompilerParser(sampleTokens()).compileProgram()
+    path = tmp_path / 'project.jmt'
+    monkeypatch.setattr('MappedTree.sys', types.SimpleNamespace(byteorder='big'))
+    writeMappedTrees(path, [('Square.jack', square)])
+    with MappedTree(path) as mapped:
+        assert repr(mapped['Square.jack']) == repr(square)
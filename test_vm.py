@@ -0,0 +1,124 @@
+import os
+
+from Ast import BinOp, IntConst, KeywordConst, UnaryOp, Var, lower
+from ExpressionParser import IterativeExpressionParser
+from JackTokenizer import tokenize
+from VMEmulator import VMEmulator
+from VMGenerator import CodeGenerator, compileSource, foldExpression, formatCommands, optimizeCommands
+
+SAMPLES = os.path.join(os.path.dirname(__file__), 'samples')
+
+
+def test_constant_folding_uses_16_bit_semantics():
+    assert foldExpression(BinOp('+', IntConst(32767), IntConst(1))) == IntConst(-32768)
+    assert foldExpression(BinOp('*', IntConst(300), IntConst(300))) == IntConst(24464)
+    assert foldExpression(BinOp('/', UnaryOp('-', IntConst(7)), IntConst(2))) == IntConst(-3)
+    assert foldExpression(BinOp('<', IntConst(1), IntConst(2))) == IntConst(-1)
+    assert foldExpression(BinOp('&', KeywordConst('true'), IntConst(6))) == IntConst(6)
+    assert foldExpression(UnaryOp('~', IntConst(0))) == IntConst(-1)
+    assert foldExpression(BinOp('/', IntConst(1), IntConst(0))) == BinOp('/', IntConst(1), IntConst(0))
+    assert foldExpression(BinOp('+', Var('x'), BinOp('-', IntConst(2), IntConst(2)))) == Var('x')
+    assert foldExpression(BinOp('*', IntConst(1), UnaryOp('-', UnaryOp('-', Var('y'))))) == Var('y')
+
+
+def test_peephole_optimizer():
+    commands = [
+        ('function', 'A.f', 1),
+        ('push', 'local', 0), ('pop', 'local', 0),
+        ('push', 'local', 0), ('not',), ('not',),
+        ('if-goto', 'L1'),
+        ('goto', 'L2'),
+        ('push', 'constant', 5),
+        ('label', 'L1'), ('goto', 'L3'),
+        ('label', 'L2'), ('label', 'L3'),
+        ('push', 'constant', 0), ('return',),
+    ]
+    assert optimizeCommands(commands) == [
+        ('function', 'A.f', 1),
+        ('push', 'local', 0),
+        ('if-goto', 'L3'),
+        ('label', 'L3'),
+        ('push', 'constant', 0), ('return',),
+    ]
+
+
+def test_generated_code_runs_the_same_optimized():
+    with open(os.path.join(SAMPLES, 'Main.jack')) as file:
+        source = file.read()
+    runs = []
+    for optimize in (False, True):
+        commands = compileSource(source, optimize)
+        emulator = VMEmulator(commands, inputs=[3, 10, 20, 33])
+        emulator.run('Main.main')
+        runs.append((commands, emulator))
+    (plain, slow), (optimized, fast) = runs
+    assert ''.join(slow.output) == ''.join(fast.output)
+    assert 'The average is 21\n' in ''.join(fast.output)
+    assert fast.instructions < slow.instructions and len(optimized) <= len(plain)
+    assert formatCommands(optimized).startswith('function Main.main 4\npush constant 18\ncall String.new 1\n')
+
+
+def test_objects_methods_and_folded_branches():
+    source = '''
+    class Counter {
+        field int count;
+        static int created;
+        constructor Counter new(int start) { let count = start; let created = created + 1; return this; }
+        method int add(int amount) { let count = count + amount; return count; }
+        function int main() {
+            var Counter counter;
+            var Array values;
+            var int i;
+            let counter = Counter.new(2 * 3);
+            let values = Array.new(4);
+            let i = 0;
+            while (i < 4) {
+                let values[i] = counter.add(i * 10);
+                let i = i + 1;
+            }
+            if (false) { let i = 1000; } else { let i = values[3] - values[0]; }
+            return i + created;
+        }
+    }
+    '''
+    plain = compileSource(source, optimize=False)
+    optimized = compileSource(source)
+    assert VMEmulator(plain).run('Counter.main') == VMEmulator(optimized).run('Counter.main') == 61
+    assert ('push', 'constant', 1000) in plain and ('push', 'constant', 1000) not in optimized
+    assert ('push', 'constant', 6) in optimized
+
+
+def test_non_boolean_conditions_run_the_same_optimized():
+    source = '''
+    class A {
+        function int main() {
+            var int x, n, r;
+            let x = 3;
+            if (x & 1) { let r = 10; } else { let r = 20; }
+            if (1) { let r = r + 100; } else { let r = r + 200; }
+            if (x) { let r = r + 1000; }
+            while (x) { let n = n + 1; let x = x - 1; }
+            while (1) { let n = n + 50; }
+            if (x < 1) { let r = r + 3000; } else { let r = r + 4000; }
+            return r + n;
+        }
+    }
+    '''
+    plain = VMEmulator(compileSource(source, optimize=False)).run('A.main')
+    optimized = VMEmulator(compileSource(source)).run('A.main')
+    assert plain == optimized == 4220
+
+
+def test_deeply_nested_expressions_lower_and_compile():
+    depth = 5000
+    source = (
+        'class A { function int main() { var int x, y; let x = 2; '
+        'let y = ' + '(' * depth + 'x' + ' + 1)' * depth + '; '
+        'if (' + '(' * depth + 'y < x' + ' & (x < y))' * depth + ') { return y; } '
+        'else { return ' + '-' * depth + 'y; } } }'
+    )
+    ast = lower(IterativeExpressionParser(tokenize(source)).compileProgram())
+    for optimize in (False, True):
+        commands = CodeGenerator(optimize).compileClass(ast)
+        assert commands.count(('add',)) == depth
+        assert VMEmulator(commands).run('A.main') == depth + 2